@@ -2,7 +2,11 @@
 This file contains the config for the home app.
 """
 
+import atexit
+
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class HomeConfig(AppConfig):
@@ -11,3 +15,18 @@ class HomeConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'home'
+
+    def ready(self):
+        """
+        This method tunes every new SQLite connection (WAL, busy timeout, caches),
+        keeps the SQLite full-text index in place after migrations and writes any
+        buffered job views when the process exits.
+        """
+        from . import tracking # pylint: disable=import-outside-toplevel
+        from .db import configure_sqlite_connection # pylint: disable=import-outside-toplevel
+        from .search import ensure_search_index # pylint: disable=import-outside-toplevel
+        connection_created.connect(configure_sqlite_connection,
+                                   dispatch_uid='home.configure_sqlite_connection')
+        post_migrate.connect(ensure_search_index, sender=self,
+                             dispatch_uid='home.ensure_search_index')
+        atexit.register(tracking.flush)
@@ -0,0 +1,443 @@
+"""
+This module contains the async variants of the AI AJAX views.
+
+They await the async OpenAI client instead of blocking a worker, so under the
+ASGI server (myproject.asgi) one process can keep many AI calls in flight.
+"""
+import functools
+import logging
+
+from asgiref.sync import sync_to_async
+from openai import APITimeoutError
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+import markdown
+
+from users.views import (ResumeFeedbackError, aget_resume_feedback, ## pylint: disable=import-error,no-name-in-module,wrong-import-order
+                         astream_resume_feedback, get_resume_text, resume_parse_failed)
+from users.models import Resume ## pylint: disable=import-error,no-name-in-module,wrong-import-order
+
+from .forms import CoverLetterForm # pylint: disable=import-error,no-name-in-module
+from .models import JobListing
+from . import completion_cache, http_client
+from .streaming import MarkdownStream, sse_event, sse_response
+from .interview_service import InterviewService # pylint: disable=import-error,no-name-in-module
+from .cover_letter_service import CoverLetterService # pylint: disable=import-error,no-name-in-module
+from .views import (JOB_FEEDBACK_NO_KEY_ERROR, JOB_FEEDBACK_TIMEOUT_ERROR,
+                    JOB_FEEDBACK_GENERIC_ERROR, fill_cover_letter_placeholders,
+                    job_specific_feedback_request, job_fit_analysis_request,
+                    rejection_reasons_request)
+
+logger = logging.getLogger(__name__)
+
+
+def async_login_required(view_func):
+    """
+    Async counterpart of login_required; the session user is loaded off the event loop.
+    """
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def is_ajax_post(request):
+    """
+    Check whether the request is an AJAX POST.
+    """
+    return request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+async def alatest_resume_text(user):
+    """
+    Get the cached text of the user's most recent resume, or None if there is none.
+    """
+    latest_resume = await Resume.objects.filter(user=user).order_by('-uploaded_at').afirst()
+    if latest_resume is None:
+        return None
+    return await sync_to_async(get_resume_text)(latest_resume)
+
+
+@async_login_required
+async def ajax_generate_questions(request):
+    """API endpoint to generate interview questions asynchronously."""
+    if is_ajax_post(request):
+        job_description = request.POST.get('job_description', '')
+        regenerate = bool(request.POST.get('regenerate'))
+        job = await JobListing.objects.filter( # pylint: disable=no-member
+            job_id=request.POST.get('job_id') or None).afirst()
+
+        try:
+            if job:
+                questions = await InterviewService.aget_job_questions(
+                    job, regenerate=regenerate, replace_stored=request.user.is_staff)
+            else:
+                questions = await InterviewService.agenerate_interview_questions(
+                    job_description, use_cache=not regenerate)
+            return JsonResponse({'questions': questions})
+        except Exception: # pylint: disable=broad-exception-caught
+            return JsonResponse({'error': 'Failed to generate questions. Please try again.'},
+                                status=500)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@async_login_required
+async def ajax_evaluate_response(request):
+    """API endpoint to evaluate interview responses asynchronously"""
+    if is_ajax_post(request):
+        data = request.POST
+        question = data.get('question', '')
+        response = data.get('response', '')
+        job_description = data.get('job_description', '')
+
+        if not response:
+            return JsonResponse({'error': 'Response is required'}, status=400)
+
+        try:
+            feedback = await InterviewService.aevaluate_response(question, response,
+                                                                 job_description)
+            return JsonResponse(feedback)
+        except Exception: # pylint: disable=broad-exception-caught
+            return JsonResponse({'error': \
+            'Unable to evaluate response. Please try again later.'}, status=500)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@async_login_required
+async def ajax_resume_feedback(request):
+    """AJAX endpoint to get feedback on a resume for a specific job."""
+    if is_ajax_post(request):
+        job_description = request.POST.get('job_description', '')
+        resume_id = request.POST.get('resume_id')
+
+        if not resume_id:
+            return JsonResponse({'error': 'No resume selected'}, status=400)
+
+        try:
+            resume = await Resume.objects.aget(id=resume_id, user=request.user)
+
+            resume_text = await sync_to_async(get_resume_text)(resume)
+
+            general_feedback = await aget_resume_feedback(resume_text)
+
+            job_specific_feedback = await aget_job_specific_feedback(resume_text,
+                                                                     job_description)
+
+            return JsonResponse({
+                'success': True,
+                'general_feedback': general_feedback,
+                'job_specific_feedback': job_specific_feedback
+            })
+        except Resume.DoesNotExist:
+            return JsonResponse({'error': 'Resume not found'}, status=404)
+        except Exception: # pylint: disable=broad-exception-caught
+            return JsonResponse({'error': \
+            'Unable to generate resume feedback. Please try again later.'}, status=500)
+
+    return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+async def aget_job_specific_feedback(resume_text, job_description):
+    """
+    Async variant of get_job_specific_feedback.
+    """
+    try:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
+            return markdown.markdown(JOB_FEEDBACK_NO_KEY_ERROR)
+
+        content = await completion_cache.acreate_completion(
+            'job_specific_feedback', api_key,
+            job_specific_feedback_request(resume_text, job_description)
+        )
+
+        return markdown.markdown(content)
+    except APITimeoutError:
+        return markdown.markdown(JOB_FEEDBACK_TIMEOUT_ERROR)
+    except Exception: # pylint: disable=broad-exception-caught
+        return markdown.markdown(JOB_FEEDBACK_GENERIC_ERROR)
+
+
+async def acover_letter_arguments(request, form):
+    """
+    Collect the cover letter inputs from a valid form, or return an error response.
+    """
+    user_info = {
+        'name': form.cleaned_data['user_name'],
+        'email': form.cleaned_data['user_email'],
+        'phone': form.cleaned_data['user_phone'],
+        'address': form.cleaned_data['user_address']
+    }
+
+    resume_text = None
+    if form.cleaned_data['use_resume']:
+        try:
+            resume_text = await alatest_resume_text(request.user)
+        except Exception: # pylint: disable=broad-exception-caught
+            return None, JsonResponse({'error': 'Unable to process your resume. \
+                                       Please try again later.'}, status=500)
+        if resume_text is None:
+            return None, JsonResponse({'error': 'Resume not found. \
+                                       Please upload a resume first.'}, status=400)
+        if resume_parse_failed(resume_text):
+            resume_text = None
+
+    return {
+        'job_description': form.cleaned_data['job_description'],
+        'resume_text': resume_text,
+        'user_info': user_info
+    }, None
+
+
+@async_login_required
+async def ajax_generate_cover_letter(request):
+    """Handles AJAX request to generate cover letter text."""
+    if not is_ajax_post(request):
+        return JsonResponse({'error': 'This endpoint only accepts AJAX POST requests'},
+                            status=405)
+
+    form = CoverLetterForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid form data'}, status=400)
+
+    arguments, error_response = await acover_letter_arguments(request, form)
+    if error_response:
+        return error_response
+
+    try:
+        cover_letter_text = await CoverLetterService.agenerate_cover_letter(**arguments)
+
+        cover_letter_text = fill_cover_letter_placeholders(
+            cover_letter_text,
+            form.cleaned_data.get('company_name'),
+            form.cleaned_data.get('job_title')
+        )
+
+        return JsonResponse({
+            'success': True,
+            'cover_letter_text': cover_letter_text
+        })
+
+    except Exception: # pylint: disable=broad-exception-caught
+        return JsonResponse({'error': 'Unable to generate cover letter. \
+                             Please try again later.'}, status=500)
+
+
+@async_login_required
+async def ajax_stream_cover_letter(request):
+    """
+    Streams the cover letter as server-sent events: a 'delta' per chunk of text, then
+    a 'done' event with the finished letter (placeholders filled in).
+    """
+    if not is_ajax_post(request):
+        return JsonResponse({'error': 'This endpoint only accepts AJAX POST requests'},
+                            status=405)
+
+    form = CoverLetterForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid form data'}, status=400)
+
+    arguments, error_response = await acover_letter_arguments(request, form)
+    if error_response:
+        return error_response
+
+    async def events():
+        chunks = []
+        try:
+            async for delta in CoverLetterService.astream_cover_letter(**arguments):
+                chunks.append(delta)
+                yield sse_event({'delta': delta})
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.error("Error streaming cover letter", exc_info=True)
+            yield sse_event({'error': 'Unable to generate cover letter. '
+                                      'Please try again later.'}, event='error')
+            return
+
+        yield sse_event({
+            'cover_letter_text': fill_cover_letter_placeholders(
+                ''.join(chunks),
+                form.cleaned_data.get('company_name'),
+                form.cleaned_data.get('job_title')
+            )
+        }, event='done')
+
+    return sse_response(events())
+
+
+@async_login_required
+async def resume_feedback_stream(request, resume_id):
+    """
+    Streams AI feedback for a resume as server-sent events, rendering the Markdown
+    block by block, and saves the finished feedback on the resume.
+    """
+    try:
+        resume = await Resume.objects.select_related('user__profile').aget(
+            id=resume_id, user=request.user)
+    except Resume.DoesNotExist:
+        return JsonResponse({'error': 'Resume not found'}, status=404)
+
+    if not (resume.user.is_superuser or resume.user.profile.whitelisted_for_ai):
+        return sse_response([sse_event({'html': markdown.markdown(
+            "## Eligibility\n\nYou are not currently eligible for AI feedback. "
+            "Please contact support if you believe this is an error.")}, event='error')])
+
+    if resume.ai_feedback:
+        return sse_response([sse_event({'html': resume.ai_feedback}, event='done')])
+
+    resume_text = await sync_to_async(get_resume_text)(resume)
+    if resume_parse_failed(resume_text):
+        return sse_response([sse_event({'html': markdown.markdown(
+            f"## Error\n\nCould not parse resume file: {resume_text}")}, event='error')])
+
+    async def events():
+        stream = MarkdownStream()
+        try:
+            async for delta in astream_resume_feedback(resume_text):
+                html, tail = stream.feed(delta)
+                yield sse_event({'html': html, 'tail': tail})
+        except ResumeFeedbackError as ex:
+            yield sse_event({'html': ex.html}, event='error')
+            return
+
+        feedback_html = stream.render()
+
+        resume.ai_feedback = feedback_html
+        await resume.asave(update_fields=['ai_feedback'])
+        yield sse_event({'html': feedback_html}, event='done')
+
+    return sse_response(events())
+
+
+@async_login_required
+async def ajax_job_outlook(request):
+    """
+    View to handle the job outlook functionality
+    """
+    if is_ajax_post(request):
+        job_title = request.POST.get('job_title', '')
+        job_description = request.POST.get('job_description', '')
+        industry = request.POST.get('industry', '')
+        location = request.POST.get('location', '')
+
+        if not job_title:
+            return JsonResponse({'error': 'No job title provided'}, status=400)
+
+        try:
+            resume_text = None
+            try:
+                resume_text = await alatest_resume_text(request.user)
+            except Exception: # pylint: disable=broad-exception-caught
+                pass
+
+            if not resume_text:
+                return JsonResponse({'error': 'No resume found to analyze fit'}, status=400)
+
+            fit_analysis = await aget_job_fit_analysis(
+                job_title=job_title,
+                job_description=job_description,
+                industry=industry,
+                location=location,
+                resume_text=resume_text
+            )
+
+            return JsonResponse({
+                'success': True,
+                'fit_analysis': fit_analysis
+            })
+        except Exception: # pylint: disable=broad-exception-caught
+            return JsonResponse({'error': 'Error generating fit analysis. \
+                                 Please try again later.'}, status=500)
+
+    return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+async def aget_job_fit_analysis(job_title, job_description,
+                                industry=None, location=None, resume_text=None):
+    """
+    Async variant of get_job_fit_analysis.
+    """
+    try:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
+            return "Job fit analysis requires an OpenAI API key."
+
+        if not resume_text:
+            return "Cannot analyze fit without a resume. Please upload your resume first."
+
+        return await completion_cache.acreate_completion(
+            'fit_analysis', api_key,
+            job_fit_analysis_request(job_title, job_description,
+                                     industry, location, resume_text)
+        )
+    except APITimeoutError:
+        return "Unable to generate job fit analysis: Request timed out."
+    except Exception: # pylint: disable=broad-exception-caught
+        return "Unable to generate job fit analysis. Please try again later."
+
+
+@async_login_required
+async def ajax_rejection_generator(request):
+    """
+    View to handle the rejection generator functionality
+    """
+    if is_ajax_post(request):
+        job_title = request.POST.get('job_title', '')
+        job_description = request.POST.get('job_description', '')
+        industry = request.POST.get('industry', '')
+        location = request.POST.get('location', '')
+
+        if not job_title:
+            return JsonResponse({'error': 'No job title provided'}, status=400)
+
+        try:
+            resume_text = None
+            try:
+                resume_text = await alatest_resume_text(request.user)
+            except Exception: # pylint: disable=broad-exception-caught
+                pass
+
+            rejection_reasons = await agenerate_rejection_reasons(
+                job_title=job_title,
+                job_description=job_description,
+                industry=industry,
+                location=location,
+                resume_text=resume_text
+            )
+
+            return JsonResponse({
+                'success': True,
+                'rejection_reasons': rejection_reasons
+            })
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.error("Error generating rejection reasons", exc_info=True)
+            return JsonResponse({'error': 'An internal error occurred while \
+                                 generating rejection reasons.'}, status=500)
+
+    return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+async def agenerate_rejection_reasons(job_title, job_description,
+                                      industry=None, location=None, resume_text=None):
+    """
+    Async variant of generate_rejection_reasons.
+    """
+    try:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
+            return "Rejection reason simulator requires an OpenAI API key."
+
+        return await completion_cache.acreate_completion(
+            'rejection_reasons', api_key,
+            rejection_reasons_request(job_title, job_description,
+                                      industry, location, resume_text)
+        )
+    except APITimeoutError as e:
+        return f"Unable to generate rejection reasons: Request timed out ({e})."
+    except Exception: # pylint: disable=broad-exception-caught
+        logger.error("Error in agenerate_rejection_reasons", exc_info=True)
+        return "Unable to generate rejection reasons due to an internal error."
@@ -0,0 +1,167 @@
+"""
+This file contains the cache backends behind the named CACHES aliases and their
+hit/miss counters.
+
+Each alias is a file-based cache on the data volume, so every gunicorn worker
+reads and writes the same entries. Once an alias holds MAX_ENTRIES, a set()
+culls 1/CULL_FREQUENCY of the entries, least recently used first: a hit bumps
+the file's modification time (the expiry lives in the file itself) and culling
+deletes the files with the oldest ones. Every set() lists the alias directory
+to check its size, and a cull stats each file; that is the price of one cache
+shared by all workers, and why the aliases are capped at a few thousand entries.
+
+Hits and misses are counted in memory and added every STATS_FLUSH_EVERY lookups
+to counters kept in the separate 'cache_stats' alias, which holds only those
+counters and is never culled, so the numbers cover all workers and survive the
+culling of the alias they count. They are approximate because two workers may
+flush at the same moment.
+"""
+import os
+import threading
+from collections import Counter
+from typing import Dict
+
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+SEARCH = 'search'
+AI_COMPLETIONS = 'ai_completions'
+PARSED_RESUMES = 'parsed_resumes'
+FRAGMENTS = 'fragments'
+ALIASES = (SEARCH, AI_COMPLETIONS, PARSED_RESUMES, FRAGMENTS)
+# counters of the aliases above; not a CacheStatsMixin cache itself
+STATS = 'cache_stats'
+
+STATS_FLUSH_EVERY = 50
+_MISSING = object()
+
+
+class CacheStatsMixin:
+    """
+    This mixin counts the hits and misses of get() on a cache backend. The
+    counters live in the STATS cache, keyed by the location of the backend.
+    """
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._stats_prefix = f'{location}:'
+        self._stats_lock = threading.Lock()
+        self._pending_stats = Counter()
+
+    def get(self, key, default=None, version=None):
+        """
+        This method returns the cached value of a key and counts the lookup.
+        """
+        value = super().get(key, _MISSING, version)
+        self._count('hits' if value is not _MISSING else 'misses')
+        return default if value is _MISSING else value
+
+    def _count(self, outcome):
+        with self._stats_lock:
+            self._pending_stats[outcome] += 1
+            if sum(self._pending_stats.values()) < STATS_FLUSH_EVERY:
+                return
+            pending, self._pending_stats = self._pending_stats, Counter()
+        self._flush_stats(pending)
+
+    def _stats_key(self, outcome):
+        return self._stats_prefix + outcome
+
+    def _flush_stats(self, pending):
+        """
+        This method adds counts to the shared counters.
+        """
+        stats_cache = caches[STATS]
+        for outcome, count in pending.items():
+            key = self._stats_key(outcome)
+            stats_cache.set(key, stats_cache.get(key, 0) + count, None)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        This method returns the hits, misses and hit rate of all workers so far.
+        """
+        with self._stats_lock:
+            pending, self._pending_stats = self._pending_stats, Counter()
+        self._flush_stats(pending)
+        hits = caches[STATS].get(self._stats_key('hits'), 0)
+        misses = caches[STATS].get(self._stats_key('misses'), 0)
+        lookups = hits + misses
+        return {'hits': hits, 'misses': misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0}
+
+    def clear(self):
+        """
+        This method drops every entry, the counters included.
+        """
+        with self._stats_lock:
+            self._pending_stats = Counter()
+        caches[STATS].delete_many([self._stats_key('hits'), self._stats_key('misses')])
+        super().clear()
+
+
+def _last_used(path: str) -> float:
+    """
+    This function returns when a cache file was last read or written, or -1 if
+    another worker deleted it meanwhile.
+    """
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return -1
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """
+    A file-based cache that culls the least recently used entries instead of random ones.
+    """
+    def get(self, key, default=None, version=None):
+        """
+        This method returns the cached value of a key and marks the entry as used.
+        """
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except FileNotFoundError:
+            pass
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        filelist.sort(key=_last_used)
+        for fname in filelist[:num_entries // self._cull_frequency]:
+            self._delete(fname)
+
+
+class StatsFileBasedCache(CacheStatsMixin, LRUFileBasedCache):
+    """
+    A least-recently-used file-based cache that counts hits and misses.
+    """
+
+
+class StatsLocMemCache(CacheStatsMixin, LocMemCache):
+    """
+    A local-memory cache (least recently used culled first as well) that counts
+    hits and misses, used while testing.
+    """
+
+
+def get_cache(alias: str):
+    """
+    This function returns the cache of a named alias.
+    """
+    return caches[alias]
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    """
+    This function returns the hit/miss counters of every named alias.
+    """
+    return {alias: get_cache(alias).stats() for alias in ALIASES}
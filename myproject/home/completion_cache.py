@@ -0,0 +1,145 @@
+"""
+This file contains the memoization layer for OpenAI chat completions.
+
+A completion is addressed by the model, the prompt messages (system and user)
+and the temperature of its request, so an identical prompt is answered from the
+shared 'ai_completions' cache instead of being regenerated, whichever worker
+generated it. Entries expire after a per-feature TTL, and once the cache holds
+its MAX_ENTRIES the least recently used third of them is culled (home/cache.py).
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from . import http_client
+from .cache import AI_COMPLETIONS, get_cache
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_TTLS = {
+    'interview_questions': 7 * 24 * 60 * 60,
+    'fit_analysis': 24 * 60 * 60,
+    'rejection_reasons': 24 * 60 * 60,
+    'job_specific_feedback': 24 * 60 * 60,
+}
+
+
+def _setting(name, default):
+    """
+    This function reads an AI_COMPLETION_CACHE_* setting, falling back to the module default.
+    """
+    return getattr(settings, name, default)
+
+
+def is_enabled() -> bool:
+    """
+    This function reports whether completions are memoized at all.
+    """
+    return _setting('AI_COMPLETION_CACHE_ENABLED', True)
+
+
+def get_ttl(feature: str) -> float:
+    """
+    This function returns how long (in seconds) a feature's completions stay cached.
+    """
+    ttls = {**DEFAULT_TTLS, **_setting('AI_COMPLETION_CACHE_TTLS', {})}
+    return ttls.get(feature, DEFAULT_TTL)
+
+
+def completion_key(request: Dict[str, Any]) -> str:
+    """
+    This function returns the content address of a chat completion request.
+    """
+    address = {
+        'model': request.get('model'),
+        'messages': [(message.get('role'), message.get('content'))
+                     for message in request.get('messages', [])],
+        'temperature': request.get('temperature'),
+    }
+    return hashlib.sha256(json.dumps(address, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _use_cache(feature: str, use_cache: bool) -> bool:
+    """
+    This function decides whether a call may read or write the cache.
+    """
+    return use_cache and is_enabled() and get_ttl(feature) > 0
+
+
+def lookup(feature: str, request: Dict[str, Any], use_cache: bool = True) -> Optional[str]:
+    """
+    This function returns the memoized content for a request, or None on a miss.
+    """
+    if not _use_cache(feature, use_cache):
+        return None
+    return get_cache(AI_COMPLETIONS).get(completion_key(request))
+
+
+def store(feature: str, request: Dict[str, Any], content: str, use_cache: bool = True):
+    """
+    This function memoizes the content generated for a request.
+    """
+    if content and _use_cache(feature, use_cache):
+        get_cache(AI_COMPLETIONS).set(completion_key(request), content, get_ttl(feature))
+
+
+async def alookup(feature: str, request: Dict[str, Any], use_cache: bool = True) -> Optional[str]:
+    """
+    This function is the async variant of lookup. The file-based cache is read on
+    a worker thread (aget), so the disk I/O does not block the event loop.
+    """
+    if not _use_cache(feature, use_cache):
+        return None
+    return await get_cache(AI_COMPLETIONS).aget(completion_key(request))
+
+
+async def astore(feature: str, request: Dict[str, Any], content: str, use_cache: bool = True):
+    """
+    This function is the async variant of store, writing on a worker thread (aset).
+    """
+    if content and _use_cache(feature, use_cache):
+        await get_cache(AI_COMPLETIONS).aset(completion_key(request), content,
+                                             get_ttl(feature))
+
+
+def create_completion(feature: str, api_key: str, request: Dict[str, Any],
+                      endpoint: str = 'openai.chat', use_cache: bool = True) -> str:
+    """
+    This function returns the completion content for a request, calling OpenAI on a miss.
+    """
+    content = lookup(feature, request, use_cache)
+    if content is None:
+        response = http_client.get_openai_client(api_key).chat.completions.create(
+            timeout=http_client.get_timeout(endpoint), **request)
+        content = response.choices[0].message.content
+        store(feature, request, content, use_cache)
+    return content
+
+
+async def acreate_completion(feature: str, api_key: str, request: Dict[str, Any],
+                             endpoint: str = 'openai.chat', use_cache: bool = True) -> str:
+    """
+    This function is the async variant of create_completion.
+    """
+    content = await alookup(feature, request, use_cache)
+    if content is None:
+        response = await http_client.get_async_openai_client(api_key).chat.completions.create(
+            timeout=http_client.get_timeout(endpoint), **request)
+        content = response.choices[0].message.content
+        await astore(feature, request, content, use_cache)
+    return content
+
+
+def stats() -> Dict[str, float]:
+    """
+    This function returns the hit/miss counters of the cache.
+    """
+    return get_cache(AI_COMPLETIONS).stats()
+
+
+def clear():
+    """
+    This function empties the cache.
+    """
+    get_cache(AI_COMPLETIONS).clear()
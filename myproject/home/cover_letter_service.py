@@ -3,18 +3,18 @@ This file contains the code for the cover letter service.
 """
 
 import io
-import os
 import datetime
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional
 
+import openai
 import requests
-from pypdf import PdfReader
-from django.conf import settings
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 from reportlab.lib.enums import TA_CENTER
 
+from . import http_client
+
 class CoverLetterService:
     """Service to handle cover letter generation."""
 
@@ -23,12 +23,7 @@ class CoverLetterService:
     @staticmethod
     def get_api_key():
         """Get OpenAI API key from environment or settings."""
-        api_key = os.environ.get('OPENAI_API_KEY')
-
-        if not api_key and hasattr(settings, 'OPENAI_API_KEY'):
-            api_key = settings.OPENAI_API_KEY
-
-        return api_key
+        return http_client.get_openai_api_key()
 
     @staticmethod
     def generate_cover_letter(job_description: str, resume_text: Optional[str] = None,
@@ -44,14 +39,51 @@ class CoverLetterService:
         Returns:
             The generated cover letter text
         """
-        if not user_info:
-            user_info = {
-                "name": "[Your Name]",
-                "email": "[Your Email]",
-                "phone": "[Your Phone]",
-                "address": "[Your Address]"
+        user_info = user_info or CoverLetterService._default_user_info()
+        today = datetime.datetime.now().strftime("%B %d, %Y")
+        template_letter = CoverLetterService._get_template_cover_letter(user_info, today)
+
+        try:
+            api_key = CoverLetterService.get_api_key()
+
+            if not api_key:
+                print("OpenAI API key not found. Using template cover letter.")
+                return template_letter
+
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
             }
 
+            data = CoverLetterService._build_cover_letter_request(
+                job_description, resume_text, user_info, today)
+
+            response = http_client.post(
+                CoverLetterService.API_URL,
+                endpoint='openai.cover_letter',
+                headers=headers,
+                json=data
+            )
+
+            if response.status_code == 200:
+                result = response.json()
+                return result["choices"][0]["message"]["content"].strip()
+
+            print(f"OpenAI API error: {response.status_code}, {response.text}")
+            return template_letter
+
+        except requests.RequestException as e:
+            print(f"Error generating cover letter: {e}")
+            return template_letter
+
+    @staticmethod
+    async def agenerate_cover_letter(job_description: str, resume_text: Optional[str] = None,
+                                     user_info: Optional[Dict] = None) -> str:
+        """
+        Async variant of generate_cover_letter that uses the async OpenAI client,
+        so the calling event loop is never blocked while waiting on the model.
+        """
+        user_info = user_info or CoverLetterService._default_user_info()
         today = datetime.datetime.now().strftime("%B %d, %Y")
         template_letter = CoverLetterService._get_template_cover_letter(user_info, today)
 
@@ -59,11 +91,84 @@ class CoverLetterService:
             api_key = CoverLetterService.get_api_key()
 
             if not api_key:
-                print("OpenAI API key not found. Using template cover letter.")
                 return template_letter
 
-            prompt = f"""Please write a professional
-            cover letter for a job application based on this information:
+            completion = await http_client.get_async_openai_client(api_key).chat.completions.create(
+                timeout=http_client.get_timeout('openai.cover_letter'),
+                **CoverLetterService._build_cover_letter_request(
+                    job_description, resume_text, user_info, today)
+            )
+            return completion.choices[0].message.content.strip()
+
+        except openai.OpenAIError as e:
+            print(f"Error generating cover letter: {e}")
+            return template_letter
+
+    @staticmethod
+    async def astream_cover_letter(job_description: str, resume_text: Optional[str] = None,
+                                   user_info: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Stream a cover letter, yielding text chunks as the model produces them.
+
+        If the model cannot be reached before the first chunk, the template letter
+        is yielded instead. An error after the first chunk is raised, so the letter
+        cut off midway is never passed off as complete.
+        """
+        user_info = user_info or CoverLetterService._default_user_info()
+        today = datetime.datetime.now().strftime("%B %d, %Y")
+        started = False
+
+        try:
+            api_key = CoverLetterService.get_api_key()
+
+            if api_key:
+                stream = await http_client.get_async_openai_client(api_key).chat.completions.create(
+                    timeout=http_client.get_timeout('openai.cover_letter'),
+                    stream=True,
+                    **CoverLetterService._build_cover_letter_request(
+                        job_description, resume_text, user_info, today)
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        started = True
+                        yield delta
+
+        except openai.OpenAIError as e:
+            if started:
+                raise
+            print(f"Error streaming cover letter: {e}")
+
+        if not started:
+            yield CoverLetterService._get_template_cover_letter(user_info, today)
+
+    @staticmethod
+    def _default_user_info() -> Dict[str, str]:
+        """Placeholder applicant details used when none are supplied."""
+        return {
+            "name": "[Your Name]",
+            "email": "[Your Email]",
+            "phone": "[Your Phone]",
+            "address": "[Your Address]"
+        }
+
+    @staticmethod
+    def _build_cover_letter_request(job_description: str, resume_text: Optional[str],
+                                    user_info: Dict, today: str) -> Dict:
+        """
+        Build the chat completion request body for a cover letter.
+
+        Args:
+            job_description: The job description text
+            resume_text: Optional text extracted from the user's resume
+            user_info: Dict with user's name, email, phone, etc.
+            today: The formatted date to put on the letter
+
+        Returns:
+            The request body (model, messages, temperature, max_tokens)
+        """
+        prompt = f"""Please write a professional
+        cover letter for a job application based on this information:
 
 JOB DESCRIPTION:
 {job_description}
@@ -79,20 +184,20 @@ Address: {user_info.get('address', '')}
 
 """
 
-            if resume_text:
-                prompt += f"""RESUME INFORMATION:
+        if resume_text:
+            prompt += f"""RESUME INFORMATION:
 {resume_text}
 
 Based on my resume and the job description, craft a tailored cover letter highlighting the most relevant skills and experiences.
 """
-            else:
-                prompt += """I don't have my resume to share, so
-                please create a general but 
-                persuasive cover letter with placeholders where 
-                I should add my specific experiences.
+        else:
+            prompt += """I don't have my resume to share, so
+            please create a general but 
+            persuasive cover letter with placeholders where 
+            I should add my specific experiences.
 """
 
-            prompt += """
+        prompt += """
 FORMAT:
 - Include today's date, my contact information, and employer info block
 - Start with a professional greeting
@@ -103,39 +208,16 @@ FORMAT:
 - Keep the total length under 400 words
 """
 
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-
-            data = {
-                "model": "gpt-4o",
-                "messages": [
-                {"role": "system",
-                "content": "You are an expert at writing compelling, professional cover letters."},
-                {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 1500
-            }
-
-            response = requests.post(
-                CoverLetterService.API_URL,
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"].strip()
-
-            print(f"OpenAI API error: {response.status_code}, {response.text}")
-            return template_letter
-
-        except requests.RequestException as e:
-            print(f"Error generating cover letter: {e}")
-            return template_letter
+        return {
+            "model": "gpt-4o",
+            "messages": [
+            {"role": "system",
+            "content": "You are an expert at writing compelling, professional cover letters."},
+            {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1500
+        }
 
     @staticmethod
     def _get_template_cover_letter(user_info, date):
@@ -207,24 +289,3 @@ Sincerely,
         buffer.close()
 
         return pdf_data
-
-    @staticmethod
-    def extract_text_from_resume(resume_file) -> Optional[str]:
-        """
-        Extract text from a resume PDF file.
-
-        Args:
-            resume_file: The resume file object
-
-        Returns:
-            The extracted text or None if extraction fails
-        """
-        try:
-            reader = PdfReader(resume_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
-        except (FileNotFoundError, ValueError) as e:
-            print(f"Error extracting text from resume: {e}")
-            return None
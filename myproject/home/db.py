@@ -0,0 +1,73 @@
+"""
+This file contains the SQLite connection tuning applied to every new connection.
+
+The production database is a single SQLite file on a fly volume. With the
+default rollback journal a writer blocks every reader, so page views being
+tracked while Jobicy results are ingested fail with "database is locked".
+WAL lets readers and one writer work at the same time. A second writer waits for
+the lock for the connection's OPTIONS['timeout'] (SQLITE_TIMEOUT) instead of
+failing straight away. Transactions that read before they write take that lock
+at BEGIN (immediate_atomic), since SQLite cannot wait to upgrade a read lock.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
+
+def get_pragmas() -> Dict[str, object]:
+    """
+    This function returns the pragmas to apply, with SQLITE_PRAGMAS overriding the defaults.
+    A pragma set to None in SQLITE_PRAGMAS is skipped.
+    """
+    pragmas = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def apply_pragmas(cursor, pragmas: Dict[str, object]) -> None:
+    """
+    This function runs each pragma on a DB-API cursor.
+    """
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite_connection(sender, connection, **kwargs): # pylint: disable=unused-argument
+    """
+    This function is the connection_created receiver that tunes new SQLite connections.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, get_pragmas())
+
+
+@contextmanager
+def immediate_atomic(using: Optional[str] = None):
+    """
+    This function opens an atomic block that takes the write lock at BEGIN
+    (BEGIN IMMEDIATE on home.sqlite_backend), for transactions that read before
+    they write. Nested in another atomic block, or on other backends, it is a
+    plain atomic().
+    """
+    connection = transaction.get_connection(using)
+    immediate = hasattr(connection, 'next_transaction_mode') and not connection.in_atomic_block
+    if immediate:
+        connection.next_transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            if immediate:
+                connection.next_transaction_mode = None
+            yield
+    finally:
+        if immediate:
+            connection.next_transaction_mode = None
@@ -0,0 +1,207 @@
+"""
+This file contains the shared outbound HTTP clients used by every integration
+(Jobicy, the raw OpenAI REST calls and the OpenAI SDK).
+
+Connections are pooled per host and kept alive between calls, so repeated
+requests to the same API skip the TCP+TLS handshake. Retries with jittered
+exponential backoff are applied to 429 and 5xx responses.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import openai
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_TIMEOUTS = {
+    'jobicy': 10.0,
+    'openai.interview': 10.0,
+    'openai.cover_letter': 30.0,
+    'openai.chat': 60.0,
+}
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_JITTER = 0.5
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_openai_clients: Dict[str, openai.OpenAI] = {}
+# event loop -> {api_key: AsyncOpenAI}; httpx async pools are bound to the loop that opened them
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def _setting(name, default):
+    """
+    This function reads an OUTBOUND_* setting, falling back to the module default.
+    """
+    return getattr(settings, name, default)
+
+
+def get_timeout(endpoint: str) -> float:
+    """
+    This function returns the timeout (in seconds) configured for an endpoint.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **_setting('OUTBOUND_TIMEOUTS', {})}
+    return timeouts.get(endpoint, timeouts['openai.chat'])
+
+
+def _build_retry() -> Retry:
+    """
+    This function builds the urllib3 retry policy shared by every session.
+    """
+    return Retry(
+        total=_setting('OUTBOUND_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+        connect=_setting('OUTBOUND_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+        read=0,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,
+        backoff_factor=_setting('OUTBOUND_BACKOFF_FACTOR', DEFAULT_BACKOFF_FACTOR),
+        backoff_jitter=_setting('OUTBOUND_BACKOFF_JITTER', DEFAULT_BACKOFF_JITTER),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    """
+    This function builds a keep-alive session with a bounded connection pool.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=_setting('OUTBOUND_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE),
+        pool_block=True,
+        max_retries=_build_retry(),
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    This function returns the pooled session for the host that serves the URL.
+    """
+    parts = urlsplit(url)
+    host_key = f"{parts.scheme}://{parts.netloc}"
+
+    with _lock:
+        session = _sessions.get(host_key)
+        if session is None:
+            session = _build_session()
+            _sessions[host_key] = session
+    return session
+
+
+def request(method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+    """
+    This function sends a request through the pooled session for the URL's host.
+    """
+    kwargs.setdefault('timeout', get_timeout(endpoint))
+    return get_session(url).request(method, url, **kwargs)
+
+
+def get(url: str, endpoint: str, **kwargs) -> requests.Response:
+    """
+    This function sends a pooled GET request.
+    """
+    return request('GET', url, endpoint, **kwargs)
+
+
+def post(url: str, endpoint: str, **kwargs) -> requests.Response:
+    """
+    This function sends a pooled POST request.
+    """
+    return request('POST', url, endpoint, **kwargs)
+
+
+def get_openai_api_key() -> Optional[str]:
+    """
+    This function gets the OpenAI API key from the environment or settings.
+    """
+    api_key = os.environ.get('OPENAI_API_KEY')
+
+    if not api_key and hasattr(settings, 'OPENAI_API_KEY'):
+        api_key = settings.OPENAI_API_KEY
+
+    return api_key
+
+
+def _build_httpx_limits() -> httpx.Limits:
+    """
+    This function builds the connection limits for the OpenAI SDK transport.
+    """
+    pool_maxsize = _setting('OUTBOUND_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)
+    return httpx.Limits(
+        max_connections=pool_maxsize,
+        max_keepalive_connections=pool_maxsize,
+        keepalive_expiry=_setting('OUTBOUND_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY),
+    )
+
+
+def get_openai_client(api_key: Optional[str] = None) -> openai.OpenAI:
+    """
+    This function returns the shared OpenAI SDK client for the given key.
+
+    The SDK retries 429/5xx responses itself with jittered exponential backoff,
+    so only the retry count and the pooled transport are configured here.
+    """
+    api_key = api_key or get_openai_api_key()
+
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_key,
+                timeout=get_timeout('openai.chat'),
+                max_retries=_setting('OUTBOUND_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+                http_client=httpx.Client(limits=_build_httpx_limits()),
+            )
+            _openai_clients[api_key] = client
+    return client
+
+
+def get_async_openai_client(api_key: Optional[str] = None) -> openai.AsyncOpenAI:
+    """
+    This function returns the shared async OpenAI SDK client for the running event loop.
+    """
+    api_key = api_key or get_openai_api_key()
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        clients = _async_openai_clients.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                timeout=get_timeout('openai.chat'),
+                max_retries=_setting('OUTBOUND_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+                http_client=httpx.AsyncClient(limits=_build_httpx_limits()),
+            )
+            clients[api_key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """
+    This function closes and forgets every pooled client (used by tests and after fork).
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        for client in _openai_clients.values():
+            client.close()
+        _sessions.clear()
+        _openai_clients.clear()
+        _async_openai_clients.clear()
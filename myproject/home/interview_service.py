@@ -2,12 +2,18 @@
 This module contains the InterviewService class, which is used to generate interview questions
 and evaluate candidate responses.
 """
-import os
+import copy
+import hashlib
 import json
 import re
 from typing import List, Dict, Any, Optional
-import requests
-from django.conf import settings
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from . import completion_cache, http_client
+from .db import immediate_atomic
+from .models import InterviewQuestionSet
 
 GENERIC_QUESTIONS = [
     "Tell me about yourself and why you're interested in this position.",
@@ -17,6 +23,21 @@ GENERIC_QUESTIONS = [
     "Do you have any questions about the company or position?"
 ]
 
+GENERIC_FEEDBACK = {
+    "score": 7,
+    "strengths": [
+        "Good articulation of ideas",
+        "Showed enthusiasm for the role"
+    ],
+    "areas_to_improve": [
+        "Could provide more specific examples",
+        "Consider addressing how your skills match the job requirements"
+    ],
+    "suggestions": "Try to be more specific about your experiences "
+                   "and how they relate to the job requirements. "
+                   "Quantify your achievements when possible."
+}
+
 class InterviewService:
     """
     This class contains the InterviewService class, which is used to generate interview questions
@@ -29,14 +50,7 @@ class InterviewService:
         """
         This method gets the API key from the environment variable.
         """
-        api_key = os.environ.get('OPENAI_API_KEY')
-
-
-        if not api_key and hasattr(settings, 'OPENAI_API_KEY'):
-            api_key = settings.OPENAI_API_KEY
-
-
-        return api_key
+        return http_client.get_openai_api_key()
 
     @staticmethod
     def _parse_questions_from_text(content: str, num_questions: int,
@@ -64,7 +78,76 @@ class InterviewService:
         return questions[:num_questions]
 
     @staticmethod
-    def generate_interview_questions(job_description: str, num_questions: int = 5) -> List[str]:
+    def _headers(api_key: str) -> Dict[str, str]:
+        """
+        This method builds the headers for the chat completions endpoint.
+        """
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+
+    @staticmethod
+    def _build_questions_request(job_description: str, num_questions: int) -> Dict[str, Any]:
+        """
+        This method builds the chat completion request for interview questions.
+        """
+        if job_description:
+            prompt = (
+                f"Generate {num_questions} specific interview questions "
+                f"for a candidate applying to the following job:\n\n"
+                f"{job_description}\n\n"
+                "Only include the questions, with no numbering or additional text. "
+                "Format as a JSON array."
+            )
+        else:
+            prompt = (
+                f"Generate {num_questions} general job interview questions. "
+                "Only include the questions, with no numbering or additional text. "
+                "Format as a JSON array."
+            )
+
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system",
+                 "content": "You are an expert interviewer "
+                           "helping to generate relevant "
+                           "job interview questions "
+                           "based on a job description."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+
+    @staticmethod
+    def _questions_from_content(content: str, num_questions: int) -> List[str]:
+        """
+        This method turns the model output into a list of questions.
+        """
+        try:
+            if '[' in content and ']' in content:
+                start = content.find('[')
+                end = content.rfind(']') + 1
+                json_content = content[start:end]
+                questions = json.loads(json_content)
+                if isinstance(questions, list) \
+                and all(isinstance(q, str) for q in questions):
+                    return questions[:num_questions]
+
+                return InterviewService._parse_questions_from_text(content,
+                                                                   num_questions,
+                                                                   GENERIC_QUESTIONS)
+        except json.JSONDecodeError:
+            return InterviewService._parse_questions_from_text(content,
+                                                               num_questions,
+                                                               GENERIC_QUESTIONS)
+        return GENERIC_QUESTIONS
+
+    @staticmethod
+    def generate_interview_questions(job_description: str, num_questions: int = 5,
+                                     use_cache: bool = True) -> List[str]:
         """
         This method generates interview questions.
         """
@@ -74,164 +157,229 @@ class InterviewService:
             if not api_key:
                 return GENERIC_QUESTIONS
 
-            if job_description:
-                prompt = (
-                    f"Generate {num_questions} specific interview questions "
-                    f"for a candidate applying to the following job:\n\n"
-                    f"{job_description}\n\n"
-                    "Only include the questions, with no numbering or additional text. "
-                    "Format as a JSON array."
-                )
-            else:
-                prompt = (
-                    f"Generate {num_questions} general job interview questions. "
-                    "Only include the questions, with no numbering or additional text. "
-                    "Format as a JSON array."
-                )
-
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-
-            data = {
-                "model": "gpt-4o",
-                "messages": [
-                    {"role": "system",
-                     "content": "You are an expert interviewer "
-                               "helping to generate relevant "
-                               "job interview questions "
-                               "based on a job description."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 1000
-            }
-
-            response = requests.post(
+            request = InterviewService._build_questions_request(job_description, num_questions)
+            content = completion_cache.lookup('interview_questions', request, use_cache)
+            if content is not None:
+                return InterviewService._questions_from_content(content, num_questions)
+
+            response = http_client.post(
                 InterviewService.API_URL,
-                headers=headers,
-                json=data,
-                timeout=10
+                endpoint='openai.interview',
+                headers=InterviewService._headers(api_key),
+                json=request
             )
 
             if response.status_code == 200:
                 result = response.json()
                 content = result["choices"][0]["message"]["content"]
-
-                try:
-                    if '[' in content and ']' in content:
-                        start = content.find('[')
-                        end = content.rfind(']') + 1
-                        json_content = content[start:end]
-                        questions = json.loads(json_content)
-                        if isinstance(questions, list) \
-                        and all(isinstance(q, str) for q in questions):
-                            return questions[:num_questions]
-
-                        return InterviewService._parse_questions_from_text(content,
-                                                                               num_questions,
-                                                                               GENERIC_QUESTIONS)
-                except json.JSONDecodeError:
-                    return InterviewService._parse_questions_from_text(content,
-                                                                       num_questions,
-                                                                       GENERIC_QUESTIONS)
+                completion_cache.store('interview_questions', request, content, use_cache)
+                return InterviewService._questions_from_content(content, num_questions)
             return GENERIC_QUESTIONS
         except Exception: # pylint: disable=broad-exception-caught
             return GENERIC_QUESTIONS
+
     @staticmethod
-    def evaluate_response(question: str, # pylint: disable=too-many-locals
-                          response: str,
-                          job_description: Optional[str] = None) -> Dict[str, Any]:
+    async def agenerate_interview_questions(job_description: str, num_questions: int = 5,
+                                            use_cache: bool = True) -> List[str]:
         """
-        This function evaluates the response to the question.
+        This method generates interview questions without blocking the event loop.
         """
-        generic_feedback = {
-            "score": 7,
-            "strengths": [
-                "Good articulation of ideas",
-                "Showed enthusiasm for the role"
-            ],
-            "areas_to_improve": [
-                "Could provide more specific examples",
-                "Consider addressing how your skills match the job requirements"
+        try:
+            api_key = InterviewService.get_api_key()
+
+            if not api_key:
+                return GENERIC_QUESTIONS
+
+            content = await completion_cache.acreate_completion(
+                'interview_questions', api_key,
+                InterviewService._build_questions_request(job_description, num_questions),
+                endpoint='openai.interview', use_cache=use_cache
+            )
+            return InterviewService._questions_from_content(content, num_questions)
+        except Exception: # pylint: disable=broad-exception-caught
+            return GENERIC_QUESTIONS
+
+    @staticmethod
+    def _description_hash(job) -> str:
+        """
+        This method returns the hash of the description a question set is written for.
+        """
+        return hashlib.sha256((job.description or '').encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def stored_questions(job) -> Optional[List[str]]:
+        """
+        This method returns the stored questions for a job listing, or None if there
+        are none or they were generated for an older description.
+        """
+        question_set = InterviewQuestionSet.objects.filter(job=job).first() # pylint: disable=no-member
+        if question_set and \
+        question_set.description_hash == InterviewService._description_hash(job):
+            return question_set.questions
+        return None
+
+    @staticmethod
+    def _save_questions(job, questions: List[str]) -> None:
+        """
+        This method stores a generated question set for a job listing.
+        """
+        with immediate_atomic():
+            InterviewQuestionSet.objects.update_or_create( # pylint: disable=no-member
+                job=job,
+                defaults={
+                    'questions': questions,
+                    'description_hash': InterviewService._description_hash(job),
+                    'generated_at': timezone.now(),
+                }
+            )
+
+    @staticmethod
+    def get_job_questions(job, regenerate: bool = False,
+                          replace_stored: bool = False) -> List[str]:
+        """
+        This method returns the interview questions for a job listing, generating and
+        storing them on first use. Generic fallback questions are never stored.
+
+        The stored set is shared by every user of the listing, so regenerated
+        questions only replace it with `replace_stored` (for staff); otherwise they
+        are returned to the one user who asked for them.
+        """
+        if not regenerate:
+            questions = InterviewService.stored_questions(job)
+            if questions:
+                return questions
+
+        questions = InterviewService.generate_interview_questions(job.description or '',
+                                                                  use_cache=not regenerate)
+        if questions != GENERIC_QUESTIONS and (replace_stored or not regenerate):
+            InterviewService._save_questions(job, questions)
+        return questions
+
+    @staticmethod
+    async def aget_job_questions(job, regenerate: bool = False,
+                                 replace_stored: bool = False) -> List[str]:
+        """
+        This method is the async variant of get_job_questions.
+        """
+        if not regenerate:
+            questions = await sync_to_async(InterviewService.stored_questions)(job)
+            if questions:
+                return questions
+
+        questions = await InterviewService.agenerate_interview_questions(
+            job.description or '', use_cache=not regenerate)
+        if questions != GENERIC_QUESTIONS and (replace_stored or not regenerate):
+            await sync_to_async(InterviewService._save_questions)(job, questions)
+        return questions
+
+    @staticmethod
+    def _build_evaluation_request(question: str, response: str,
+                                  job_description: Optional[str] = None) -> Dict[str, Any]:
+        """
+        This method builds the chat completion request for evaluating a response.
+        """
+        context = f"Question: {question}\n\n"
+        if job_description:
+            context += f"Job Description: {job_description}\n\n"
+        context += f"Candidate Response: {response}\n\n"
+
+        prompt = context + "Evaluate this interview response. \
+        Provide: 1) a score from 1-10, 2) a list of strengths, \
+        3) a list of areas to improve, and 4) concrete suggestions \
+        for improvement. Format your response as a JSON object with \
+        keys: 'score', 'strengths' (array), 'areas_to_improve' (array), \
+        and 'suggestions' (string)."
+
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are an expert \
+                 interview coach evaluating candidate responses."},
+                {"role": "user", "content": prompt}
             ],
-            "suggestions": "Try to be more specific about your experiences "
-                           "and how they relate to the job requirements. "
-                           "Quantify your achievements when possible."
+            "temperature": 0.7,
+            "max_tokens": 1000
         }
 
-        try: # pylint: disable=too-many-nested-blocks
+    @staticmethod
+    def _feedback_from_content(content: str) -> Dict[str, Any]:
+        """
+        This method turns the model output into a feedback dict.
+        """
+        try:
+            if '{' in content and '}' in content:
+                start = content.find('{')
+                end = content.rfind('}') + 1
+                json_content = content[start:end]
+                feedback = json.loads(json_content)
+
+                required_keys = ['score', 'strengths', 'areas_to_improve', 'suggestions']
+                for key in required_keys:
+                    if key not in feedback:
+                        return copy.deepcopy(GENERIC_FEEDBACK)
+
+                try:
+                    feedback['score'] = int(feedback['score'])
+                    feedback['score'] = max(1, min(10, feedback['score']))
+                except (ValueError, TypeError):
+                    feedback['score'] = 7
+
+                return feedback
+
+        except json.JSONDecodeError:
+            pass
+
+        return copy.deepcopy(GENERIC_FEEDBACK)
+
+    @staticmethod
+    def evaluate_response(question: str,
+                          response: str,
+                          job_description: Optional[str] = None) -> Dict[str, Any]:
+        """
+        This function evaluates the response to the question.
+        """
+        try:
             api_key = InterviewService.get_api_key()
 
             if not api_key:
-                return generic_feedback
-
-            context = f"Question: {question}\n\n"
-            if job_description:
-                context += f"Job Description: {job_description}\n\n"
-            context += f"Candidate Response: {response}\n\n"
-
-            prompt = context + "Evaluate this interview response. \
-            Provide: 1) a score from 1-10, 2) a list of strengths, \
-            3) a list of areas to improve, and 4) concrete suggestions \
-            for improvement. Format your response as a JSON object with \
-            keys: 'score', 'strengths' (array), 'areas_to_improve' (array), \
-            and 'suggestions' (string)."
-
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-
-            data = {
-                "model": "gpt-4o",
-                "messages": [
-                    {"role": "system", "content": "You are an expert \
-                     interview coach evaluating candidate responses."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 1000
-            }
-
-            response = requests.post(
+                return copy.deepcopy(GENERIC_FEEDBACK)
+
+            api_response = http_client.post(
                 InterviewService.API_URL,
-                headers=headers,
-                json=data,
-                timeout=10
+                endpoint='openai.interview',
+                headers=InterviewService._headers(api_key),
+                json=InterviewService._build_evaluation_request(question, response,
+                                                                job_description)
             )
 
-            if response.status_code == 200:
-                result = response.json()
+            if api_response.status_code == 200:
+                result = api_response.json()
                 content = result["choices"][0]["message"]["content"]
+                return InterviewService._feedback_from_content(content)
 
-                try:
-                    if '{' in content and '}' in content:
-                        start = content.find('{')
-                        end = content.rfind('}') + 1
-                        json_content = content[start:end]
-                        feedback = json.loads(json_content)
-
-                        required_keys = ['score', 'strengths', 'areas_to_improve', 'suggestions']
-                        for key in required_keys:
-                            if key not in feedback:
-                                return generic_feedback
+            return copy.deepcopy(GENERIC_FEEDBACK)
 
-                        try:
-                            feedback['score'] = int(feedback['score'])
-                            feedback['score'] = max(1, min(10, feedback['score']))
-                        except (ValueError, TypeError):
-                            feedback['score'] = 7
-
-                        return feedback
+        except Exception: # pylint: disable=broad-exception-caught
+            return copy.deepcopy(GENERIC_FEEDBACK)
 
-                    return generic_feedback
+    @staticmethod
+    async def aevaluate_response(question: str,
+                                 response: str,
+                                 job_description: Optional[str] = None) -> Dict[str, Any]:
+        """
+        This function evaluates the response to the question without blocking the event loop.
+        """
+        try:
+            api_key = InterviewService.get_api_key()
 
-                except json.JSONDecodeError:
-                    pass
+            if not api_key:
+                return copy.deepcopy(GENERIC_FEEDBACK)
 
-            return generic_feedback
+            completion = await http_client.get_async_openai_client(api_key).chat.completions.create(
+                timeout=http_client.get_timeout('openai.interview'),
+                **InterviewService._build_evaluation_request(question, response, job_description)
+            )
+            return InterviewService._feedback_from_content(completion.choices[0].message.content)
 
         except Exception: # pylint: disable=broad-exception-caught
-            return generic_feedback
+            return copy.deepcopy(GENERIC_FEEDBACK)
@@ -0,0 +1,114 @@
+"""
+This file contains the management command that benchmarks the list projection of job listings.
+"""
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from home.models import JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
+from home.serializers import serialize_listing # pylint: disable=import-error,no-name-in-module
+
+
+def row_bytes(queryset):
+    """
+    This function runs the queryset's SQL and returns the bytes of the values read.
+    Numbers and dates count as 8 bytes.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(len(value) if isinstance(value, (str, bytes)) else 8
+                   for row in cursor.fetchall() for value in row)
+
+
+class Command(BaseCommand):
+    """
+    This class contains the management command that compares loading full listings
+    with JobListing.objects.for_list() for the result pages (dashboard and
+    recommendations), the applications page and the JSON page payload.
+
+    It seeds synthetic listings inside a transaction that is rolled back, so the
+    database is left unchanged.
+    """
+
+    help = 'Benchmarks query count and bytes of list pages with and without the list projection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=200,
+            help='Synthetic listings to seed (default: 200)'
+        )
+        parser.add_argument(
+            '--description-size',
+            type=int,
+            default=8000,
+            help='Characters of HTML description per listing (default: 8000)'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=20,
+            help='Listings per result page (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options['rows'], options['description_size'])
+            page_size = options['page_size']
+
+            listings = JobListing.objects.order_by('-published_at') # pylint: disable=no-member
+            self._compare('result page', listings[:page_size], listings.for_list()[:page_size])
+
+            interactions = UserJobInteraction.objects.filter(user=user) # pylint: disable=no-member
+            self._compare('applications', interactions.select_related('job'),
+                          interactions.for_list())
+
+            full = json.dumps([model_to_dict(job) for job in listings[:page_size]], default=str)
+            narrow = json.dumps([serialize_listing(job)
+                                 for job in listings.for_list()[:page_size]])
+            self.stdout.write(f"{'json page':>14}: {len(full):>10} -> {len(narrow):>10} bytes")
+
+            transaction.set_rollback(True)
+
+    def _compare(self, label, full, projected):
+        """
+        This method reports the bytes read by both querysets and the queries it takes
+        to load them.
+        """
+        counts = []
+        for queryset in (full, projected):
+            with CaptureQueriesContext(connection) as queries:
+                list(queryset)
+            counts.append(len(queries))
+
+        self.stdout.write(f"{label:>14}: {row_bytes(full):>10} -> {row_bytes(projected):>10} "
+                          f"bytes, {counts[0]} -> {counts[1]} queries")
+
+    @staticmethod
+    def _seed(rows, description_size):
+        """
+        This method creates the synthetic listings and a user who viewed all of them.
+        """
+        now = timezone.now()
+        description = ('<p>' + 'Lorem ipsum dolor sit amet. ' * (description_size // 28)
+                       + '</p>')[:description_size]
+        jobs = JobListing.objects.bulk_create([ # pylint: disable=no-member
+            JobListing(job_id=f'benchmark-{i}', title=f'Benchmark Job {i}',
+                       company='Benchmark Co', location='Remote', industry='Software',
+                       description=description, url='https://example.com/job',
+                       published_at=now - timedelta(minutes=i))
+            for i in range(rows)
+        ])
+        user = User.objects.create_user(username='benchmark-list-queries')
+        UserJobInteraction.objects.bulk_create([ # pylint: disable=no-member
+            UserJobInteraction(user=user, job=job, interaction_type='viewed') for job in jobs
+        ])
+        return user
@@ -0,0 +1,156 @@
+"""
+This file contains the management command that benchmarks SQLite connection tuning.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.db import apply_pragmas, get_pragmas # pylint: disable=import-error,no-name-in-module
+
+SCHEMA = """
+CREATE TABLE job_view (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    viewed_at REAL NOT NULL
+);
+CREATE INDEX job_view_job_id ON job_view (job_id);
+"""
+
+
+class Command(BaseCommand):
+    """
+    This class contains the management command that compares read/write throughput of
+    an untuned SQLite database (rollback journal, a new connection per request) with
+    the tuned one (home/db.py pragmas, persistent connections).
+
+    Persistent connections only apply under WSGI. Under ASGI (CONN_MAX_AGE 0, see
+    settings.py) every request opens a connection and runs the pragmas again; the
+    'tuned-asgi' mode measures that case.
+
+    It runs against throwaway files in a temporary directory, never the real database.
+    """
+
+    help = 'Benchmarks SQLite read/write throughput before and after connection tuning'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5.0,
+            help='How long to run each mode (default: 5)'
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=4,
+            help='Number of concurrent writer threads (default: 4)'
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=4,
+            help='Number of concurrent reader threads (default: 4)'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Rows to seed the table with before measuring (default: 10000)'
+        )
+
+    def handle(self, *args, **options):
+        modes = (
+            ('default', {}, False),
+            ('tuned', get_pragmas(), True),
+            ('tuned-asgi', get_pragmas(), False),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, persistent in modes:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                self._seed(path, pragmas, options['rows'])
+                result = self._run(path, pragmas, persistent, options)
+                self.stdout.write(
+                    f"{name:>10}: {result['writes'] / options['seconds']:9.1f} writes/s  "
+                    f"{result['reads'] / options['seconds']:9.1f} reads/s  "
+                    f"{result['locked']} 'database is locked' errors"
+                )
+
+    @staticmethod
+    def _connect(path, pragmas):
+        """
+        This method opens a connection the way Django does and applies the pragmas.
+        """
+        connection = sqlite3.connect(path, check_same_thread=False)
+        apply_pragmas(connection.cursor(), pragmas)
+        return connection
+
+    def _seed(self, path, pragmas, rows):
+        """
+        This method creates the benchmark table and fills it with view rows.
+        """
+        connection = self._connect(path, pragmas)
+        connection.executescript(SCHEMA)
+        now = time.time()
+        connection.executemany(
+            'INSERT INTO job_view (user_id, job_id, viewed_at) VALUES (?, ?, ?)',
+            ((i % 50, i % 500, now) for i in range(rows))
+        )
+        connection.commit()
+        connection.close()
+
+    def _run(self, path, pragmas, persistent, options):
+        """
+        This method runs writer and reader threads for the configured time and
+        returns the number of completed writes, reads and lock errors.
+        """
+        counts = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def write(connection, i):
+            connection.execute(
+                'INSERT INTO job_view (user_id, job_id, viewed_at) VALUES (?, ?, ?)',
+                (i % 50, i % 500, time.time())
+            )
+            connection.commit()
+
+        def read(connection, i):
+            connection.execute('SELECT COUNT(*) FROM job_view WHERE job_id = ?',
+                               (i % 500,)).fetchone()
+            connection.execute('SELECT * FROM job_view ORDER BY id DESC LIMIT 20').fetchall()
+
+        def worker(operation, counter):
+            connection = self._connect(path, pragmas) if persistent else None
+            i = 0
+            while time.monotonic() < deadline:
+                current = connection or self._connect(path, pragmas)
+                try:
+                    operation(current, i)
+                    key = counter
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    key = 'locked'
+                finally:
+                    if not persistent:
+                        current.close()
+                with lock:
+                    counts[key] += 1
+                i += 1
+            if connection:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(write, 'writes'))
+                   for _ in range(options['writers'])]
+        threads += [threading.Thread(target=worker, args=(read, 'reads'))
+                    for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
@@ -0,0 +1,20 @@
+"""
+This file contains the management command that reports the hit rates of the named caches.
+"""
+from django.core.management.base import BaseCommand
+
+from home.cache import cache_stats # pylint: disable=import-error,no-name-in-module
+
+
+class Command(BaseCommand):
+    """
+    This class contains the management command that prints the hits, misses and hit
+    rate of every named cache alias, summed over all workers.
+    """
+
+    help = 'Reports hit/miss counters of the search, AI completion, resume and fragment caches'
+
+    def handle(self, *args, **options):
+        for alias, stats in cache_stats().items():
+            self.stdout.write(f"{alias:>15}: {stats['hits']:>8} hits, {stats['misses']:>8} "
+                              f"misses, hit rate {stats['hit_rate']:.1%}")
@@ -0,0 +1,48 @@
+"""
+This file contains the management command that runs the background AI task worker.
+"""
+from django.core.management.base import BaseCommand
+
+from home.tasks import run_worker # pylint: disable=import-error,no-name-in-module
+
+
+class Command(BaseCommand):
+    """
+    This class contains the management command that processes queued AI tasks.
+    """
+
+    help = 'Runs queued AI tasks (resume feedback, fit analysis, rejection reasons, cover letters)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Number of tasks to run in parallel (default: AI_WORKER_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=int,
+            help='Maximum number of tasks started per minute, 0 for no limit '
+                 '(default: AI_WORKER_RATE_LIMIT)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            help='Seconds to wait between polls of an empty queue '
+                 '(default: AI_WORKER_POLL_INTERVAL)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling forever'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Starting AI task worker')
+        processed = run_worker(
+            concurrency=options.get('concurrency'),
+            rate_limit=options.get('rate_limit'),
+            poll_interval=options.get('poll_interval'),
+            once=options.get('once', False),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} AI tasks'))  # pylint: disable=no-member
@@ -0,0 +1,58 @@
+"""
+This file contains the management command that pre-generates interview questions.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from home.interview_service import GENERIC_QUESTIONS, InterviewService # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing # pylint: disable=import-error,no-name-in-module
+
+
+class Command(BaseCommand):
+    """
+    This class contains the management command that stores interview questions for
+    recently ingested job listings, so the interview coach page loads without waiting.
+    """
+
+    help = 'Pre-generates interview questions for recently ingested job listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Only warm listings ingested in the last N days (default: 7)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Maximum number of listings to generate questions for (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        if not InterviewService.get_api_key(): # pylint: disable=no-member
+            self.stdout.write(self.style.WARNING('No OpenAI API key configured, nothing to do'))  # pylint: disable=no-member
+            return
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        recent_jobs = JobListing.objects.filter( # pylint: disable=no-member
+            created_at__gte=cutoff
+        ).exclude(description__isnull=True).exclude(description='').order_by('-created_at')
+
+        generated = 0
+        failed = 0
+        for job in recent_jobs.iterator():
+            if generated + failed >= options['limit']:
+                break
+            if InterviewService.stored_questions(job): # pylint: disable=no-member
+                continue
+            if InterviewService.get_job_questions(job) == GENERIC_QUESTIONS: # pylint: disable=no-member
+                failed += 1
+            else:
+                generated += 1
+
+        self.stdout.write(self.style.SUCCESS(  # pylint: disable=no-member
+            f'Generated interview questions for {generated} listings ({failed} failed)'))
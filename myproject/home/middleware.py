@@ -0,0 +1,62 @@
+"""
+This file contains the project's middleware.
+
+WhiteNoiseMiddleware only runs synchronously, so under ASGI Django would adapt
+the whole middleware chain below it to sync and drive every async view through
+async_to_sync on a thread held for the whole request. AsyncWhiteNoiseMiddleware
+serves the same files but runs natively in either mode.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+async def _aread_blocks(file_like, block_size: int):
+    """
+    This function reads a static file in blocks on a worker thread, so an ASGI
+    response streams it without blocking the event loop.
+    """
+    if file_like is None:
+        return
+    read = sync_to_async(file_like.read, thread_sensitive=False)
+    while True:
+        block = await read(block_size)
+        if not block:
+            return
+        yield block
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    This class serves static files like WhiteNoiseMiddleware, under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        """
+        This method is the async variant of __call__. Looking up, opening and
+        reading a file touch the disk, so they run on worker threads.
+        """
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = await sync_to_async(self.serve, thread_sensitive=False)(static_file,
+                                                                           request)
+        # the file stays registered for closing when the response is closed
+        response.streaming_content = _aread_blocks(response.file_to_stream,
+                                                   response.block_size)
+        return response
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:38
+
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_search_keys(apps, schema_editor): # pylint: disable=unused-argument
+    """
+    Carry every existing JobListing.search_key over into a JobSearchResult row.
+    """
+    JobListing = apps.get_model('home', 'JobListing') # pylint: disable=invalid-name
+    JobSearchResult = apps.get_model('home', 'JobSearchResult') # pylint: disable=invalid-name
+    JobSearchResultEntry = apps.get_model('home', 'JobSearchResultEntry') # pylint: disable=invalid-name
+
+    search_keys = (JobListing.objects.exclude(search_key='')
+                   .order_by().values_list('search_key', flat=True).distinct())
+    for search_key in search_keys:
+        search_result = JobSearchResult.objects.create(
+            query_hash=hashlib.sha256(search_key.encode('utf-8')).hexdigest(),
+            query_key=search_key,
+        )
+        jobs = JobListing.objects.filter(search_key=search_key).order_by('-published_at')
+        JobSearchResultEntry.objects.bulk_create([
+            JobSearchResultEntry(search_result=search_result, job=job, position=position)
+            for position, job in enumerate(jobs)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0012_delete_application'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_hash', models.CharField(max_length=64, unique=True)),
+                ('query_key', models.CharField(max_length=255)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ttl_seconds', models.PositiveIntegerField(default=21600)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSearchResultEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='jobsearchresultentry',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='home.joblisting'),
+        ),
+        migrations.AddField(
+            model_name='jobsearchresultentry',
+            name='search_result',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='home.jobsearchresult'),
+        ),
+        migrations.AddField(
+            model_name='jobsearchresult',
+            name='jobs',
+            field=models.ManyToManyField(related_name='search_results', through='home.JobSearchResultEntry', to='home.joblisting'),
+        ),
+        migrations.AddIndex(
+            model_name='jobsearchresultentry',
+            index=models.Index(fields=['search_result', 'position'], name='home_jobsea_search__c442c2_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobsearchresultentry',
+            unique_together={('search_result', 'job')},
+        ),
+        migrations.RunPython(copy_search_keys, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='joblisting',
+            name='home_joblis_search__ead644_idx',
+        ),
+        migrations.RemoveField(
+            model_name='joblisting',
+            name='search_key',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0014_aitask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewQuestionSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('questions', models.JSONField(default=list)),
+                ('description_hash', models.CharField(max_length=64)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='interview_question_set', to='home.joblisting')),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.20 on 2026-10-18 15:02
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# Frozen copies of home.search as of this migration, so later changes to that
+# module never alter what this migration creates; they need a new migration.
+FTS_TABLE = 'home_joblisting_fts'
+SQLITE_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS home_joblisting_fts USING fts5("
+    "title, company, description, industry, content='home_joblisting', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS home_joblisting_fts_ai AFTER INSERT ON home_joblisting BEGIN "
+    "INSERT INTO home_joblisting_fts(rowid, title, company, description, industry) "
+    "VALUES (new.id, new.title, new.company, new.description, new.industry); END",
+    "CREATE TRIGGER IF NOT EXISTS home_joblisting_fts_ad AFTER DELETE ON home_joblisting BEGIN "
+    "INSERT INTO home_joblisting_fts(home_joblisting_fts, rowid, title, company, description, "
+    "industry) VALUES ('delete', old.id, old.title, old.company, old.description, "
+    "old.industry); END",
+    "CREATE TRIGGER IF NOT EXISTS home_joblisting_fts_au AFTER UPDATE ON home_joblisting BEGIN "
+    "INSERT INTO home_joblisting_fts(home_joblisting_fts, rowid, title, company, description, "
+    "industry) VALUES ('delete', old.id, old.title, old.company, old.description, "
+    "old.industry); "
+    "INSERT INTO home_joblisting_fts(rowid, title, company, description, industry) "
+    "VALUES (new.id, new.title, new.company, new.description, new.industry); END",
+)
+TRIGRAM_FIELDS = ('title', 'company', 'location', 'industry')
+
+
+def search_vector():
+    return (SearchVector('title', weight='A', config='english')
+            + SearchVector('company', weight='B', config='english')
+            + SearchVector('description', weight='C', config='english')
+            + SearchVector('industry', weight='B', config='english'))
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        job_listing = apps.get_model('home', 'JobListing')
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in postgres_indexes():
+            schema_editor.add_index(job_listing, index)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_SCHEMA:
+            schema_editor.execute(statement)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        job_listing = apps.get_model('home', 'JobListing')
+        for index in postgres_indexes():
+            schema_editor.remove_index(job_listing, index)
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0015_interviewquestionset'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0016_joblisting_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userjobinteraction',
+            index=models.Index(fields=['user', 'interaction_type', '-timestamp'], name='home_userjo_user_id_3899ba_idx'),
+        ),
+    ]
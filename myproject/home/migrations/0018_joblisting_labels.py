@@ -0,0 +1,89 @@
+# Generated by Django 4.2.20 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+import ast
+import html
+
+# Frozen copies of home.normalize as of this migration, so later changes to that
+# module never alter what this migration writes.
+LABEL_FIELDS = {
+    'job_type': 'job_type_label',
+    'industry': 'industry_label',
+    'job_level': 'job_level_label',
+}
+LABEL_MAX_LENGTH = 100
+BATCH_SIZE = 1000
+
+
+def format_label(value):
+    if value is None:
+        return None
+
+    processed_value = value
+
+    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+        try:
+            list_val = ast.literal_eval(value)
+            if isinstance(list_val, list) and len(list_val) > 0:
+                processed_value = list_val[0]
+            elif isinstance(list_val, list):
+                processed_value = ''
+        except (ValueError, SyntaxError):
+            processed_value = value.strip('\'"[] ')
+
+    if isinstance(processed_value, str):
+        processed_value = html.unescape(processed_value)
+        if processed_value:
+            processed_value = processed_value.replace('_', ' ').replace('-', ' ').title()
+
+    return processed_value
+
+
+def label_value(value):
+    return str(format_label(value) or '')[:LABEL_MAX_LENGTH]
+
+
+def populate_labels(apps, schema_editor): # pylint: disable=unused-argument
+    """
+    Precompute the display labels of every existing listing, a batch at a time.
+    """
+    JobListing = apps.get_model('home', 'JobListing') # pylint: disable=invalid-name
+    last_pk = 0
+    while True:
+        batch = list(JobListing.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .only('id', *LABEL_FIELDS)[:BATCH_SIZE])
+        if not batch:
+            break
+        for job in batch:
+            for field, label in LABEL_FIELDS.items():
+                setattr(job, label, label_value(getattr(job, field)))
+        JobListing.objects.bulk_update(batch, list(LABEL_FIELDS.values()),
+                                       batch_size=BATCH_SIZE)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0017_userjobinteraction_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joblisting',
+            name='industry_label',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='joblisting',
+            name='job_level_label',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='joblisting',
+            name='job_type_label',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.RunPython(populate_labels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 4.2.20 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+import ast
+import html
+
+# Frozen copies of home.normalize as of this migration, so later changes to that
+# module never alter what this migration writes.
+LIST_ENCODED_FIELDS = ('job_type', 'industry', 'job_level')
+LABEL_FIELDS = {
+    'job_type': 'job_type_label',
+    'industry': 'industry_label',
+    'job_level': 'job_level_label',
+}
+NORMALIZED_FIELDS = {
+    'job_type': 'job_type_normalized',
+    'industry': 'industry_normalized',
+    'job_level': 'job_level_normalized',
+}
+RAW_MAX_LENGTHS = {'job_type': 50, 'industry': 100, 'job_level': 50}
+DERIVED_MAX_LENGTH = 100
+BATCH_SIZE = 1000
+
+
+def format_label(value):
+    if value is None:
+        return None
+
+    processed_value = value
+
+    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+        try:
+            list_val = ast.literal_eval(value)
+            if isinstance(list_val, list) and len(list_val) > 0:
+                processed_value = list_val[0]
+            elif isinstance(list_val, list):
+                processed_value = ''
+        except (ValueError, SyntaxError):
+            processed_value = value.strip('\'"[] ')
+
+    if isinstance(processed_value, str):
+        processed_value = html.unescape(processed_value)
+        if processed_value:
+            processed_value = processed_value.replace('_', ' ').replace('-', ' ').title()
+
+    return processed_value
+
+
+def clean_value(value):
+    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            value = value.strip('\'"[] ')
+    items = value if isinstance(value, (list, tuple)) else [value]
+    cleaned = [" ".join(html.unescape(str(item)).split()) for item in items if item is not None]
+    return ", ".join(item for item in cleaned if item) or None
+
+
+def filter_key(value):
+    return " ".join((value or "").lower().split())[:DERIVED_MAX_LENGTH]
+
+
+def normalized_values(values):
+    result = {}
+    for field in LIST_ENCODED_FIELDS:
+        cleaned = clean_value(values[field])
+        result[field] = (cleaned or '')[:RAW_MAX_LENGTHS[field]] or None
+        result[NORMALIZED_FIELDS[field]] = filter_key(cleaned)
+        result[LABEL_FIELDS[field]] = str(format_label(cleaned) or '')[:DERIVED_MAX_LENGTH]
+    return result
+
+
+def for_each_batch(JobListing, columns, update): # pylint: disable=invalid-name
+    """
+    Apply `update` to every listing and save `columns`, a batch at a time.
+    """
+    last_pk = 0
+    while True:
+        batch = list(JobListing.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .only('id', *LIST_ENCODED_FIELDS)[:BATCH_SIZE])
+        if not batch:
+            break
+        for job in batch:
+            update(job)
+        JobListing.objects.bulk_update(batch, columns, batch_size=BATCH_SIZE)
+        last_pk = batch[-1].pk
+
+
+def normalize_listings(apps, schema_editor): # pylint: disable=unused-argument
+    """
+    Clean the list-encoded fields of every existing listing and fill in their
+    filter keys and labels.
+    """
+    JobListing = apps.get_model('home', 'JobListing') # pylint: disable=invalid-name
+    columns = (list(LIST_ENCODED_FIELDS) + list(NORMALIZED_FIELDS.values())
+               + list(LABEL_FIELDS.values()))
+
+    def update(job):
+        for name, value in normalized_values(
+                {field: getattr(job, field) for field in LIST_ENCODED_FIELDS}).items():
+            setattr(job, name, value)
+
+    for_each_batch(JobListing, columns, update)
+
+
+def restore_list_encoding(apps, schema_editor): # pylint: disable=unused-argument
+    """
+    Store the cleaned fields as stringified lists again ("full-time" becomes
+    "['full-time']"), the form the code before this migration ingested. HTML
+    entities stay unescaped; that code unescaped them before display anyway.
+    """
+    JobListing = apps.get_model('home', 'JobListing') # pylint: disable=invalid-name
+
+    def update(job):
+        for field in LIST_ENCODED_FIELDS:
+            value = getattr(job, field)
+            if value and not (value.startswith('[') and value.endswith(']')):
+                encoded = str(value.split(', '))
+                if len(encoded) <= RAW_MAX_LENGTHS[field]:
+                    setattr(job, field, encoded)
+
+    for_each_batch(JobListing, list(LIST_ENCODED_FIELDS), update)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_joblisting_labels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joblisting',
+            name='industry_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='joblisting',
+            name='job_level_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='joblisting',
+            name='job_type_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(normalize_listings, restore_list_encoding),
+    ]
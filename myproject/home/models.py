@@ -2,8 +2,55 @@
 This file contains the models for the home app.
 """
 
+import uuid
+from datetime import timedelta
+
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Value, When, Window
+from django.db.models.functions import RowNumber, Substr
+from django.utils import timezone
+
+from .normalize import (LABEL_FIELDS, LIST_ENCODED_FIELDS, NORMALIZED_FIELDS, PREFIX_END,
+                        filter_key, normalized_values)
+
+DEFAULT_SEARCH_TTL_SECONDS = 6 * 60 * 60
+# characters of the description loaded for list excerpts
+DESCRIPTION_PREVIEW_LENGTH = 400
+
+# the JobListing columns a result card or list row displays
+LIST_FIELDS = ('id', 'job_id', 'title', 'company', 'company_logo', 'job_type', 'industry',
+               'job_level', 'job_type_label', 'industry_label', 'job_level_label',
+               'location', 'url', 'salary_min', 'salary_max', 'salary_currency',
+               'published_at', 'updated_at')
+
+class JobListingQuerySet(models.QuerySet):
+    """
+    Queryset of job listings with a narrow projection for list pages.
+    """
+    def for_list(self):
+        """
+        This method loads only LIST_FIELDS plus a bounded `description_preview`,
+        leaving the (often very large) HTML description in the database.
+        """
+        return self.only(*LIST_FIELDS).annotate(
+            description_preview=Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH))
+
+    def filter_normalized(self, **filters):
+        """
+        This method keeps listings whose job_type, industry or job_level starts with
+        the given text, e.g. filter_normalized(industry='finance'). Each filter is a
+        range on the indexed *_normalized column, not a LIKE over the raw value.
+        """
+        queryset = self
+        for field, value in filters.items():
+            key = filter_key(value)
+            if key:
+                column = NORMALIZED_FIELDS[field]
+                queryset = queryset.filter(**{f'{column}__gte': key,
+                                              f'{column}__lt': key + PREFIX_END})
+        return queryset
+
 
 class JobListing(models.Model):
     """
@@ -16,6 +63,16 @@ class JobListing(models.Model):
     job_type = models.CharField(max_length=50, null=True, blank=True)
     industry = models.CharField(max_length=100, null=True, blank=True)
     job_level = models.CharField(max_length=50, null=True, blank=True)
+    # filter keys and display text of job_type, industry and job_level (home/normalize.py)
+    job_type_normalized = models.CharField(max_length=100, blank=True, default='',
+                                           editable=False, db_index=True)
+    industry_normalized = models.CharField(max_length=100, blank=True, default='',
+                                           editable=False, db_index=True)
+    job_level_normalized = models.CharField(max_length=100, blank=True, default='',
+                                            editable=False, db_index=True)
+    job_type_label = models.CharField(max_length=100, blank=True, default='')
+    industry_label = models.CharField(max_length=100, blank=True, default='')
+    job_level_label = models.CharField(max_length=100, blank=True, default='')
     location = models.CharField(max_length=200, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
     url = models.URLField(max_length=500, null=True, blank=True)
@@ -26,17 +83,13 @@ class JobListing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    # Cache-related fields
-    search_key = models.CharField(max_length=255, db_index=True, blank=True)
+    objects = JobListingQuerySet.as_manager()
 
     class Meta: # pylint: disable=too-few-public-methods
         """
         This class contains the meta data for the job listing.
         """
         ordering = ['-published_at']
-        indexes = [
-            models.Index(fields=['search_key']),
-        ]
 
     def __str__(self):
         """
@@ -44,6 +97,23 @@ class JobListing(models.Model):
         """
         return f"{self.title} at {self.company}"
 
+    def save(self, *args, **kwargs):
+        """
+        This method cleans the loaded list-encoded fields and refreshes their
+        *_normalized and *_label columns before saving.
+        """
+        deferred = self.get_deferred_fields()
+        for name, value in normalized_values({field: getattr(self, field)
+                                              for field in LIST_ENCODED_FIELDS
+                                              if field not in deferred}).items():
+            setattr(self, name, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                column for field in update_fields if field in LIST_ENCODED_FIELDS
+                for column in (NORMALIZED_FIELDS[field], LABEL_FIELDS[field])}
+        super().save(*args, **kwargs)
+
     @property
     def salary_display(self):
         """
@@ -57,6 +127,121 @@ class JobListing(models.Model):
             return f"Up to {self.salary_max:,.0f} {self.salary_currency}"
         return None
 
+class JobSearchResult(models.Model):
+    """
+    Cached result set for one Jobicy query.
+
+    A listing can belong to any number of result sets, so a job returned by two
+    different searches stays cached for both of them.
+    """
+    query_hash = models.CharField(max_length=64, unique=True)
+    query_key = models.CharField(max_length=255)
+    jobs = models.ManyToManyField(JobListing, through='JobSearchResultEntry',
+                                  related_name='search_results')
+    fetched_at = models.DateTimeField(default=timezone.now)
+    ttl_seconds = models.PositiveIntegerField(default=DEFAULT_SEARCH_TTL_SECONDS)
+
+    def __str__(self):
+        return f"{self.query_key} ({self.fetched_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def expires_at(self):
+        """
+        This property returns when the cached result set stops being fresh.
+        """
+        return self.fetched_at + timedelta(seconds=self.ttl_seconds)
+
+    @property
+    def is_fresh(self):
+        """
+        This property returns whether the cached result set is still within its TTL.
+        """
+        return timezone.now() < self.expires_at
+
+    def ordered_jobs(self):
+        """
+        This function returns the cached listings in the order Jobicy returned them.
+        """
+        return JobListing.objects.filter( # pylint: disable=no-member
+            search_entries__search_result=self
+        ).order_by('search_entries__position')
+
+class JobSearchResultEntry(models.Model):
+    """Position of a job listing inside a cached search result set."""
+    search_result = models.ForeignKey(JobSearchResult, on_delete=models.CASCADE,
+                                      related_name='entries')
+    job = models.ForeignKey(JobListing, on_delete=models.CASCADE, related_name='search_entries')
+    position = models.PositiveIntegerField()
+
+    class Meta: # pylint: disable=too-few-public-methods
+        """
+        This class contains the meta data for the search result entry.
+        """
+        ordering = ['position']
+        unique_together = ('search_result', 'job')
+        indexes = [
+            models.Index(fields=['search_result', 'position']),
+        ]
+
+    def __str__(self):
+        return f"{self.search_result_id}#{self.position} -> {self.job_id}" # pylint: disable=no-member
+
+class InterviewQuestionSet(models.Model):
+    """
+    Interview questions generated once for a job listing and reused on later visits.
+
+    description_hash records the description the questions were written for, so
+    a listing whose description changes gets a fresh set.
+    """
+    job = models.OneToOneField(JobListing, on_delete=models.CASCADE,
+                               related_name='interview_question_set')
+    questions = models.JSONField(default=list)
+    description_hash = models.CharField(max_length=64)
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{len(self.questions)} questions for {self.job}"
+
+class UserJobInteractionQuerySet(models.QuerySet):
+    """
+    Queryset of job interactions with the queries behind the applications page.
+    """
+    def for_list(self):
+        """
+        This method loads the interactions newest first with the list projection of
+        their job: LIST_FIELDS and a description preview, not the description.
+        """
+        return self.select_related('job').only(
+            'id', 'interaction_type', 'timestamp', 'job',
+            *(f'job__{field}' for field in LIST_FIELDS)
+        ).annotate(
+            description_preview=Substr('job__description', 1, DESCRIPTION_PREVIEW_LENGTH)
+        ).order_by('-timestamp', '-id')
+
+    def without_applied_views(self):
+        """
+        This method drops 'viewed' interactions for jobs the same user applied to.
+        """
+        applied = UserJobInteraction.objects.filter( # pylint: disable=no-member
+            user=OuterRef('user'), job=OuterRef('job'), interaction_type='applied')
+        return self.exclude(Q(interaction_type='viewed') & Exists(applied))
+
+    def page_per_type(self, offsets, page_size):
+        """
+        This method returns one page per interaction type in a single query: the
+        `page_size` newest rows after `offsets[type]`. Each row is annotated with its
+        `position` in its type and the `type_total` of rows of that type.
+        """
+        start = Case(*(When(interaction_type=kind, then=Value(offset))
+                       for kind, offset in offsets.items()), default=Value(0))
+        ordering = [F('timestamp').desc(), F('id').desc()]
+        return self.annotate(
+            position=Window(RowNumber(), partition_by=[F('interaction_type')],
+                            order_by=ordering),
+            type_total=Window(Count('id'), partition_by=[F('interaction_type')]),
+            page_start=start,
+        ).filter(position__gt=F('page_start'), position__lte=F('page_start') + page_size)
+
 class UserJobInteraction(models.Model):
     """Tracks user interactions with job listings (viewed, applied)."""
     INTERACTION_TYPES = (
@@ -69,12 +254,78 @@ class UserJobInteraction(models.Model):
     interaction_type = models.CharField(max_length=10, choices=INTERACTION_TYPES)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    objects = UserJobInteractionQuerySet.as_manager()
+
     class Meta: # pylint: disable=too-few-public-methods
         """
         This class contains the meta data for the user job interaction.
         """
         unique_together = ('user', 'job', 'interaction_type')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'interaction_type', '-timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.get_interaction_type_display()} - {self.job.title}" # pylint: disable=no-member
+
+class AITask(models.Model):
+    """
+    A unit of AI work queued by a web request and run by the run_ai_worker command.
+
+    The row itself is the queue: workers claim pending tasks with a conditional
+    UPDATE, so no external broker is needed.
+    """
+    KIND_RESUME_FEEDBACK = 'resume_feedback'
+    KIND_FIT_ANALYSIS = 'fit_analysis'
+    KIND_REJECTION_REASONS = 'rejection_reasons'
+    KIND_COVER_LETTER = 'cover_letter'
+    KINDS = (
+        (KIND_RESUME_FEEDBACK, 'Resume feedback'),
+        (KIND_FIT_ANALYSIS, 'Fit analysis'),
+        (KIND_REJECTION_REASONS, 'Rejection reasons'),
+        (KIND_COVER_LETTER, 'Cover letter'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUSES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_tasks')
+    kind = models.CharField(max_length=32, choices=KINDS)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta: # pylint: disable=too-few-public-methods
+        """
+        This class contains the meta data for the AI task.
+        """
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        """
+        This property returns whether the task has reached a final status.
+        """
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
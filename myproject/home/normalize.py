@@ -0,0 +1,112 @@
+"""
+This file contains the cleanup of Jobicy's list-encoded listing fields.
+
+Jobicy sends job type, industry and level as lists, which used to be stored as
+strings like "['full-time']" with HTML entities. At ingest each value is cleaned
+into plain text ("full-time", "Finance & Accounting"), a lowercase filter key
+kept in an indexed *_normalized column, and the display label shown on job cards
+in a *_label column, so nothing is parsed when listings are filtered or rendered.
+"""
+import ast
+import html
+from typing import Any, Dict, Optional
+
+LIST_ENCODED_FIELDS = ('job_type', 'industry', 'job_level')
+# raw listing field -> column holding its display label
+LABEL_FIELDS = {
+    'job_type': 'job_type_label',
+    'industry': 'industry_label',
+    'job_level': 'job_level_label',
+}
+# raw listing field -> indexed column holding its filter key
+NORMALIZED_FIELDS = {
+    'job_type': 'job_type_normalized',
+    'industry': 'industry_normalized',
+    'job_level': 'job_level_normalized',
+}
+# sizes of the JobListing columns
+RAW_MAX_LENGTHS = {'job_type': 50, 'industry': 100, 'job_level': 50}
+DERIVED_MAX_LENGTH = 100
+# sorts after every other character, so [key, key + PREFIX_END) is a prefix range
+PREFIX_END = chr(0x10FFFF)
+
+
+def format_label(value):
+    """
+    This function returns the display label of a raw field value: the first list
+    item, HTML-unescaped and title-cased.
+    """
+    if value is None:
+        return None
+
+    processed_value = value
+
+    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+        try:
+            list_val = ast.literal_eval(value)
+            if isinstance(list_val, list) and len(list_val) > 0:
+                processed_value = list_val[0]
+            elif isinstance(list_val, list):
+                processed_value = ''
+        except (ValueError, SyntaxError):
+            processed_value = value.strip('\'"[] ')
+
+    if isinstance(processed_value, str):
+        processed_value = html.unescape(processed_value)
+        if processed_value:
+            processed_value = processed_value.replace('_', ' ').replace('-', ' ').title()
+
+    return processed_value
+
+
+def label_value(value) -> str:
+    """
+    This function returns the label column value of a raw field value.
+    """
+    return str(format_label(value) or '')[:DERIVED_MAX_LENGTH]
+
+
+def label_values(values) -> dict:
+    """
+    This function returns the *_label column values for a dict of raw field values.
+    """
+    return {label: label_value(values.get(field)) for field, label in LABEL_FIELDS.items()}
+
+
+def clean_value(value: Any) -> Optional[str]:
+    """
+    This function turns a Jobicy value (a list, a stringified list or a string)
+    into plain text, list items joined by commas. Empty values become None.
+    """
+    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            value = value.strip('\'"[] ')
+    items = value if isinstance(value, (list, tuple)) else [value]
+    cleaned = [" ".join(html.unescape(str(item)).split()) for item in items if item is not None]
+    return ", ".join(item for item in cleaned if item) or None
+
+
+def filter_key(value: Optional[str]) -> str:
+    """
+    This function returns the filter key of a cleaned value or a user's filter:
+    lowercase, with runs of whitespace collapsed.
+    """
+    return " ".join((value or "").lower().split())[:DERIVED_MAX_LENGTH]
+
+
+def normalized_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    This function returns the cleaned raw value, filter key and display label of
+    every list-encoded field present in `values`.
+    """
+    result = {}
+    for field in LIST_ENCODED_FIELDS:
+        if field not in values:
+            continue
+        cleaned = clean_value(values[field])
+        result[field] = (cleaned or '')[:RAW_MAX_LENGTHS[field]] or None
+        result[NORMALIZED_FIELDS[field]] = filter_key(cleaned)
+        result[LABEL_FIELDS[field]] = label_value(cleaned)
+    return result
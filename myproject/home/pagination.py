@@ -0,0 +1,151 @@
+"""
+This file contains the keyset pagination of job search results.
+
+Result pages are ordered newest first by (published_at, id) and addressed by an
+opaque cursor holding the last listing's sort key, so each page is one indexed
+range query however deep the user scrolls. Ranked local search results keep
+their relevance order instead: their cursor holds the offset of the next page in
+the (cached) ranking. Listings are loaded without their HTML description; cards
+show a short preview and fetch the full body on demand.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import JobListing
+
+DEFAULT_PAGE_SIZE = 20
+_NULL_DATE = '-'
+_OFFSET_MARK = '@'
+
+
+class ResultPage(NamedTuple):
+    """
+    One page of listings and the cursor of the page after it (None on the last page).
+    """
+    jobs: List[JobListing]
+    next_cursor: Optional[str]
+
+
+def get_page_size() -> int:
+    """
+    This function returns the number of listings per page (JOB_RESULTS_PAGE_SIZE).
+    """
+    return getattr(settings, 'JOB_RESULTS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+
+
+def encode_cursor(job: JobListing) -> str:
+    """
+    This function encodes the sort key of a listing as an opaque, URL-safe cursor.
+    """
+    published = job.published_at.isoformat() if job.published_at else _NULL_DATE
+    raw = f"{published}|{job.pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    """
+    This function decodes a cursor back into (published_at, id). It returns None for
+    a missing or malformed cursor, which callers treat as the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        published, pk = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        published_at = None if published == _NULL_DATE else datetime.fromisoformat(published)
+        return published_at, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, cursor: Optional[str] = None,
+                page_size: Optional[int] = None) -> ResultPage:
+    """
+    This function returns the page of `queryset` after `cursor`, newest first.
+    Listings without a publication date sort last on every database.
+    """
+    page_size = page_size or get_page_size()
+    position = decode_cursor(cursor)
+    if position is not None:
+        published_at, pk = position
+        if published_at is None:
+            queryset = queryset.filter(published_at__isnull=True, pk__lt=pk)
+        else:
+            queryset = queryset.filter(Q(published_at__lt=published_at)
+                                       | Q(published_at=published_at, pk__lt=pk)
+                                       | Q(published_at__isnull=True))
+
+    jobs = list(queryset.order_by(F('published_at').desc(nulls_last=True), '-pk')
+                [:page_size + 1])
+    if len(jobs) > page_size:
+        jobs = jobs[:page_size]
+        return ResultPage(jobs, encode_cursor(jobs[-1]))
+    return ResultPage(jobs, None)
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    This function encodes a position in a ranked result as an opaque cursor.
+    """
+    raw = f"{_OFFSET_MARK}{offset}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """
+    This function decodes an offset cursor. A missing or malformed cursor is the
+    first page (offset 0).
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode('utf-8')
+        offset = int(raw[len(_OFFSET_MARK):]) if raw.startswith(_OFFSET_MARK) else 0
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return 0
+    return max(offset, 0)
+
+
+def ranked_page(results: List[JobListing], cursor: Optional[str] = None,
+                page_size: Optional[int] = None) -> ResultPage:
+    """
+    This function returns the page of a ranked result after `cursor`, best match
+    first. Only the page's listings are read back, with the list projection.
+    """
+    page_size = page_size or get_page_size()
+    offset = decode_offset_cursor(cursor)
+    window = results[offset:offset + page_size]
+    listings = JobListing.objects.filter( # pylint: disable=no-member
+        pk__in=[job.pk for job in window]).for_list().in_bulk()
+
+    jobs = []
+    for ranked in window:
+        job = listings.get(ranked.pk)
+        if job is not None:
+            job.search_snippet = getattr(ranked, 'search_snippet', '')
+            jobs.append(job)
+    more = offset + page_size < len(results)
+    return ResultPage(jobs, encode_offset_cursor(offset + page_size) if more else None)
+
+
+def paginate_results(results: Iterable[JobListing], cursor: Optional[str] = None,
+                     page_size: Optional[int] = None) -> ResultPage:
+    """
+    This function pages through the listings of a search result. Ranked local
+    search results (listings carrying a search_snippet) are paged in their ranked
+    order; other results newest first. Either way the page is read back with the
+    list projection, and search snippets carry over to it.
+    """
+    results = list(results)
+    if any(hasattr(job, 'search_snippet') for job in results):
+        return ranked_page(results, cursor, page_size)
+
+    queryset = JobListing.objects.filter( # pylint: disable=no-member
+        pk__in=[job.pk for job in results]).for_list()
+    return keyset_page(queryset, cursor, page_size)
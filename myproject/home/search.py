@@ -0,0 +1,271 @@
+"""
+This file contains the full-text search over locally cached job listings.
+
+The backend follows the database engine: PostgreSQL ranks listings with a
+weighted search vector backed by a GIN expression index (plus trigram indexes
+so icontains filters stay indexed), while SQLite uses an FTS5 virtual table
+that triggers keep in sync with home_joblisting.
+"""
+import html
+import re
+from typing import List, NamedTuple, Optional
+
+from django.db import connection, connections
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .models import JobListing
+from .normalize import NORMALIZED_FIELDS, PREFIX_END, filter_key
+
+SEARCH_FIELDS = ('title', 'company', 'description', 'industry')
+SEARCH_WEIGHTS = {'title': 'A', 'company': 'B', 'industry': 'B', 'description': 'C'}
+SEARCH_CONFIG = 'english'
+# BM25 column weights, in SEARCH_FIELDS order
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 4.0)
+SNIPPET_FIELD = 'description'
+SNIPPET_TOKENS = 24
+# control characters mark highlighted terms until the snippet has been escaped
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_STOP = '\x03'
+
+FTS_TABLE = 'home_joblisting_fts'
+_FTS_COLUMNS = ', '.join(SEARCH_FIELDS)
+_FTS_NEW = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+_FTS_OLD = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+
+SQLITE_FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_FTS_COLUMNS}, content='home_joblisting', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON home_joblisting BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON home_joblisting BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.id, {_FTS_OLD}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON home_joblisting BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.id, {_FTS_OLD}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW}); END",
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_PARTIAL_TAG_START_RE = re.compile(r'^[^<]*?>')
+_PARTIAL_TAG_END_RE = re.compile(r'<[^>]*$')
+
+
+def render_snippet(raw: Optional[str]) -> str:
+    """
+    This function turns a raw highlighted excerpt of the HTML description into safe
+    HTML with the matched terms wrapped in <mark>.
+    """
+    if not raw:
+        return ''
+    text = _PARTIAL_TAG_END_RE.sub('', raw)
+    leading = _PARTIAL_TAG_START_RE.match(text)
+    if leading and _HIGHLIGHT_START not in leading.group(0):
+        text = text[leading.end():]
+    text = escape(html.unescape(strip_tags(text))).strip()
+    return mark_safe(text.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_STOP, '</mark>'))
+
+
+def _like_pattern(value: str) -> str:
+    """
+    This function builds an escaped substring pattern for LIKE ... ESCAPE '\\'.
+    """
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def search_vector():
+    """
+    This function returns the weighted search vector over the searchable fields.
+
+    It must stay identical to the expression indexed by the GIN index in
+    migration 0016, or PostgreSQL will not use the index.
+    """
+    from django.contrib.postgres.search import SearchVector # pylint: disable=import-outside-toplevel
+    vector = None
+    for field in SEARCH_FIELDS:
+        part = SearchVector(field, weight=SEARCH_WEIGHTS[field], config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+class ListingFilters(NamedTuple):
+    """
+    The location, industry and job type a search is restricted to.
+    """
+    location: Optional[str] = None
+    industry: Optional[str] = None
+    job_type: Optional[str] = None
+
+
+class SearchBackend: # pylint: disable=too-few-public-methods
+    """
+    Base class for the local listing search backends.
+    """
+    vendor = None
+
+    def search(self, query: str, filters: ListingFilters = ListingFilters(),
+               limit: int = 50) -> List[JobListing]:
+        """
+        This method returns up to `limit` listings matching the keywords and the
+        filters, best match first. Each listing is annotated with a `search_rank`
+        (higher is better) and a highlighted `search_snippet`. Without keywords, the
+        filtered listings are returned newest first.
+        """
+        if not _TOKEN_RE.search(query or ''):
+            jobs = list(self.filter_listings(filters)[:limit])
+            for job in jobs:
+                job.search_rank = 0.0
+                job.search_snippet = ''
+            return jobs
+        return self.rank(query, filters, limit)
+
+    @staticmethod
+    def filter_listings(filters: ListingFilters):
+        """
+        This method returns the listings matching the filters. Industry and job type
+        match the start of their normalized values, an indexed range lookup.
+        """
+        jobs = JobListing.objects.filter_normalized( # pylint: disable=no-member
+            industry=filters.industry, job_type=filters.job_type)
+        if filters.location:
+            jobs = jobs.filter(location__icontains=filters.location)
+        return jobs.order_by('-published_at', '-id')
+
+    def rank(self, query: str, filters: ListingFilters, limit: int) -> List[JobListing]:
+        """
+        This method runs the backend's ranked keyword search.
+        """
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend): # pylint: disable=too-few-public-methods
+    """
+    Ranks listings with PostgreSQL full-text search.
+    """
+    vendor = 'postgresql'
+
+    def rank(self, query: str, filters: ListingFilters, limit: int) -> List[JobListing]:
+        from django.contrib.postgres.search import ( # pylint: disable=import-outside-toplevel
+            SearchHeadline, SearchQuery, SearchRank)
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        vector = search_vector()
+        jobs = list(self.filter_listings(filters).annotate(
+            search=vector,
+            search_rank=SearchRank(vector, search_query),
+            raw_snippet=SearchHeadline(SNIPPET_FIELD, search_query, config=SEARCH_CONFIG,
+                                       start_sel=_HIGHLIGHT_START, stop_sel=_HIGHLIGHT_STOP,
+                                       max_words=SNIPPET_TOKENS),
+        ).filter(search=search_query).order_by('-search_rank', '-published_at')[:limit])
+        for job in jobs:
+            job.search_snippet = render_snippet(job.raw_snippet)
+        return jobs
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Ranks listings with an SQLite FTS5 index and its built-in BM25 rank.
+    """
+    vendor = 'sqlite'
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """
+        This method turns free text into an FTS5 MATCH expression of quoted prefix
+        terms, so user input can never be parsed as FTS5 syntax.
+        """
+        return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(query or ''))
+
+    def _ranked_rows(self, query: str, filters: ListingFilters, limit: int):
+        """
+        This method returns (rowid, bm25 score, raw snippet) rows, best match first.
+        """
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        sql = (
+            f"SELECT {FTS_TABLE}.rowid, bm25({FTS_TABLE}, {weights}) AS score, "
+            f"snippet({FTS_TABLE}, {SEARCH_FIELDS.index(SNIPPET_FIELD)}, "
+            f"'{_HIGHLIGHT_START}', '{_HIGHLIGHT_STOP}', '…', {SNIPPET_TOKENS}) "
+            f"FROM {FTS_TABLE} JOIN home_joblisting ON home_joblisting.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [self.match_expression(query)]
+        if filters.location:
+            sql += " AND home_joblisting.location LIKE %s ESCAPE '\\'"
+            params.append(_like_pattern(filters.location))
+        for field in ('industry', 'job_type'):
+            key = filter_key(getattr(filters, field))
+            if key:
+                sql += f" AND home_joblisting.{NORMALIZED_FIELDS[field]} >= %s" \
+                       f" AND home_joblisting.{NORMALIZED_FIELDS[field]} < %s"
+                params += [key, key + PREFIX_END]
+        sql += " ORDER BY score LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def rank(self, query: str, filters: ListingFilters, limit: int) -> List[JobListing]:
+        ranked = self._ranked_rows(query, filters, limit)
+        jobs = JobListing.objects.in_bulk([rowid for rowid, _, _ in ranked]) # pylint: disable=no-member
+        results = []
+        for rowid, score, snippet in ranked:
+            if rowid in jobs:
+                job = jobs[rowid]
+                # bm25() is lower for better matches
+                job.search_rank = -score
+                job.search_snippet = render_snippet(snippet)
+                results.append(job)
+        return results
+
+    @staticmethod
+    def ensure_index(cursor) -> None:
+        """
+        This method creates the FTS5 table and its sync triggers if they are missing.
+        """
+        for statement in SQLITE_FTS_SCHEMA:
+            cursor.execute(statement)
+
+    @staticmethod
+    def rebuild(cursor) -> None:
+        """
+        This method re-reads every listing into the FTS5 index.
+        """
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+BACKENDS = {backend.vendor: backend for backend in (PostgresSearchBackend,
+                                                    SQLiteSearchBackend)}
+
+
+def get_search_backend(vendor=None) -> SearchBackend:
+    """
+    This function returns the search backend for the database in use.
+    """
+    vendor = vendor or connection.vendor
+    if vendor not in BACKENDS:
+        raise NotImplementedError(f"Local job search is not supported on {vendor}")
+    return BACKENDS[vendor]()
+
+
+def search_listings(query: str, location: Optional[str] = None,
+                    industry: Optional[str] = None, limit: int = 50,
+                    job_type: Optional[str] = None) -> List[JobListing]:
+    """
+    This function searches the cached listings with the active backend.
+    """
+    return get_search_backend().search(query, ListingFilters(location, industry, job_type),
+                                       limit)
+
+
+def ensure_search_index(sender, using='default', **kwargs): # pylint: disable=unused-argument
+    """
+    This function is the post_migrate receiver that restores the SQLite FTS5 table
+    and triggers; SQLite drops triggers whenever a migration rebuilds home_joblisting.
+    """
+    target = connections[using]
+    if target.vendor == SQLiteSearchBackend.vendor:
+        with target.cursor() as cursor:
+            SQLiteSearchBackend.ensure_index(cursor)
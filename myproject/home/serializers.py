@@ -0,0 +1,27 @@
+"""
+This file contains the narrow JSON serializer for job listings on list pages.
+"""
+from typing import Any, Dict
+
+from .models import JobListing
+
+
+def serialize_listing(job: JobListing) -> Dict[str, Any]:
+    """
+    This function returns the fields a result card shows, without the description.
+    It only reads columns loaded by JobListing.objects.for_list(), so serializing a
+    projected listing never triggers a deferred-field query.
+    """
+    return {
+        'job_id': job.job_id,
+        'title': job.title,
+        'company': job.company,
+        'company_logo': job.company_logo,
+        'location': job.location,
+        'job_type': job.job_type,
+        'industry': job.industry,
+        'job_level': job.job_level,
+        'salary': job.salary_display,
+        'published_at': job.published_at.isoformat() if job.published_at else None,
+        'url': job.url,
+    }
@@ -2,19 +2,77 @@
 This file contains the services for the home app.
 """
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 import urllib.parse
 
+from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 import requests
 
-from .models import JobListing
+from . import http_client, single_flight
+from .cache import SEARCH, get_cache
+from .db import immediate_atomic
+from .models import (JobListing, JobSearchResult, JobSearchResultEntry,
+                     DEFAULT_SEARCH_TTL_SECONDS)
+from .normalize import normalized_values
+from .search import search_listings
+
+DEFAULT_LOCAL_MIN_RESULTS = 10
+DEFAULT_LOCAL_LIMIT = 50
+DEFAULT_SEARCH_RESULTS_CACHE_TTL = 5 * 60
+DEFAULT_MAX_CONCURRENCY = 4
+
+logger = logging.getLogger(__name__)
+
+_refresh_lock = threading.Lock()
+_refreshing_keys = set()
+_fetch_slots_lock = threading.Lock()
+_fetch_slots: Dict[int, threading.BoundedSemaphore] = {}
+
+
+def get_max_concurrency() -> int:
+    """
+    This function returns how many Jobicy API calls may be open at once in this
+    process (JOBICY_MAX_CONCURRENCY).
+    """
+    return max(1, getattr(settings, 'JOBICY_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+
+
+def _get_fetch_slots() -> threading.BoundedSemaphore:
+    """
+    This function returns the process-wide semaphore that bounds Jobicy API calls.
+    """
+    limit = get_max_concurrency()
+    with _fetch_slots_lock:
+        if limit not in _fetch_slots:
+            _fetch_slots[limit] = threading.BoundedSemaphore(limit)
+        return _fetch_slots[limit]
+
+
+class IngestResult(NamedTuple):
+    """
+    Outcome of upserting one Jobicy payload.
+    """
+    jobs: List[JobListing]
+    inserted: int
+    updated: int
+    unchanged: int
 
 class JobicyService:
     """
     This class contains the services for the Jobicy API.
     """
     BASE_URL = "https://jobicy.com/api/v2/remote-jobs"
+    INGEST_FIELDS = ['title', 'company', 'company_logo', 'job_type', 'location',
+                     'description', 'url', 'industry', 'job_level', 'salary_min',
+                     'salary_max', 'salary_currency', 'published_at', 'job_type_normalized',
+                     'industry_normalized', 'job_level_normalized', 'job_type_label',
+                     'industry_label', 'job_level_label']
 
     @staticmethod
     def _build_cache_key(search_term: str, params: Optional[Dict[str, Any]] = None) -> str:
@@ -28,10 +86,134 @@ class JobicyService:
         return f"{search_term.lower()}:{param_str}"
 
     @staticmethod
-    def fetch_and_cache_jobs(search_term: str, # pylint: disable=too-many-branches,too-many-locals
-                             params: Optional[Dict[str, Any]] = None) -> List[JobListing]:
+    def _hash_cache_key(cache_key: str) -> str:
+        """
+        This function hashes the cache key so it fits the indexed query_hash column.
+        """
+        return hashlib.sha256(cache_key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _store_search_result(cache_key: str, jobs: List[JobListing]) -> JobSearchResult:
         """
-        This function fetches and caches the jobs from the Jobicy API.
+        This function records which listings (and in which order) a query returned.
+        """
+        ttl_seconds = getattr(settings, 'JOBICY_SEARCH_TTL', DEFAULT_SEARCH_TTL_SECONDS)
+
+        with immediate_atomic():
+            search_result, _ = JobSearchResult.objects.update_or_create( ## pylint: disable=no-member
+                query_hash=JobicyService._hash_cache_key(cache_key),
+                defaults={
+                    'query_key': cache_key[:255],
+                    'fetched_at': timezone.now(),
+                    'ttl_seconds': ttl_seconds,
+                }
+            )
+            search_result.entries.all().delete()
+
+            seen = set()
+            entries = []
+            for job in jobs:
+                if job.pk in seen:
+                    continue
+                seen.add(job.pk)
+                entries.append(JobSearchResultEntry(search_result=search_result,
+                                                    job=job, position=len(entries)))
+            JobSearchResultEntry.objects.bulk_create(entries) ## pylint: disable=no-member
+
+        return search_result
+
+    @staticmethod
+    def _parse_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        This function maps one Jobicy payload entry onto JobListing field values.
+        """
+        published_at_aware = None
+        pub_date_str = job.get('pubDate')
+        if pub_date_str:
+            try:
+                naive_dt = datetime.strptime(pub_date_str, "%Y-%m-%d %H:%M:%S")
+                published_at_aware = timezone.make_aware(naive_dt, timezone.utc)
+            except ValueError:
+                pass
+
+        values = {
+            'title': job.get('jobTitle'),
+            'company': job.get('companyName'),
+            'company_logo': job.get('companyLogo'),
+            'job_type': job.get('jobType'),
+            'location': job.get('jobGeo'),
+            'description': job.get('jobDescription'),
+            'url': job.get('url'),
+            'industry': job.get('jobIndustry'),
+            'job_level': job.get('jobLevel'),
+            'salary_min': job.get('annualSalaryMin'),
+            'salary_max': job.get('annualSalaryMax'),
+            'salary_currency': job.get('salaryCurrency'),
+            'published_at': published_at_aware,
+        }
+        # run through the model fields so values compare equal to what the DB gives back
+        values = {name: JobListing._meta.get_field(name).to_python(value) # pylint: disable=protected-access,no-member
+                  for name, value in values.items()}
+        # bulk writes skip JobListing.save(), so the list-encoded fields are cleaned here
+        values.update(normalized_values(values))
+        return values
+
+    @staticmethod
+    def ingest_jobs(raw_jobs: List[Dict[str, Any]]) -> IngestResult:
+        """
+        This function upserts a whole Jobicy payload with one lookup query, one bulk
+        insert, one bulk update and one query reading the inserted rows back. Call it
+        inside a transaction.
+        """
+        parsed = {}
+        for job in raw_jobs:
+            if job.get('id') is None:
+                continue
+            parsed.setdefault(str(job['id']), JobicyService._parse_job(job))
+
+        existing = JobListing.objects.in_bulk(list(parsed), field_name='job_id') ## pylint: disable=no-member
+
+        to_create = []
+        to_update = []
+        unchanged = 0
+        now = timezone.now()
+        for job_id, values in parsed.items():
+            job_listing = existing.get(job_id)
+            if job_listing is None:
+                to_create.append(JobListing(job_id=job_id, **values))
+                continue
+
+            if values['published_at'] is None:
+                values['published_at'] = job_listing.published_at
+
+            if all(getattr(job_listing, name) == value for name, value in values.items()):
+                unchanged += 1
+                continue
+
+            for name, value in values.items():
+                setattr(job_listing, name, value)
+            job_listing.updated_at = now
+            to_update.append(job_listing)
+
+        # Another worker may insert the same new job_id between the lookup and the
+        # insert; its row is kept and read back below instead of failing the ingest.
+        JobListing.objects.bulk_create(to_create, ignore_conflicts=True) ## pylint: disable=no-member
+        if to_update:
+            JobListing.objects.bulk_update( ## pylint: disable=no-member
+                to_update, JobicyService.INGEST_FIELDS + ['updated_at'])
+
+        if to_create:
+            existing.update(JobListing.objects.in_bulk( ## pylint: disable=no-member
+                [job_listing.job_id for job_listing in to_create], field_name='job_id'))
+
+        return IngestResult(jobs=[existing[job_id] for job_id in parsed],
+                            inserted=len(to_create), updated=len(to_update),
+                            unchanged=unchanged)
+
+    @staticmethod
+    def _api_url(search_term: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        This function builds the Jobicy API URL of a query.
         """
         url = f"{JobicyService.BASE_URL}?count=50"
         api_params = {}
@@ -54,73 +236,279 @@ class JobicyService:
 
         for key, value in api_params.items():
             url = f"{url}&{key}={urllib.parse.quote(str(value))}"
+        return url
 
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+    @staticmethod
+    def _fetch_payload(search_term: str,
+                       params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        This function downloads the raw jobs of a query, or returns None if the API
+        call failed. It touches no database, so it is safe to run on any thread, and
+        holds one of the JOBICY_MAX_CONCURRENCY slots while the request is open.
+        """
+        with _get_fetch_slots():
+            try:
+                response = http_client.get(JobicyService._api_url(search_term, params),
+                                           endpoint='jobicy')
+                response.raise_for_status()
+                return response.json().get('jobs') or []
+            except requests.exceptions.RequestException:
+                return None
+
+    @staticmethod
+    def _cache_payload(search_term: str, params: Optional[Dict[str, Any]],
+                       raw_jobs: List[Dict[str, Any]]) -> List[JobListing]:
+        """
+        This function upserts the raw jobs of a query and records its result set.
+        """
+        cache_key = JobicyService._build_cache_key(search_term, params)
+
+        with immediate_atomic():
+            result = JobicyService.ingest_jobs(raw_jobs)
+            JobicyService._store_search_result(cache_key, result.jobs)
 
-            if not data.get('jobs'):
+        logger.info("Jobicy ingest for %r: %d inserted, %d updated, %d unchanged",
+                    cache_key, result.inserted, result.updated, result.unchanged)
+        return result.jobs
+
+    @staticmethod
+    def _stored_since(cache_key: str, since: datetime) -> Optional[List[JobListing]]:
+        """
+        This function returns the jobs of a query if its result set was stored at or
+        after `since`, i.e. by a fetch that ran while the caller was waiting.
+        """
+        search_result = JobSearchResult.objects.filter( ## pylint: disable=no-member
+            query_hash=JobicyService._hash_cache_key(cache_key), fetched_at__gte=since
+        ).first()
+        if search_result is None:
+            return None
+        return list(search_result.ordered_jobs())
+
+    @staticmethod
+    def fetch_and_cache_jobs(search_term: str,
+                             params: Optional[Dict[str, Any]] = None) -> List[JobListing]:
+        """
+        This function fetches and caches the jobs from the Jobicy API. Concurrent
+        calls for the same query, from any thread or worker, share a single fetch;
+        the others wait and read the result set it stored.
+        """
+        cache_key = JobicyService._build_cache_key(search_term, params)
+        started = timezone.now()
+
+        def fetch():
+            raw_jobs = JobicyService._fetch_payload(search_term, params)
+            if raw_jobs is None:
                 return []
+            return JobicyService._cache_payload(search_term, params, raw_jobs)
+
+        jobs = single_flight.run(cache_key, fetch,
+                                 lambda: JobicyService._stored_since(cache_key, started))
+        return jobs or []
 
-            cached_jobs = []
-            cache_key = JobicyService._build_cache_key(search_term, params)
-
-            for job in data['jobs']:
-                pub_date_str = job.get('pubDate')
-                published_at_aware = None
-                if pub_date_str:
-                    try:
-                        naive_dt = datetime.strptime(pub_date_str, "%Y-%m-%d %H:%M:%S")
-                        published_at_aware = timezone.make_aware(naive_dt, timezone.utc)
-                    except ValueError:
-                        pass
-
-                job_listing, created = JobListing.objects.get_or_create( ## pylint: disable=no-member
-                    job_id=job['id'],
-                    defaults={
-                        'title': job.get('jobTitle'),
-                        'company': job.get('companyName'),
-                        'company_logo': job.get('companyLogo'),
-                        'job_type': job.get('jobType'),
-                        'location': job.get('jobGeo'),
-                        'description': job.get('jobDescription'),
-                        'url': job.get('url'),
-                        'industry': job.get('jobIndustry'),
-                        'job_level': job.get('jobLevel'),
-                        'salary_min': job.get('annualSalaryMin'),
-                        'salary_max': job.get('annualSalaryMax'),
-                        'salary_currency': job.get('salaryCurrency'),
-                        'search_key': cache_key,
-                        'published_at': published_at_aware,
-                    }
-                )
-
-                if not created:
-                    job_listing.search_key = cache_key
-                    if published_at_aware:
-                        job_listing.published_at = published_at_aware
-                    job_listing.save(update_fields=['search_key', 'published_at'])
-
-                cached_jobs.append(job_listing)
-
-            return cached_jobs
-
-        except requests.exceptions.RequestException:
+    @staticmethod
+    def fetch_many(queries: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[List[JobListing]]:
+        """
+        This function fetches and caches several queries at once and returns their
+        jobs in query order. The API calls run in parallel on a thread pool, bounded
+        by JOBICY_MAX_CONCURRENCY across the whole process, so the wait approaches
+        the slowest call rather than the sum. Results are written to the database
+        one by one on the calling thread.
+
+        Like fetch_and_cache_jobs, a query already being fetched elsewhere is not
+        fetched again. The worker locks of the queries this call leads are taken
+        together by single_flight.lock_keys() and released before this call waits
+        on other threads' fetches.
+        """
+        if not queries:
             return []
+        started = timezone.now()
+        keys = [JobicyService._build_cache_key(*query) for query in queries]
+        query_by_key = dict(zip(keys, queries))
+        flights = [single_flight.begin(key) for key in query_by_key]
+        leading = [flight.key for flight in flights if flight.leader]
+
+        fetched = {}
+        try:
+            with single_flight.lock_keys(leading) as locked:
+                to_fetch = [key for key in leading if key not in locked
+                            or JobicyService._stored_since(key, started) is None]
+                workers = min(len(to_fetch), get_max_concurrency()) or 1
+                with ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix='jobicy-fetch') as executor:
+                    payloads = list(executor.map(
+                        lambda key: JobicyService._fetch_payload(*query_by_key[key]), to_fetch))
+                for key, raw_jobs in zip(to_fetch, payloads):
+                    fetched[key] = [] if raw_jobs is None \
+                        else JobicyService._cache_payload(*query_by_key[key], raw_jobs)
+        finally:
+            for flight in flights:
+                flight.finish()
+
+        for flight in flights:
+            if not flight.leader:
+                flight.wait()
+        return [fetched[key] if key in fetched
+                else JobicyService._stored_since(key, started) or []
+                for key in keys]
+
+    @staticmethod
+    def search_local(search_term: str,
+                     params: Optional[Dict[str, Any]] = None) -> Optional[List[JobListing]]:
+        """
+        This function answers a query from the locally cached listings, ranked by
+        relevance. It returns None when local search is disabled or finds fewer than
+        JOBICY_LOCAL_MIN_RESULTS listings, so the caller can ask the API instead.
+        """
+        if not getattr(settings, 'JOBICY_LOCAL_SEARCH', True):
+            return None
+
+        params = params or {}
+        keywords = search_term or ''
+        location = params.get('geo')
+        industry = params.get('industry') or params.get('jobIndustry')
+        job_type = params.get('jobType')
+        if not (keywords or location or industry or job_type):
+            return None
+
+        try:
+            jobs = JobicyService._ranked_listings(keywords, location, industry,
+                                                  getattr(settings, 'JOBICY_LOCAL_LIMIT',
+                                                          DEFAULT_LOCAL_LIMIT), job_type)
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.error("Local search failed for %r", search_term, exc_info=True)
+            return None
+
+        if len(jobs) < getattr(settings, 'JOBICY_LOCAL_MIN_RESULTS', DEFAULT_LOCAL_MIN_RESULTS):
+            return None
+        return jobs
+
+    @staticmethod
+    def _ranked_listings(keywords: str, location: Optional[str], industry: Optional[str],
+                         limit: int, job_type: Optional[str] = None) -> List[JobListing]:
+        """
+        This function runs a local search. The ranking (listing ids and snippets) is
+        kept in the shared 'search' cache for SEARCH_RESULTS_CACHE_TTL seconds, so
+        repeating a query on any worker, e.g. while scrolling its results, is one
+        primary key lookup instead of a full-text query.
+        """
+        ttl = getattr(settings, 'SEARCH_RESULTS_CACHE_TTL', DEFAULT_SEARCH_RESULTS_CACHE_TTL)
+        if ttl <= 0:
+            return search_listings(keywords, location=location, industry=industry, limit=limit,
+                                   job_type=job_type)
+
+        key = 'local:' + JobicyService._hash_cache_key(
+            f"{keywords.lower()}|{location}|{industry}|{job_type}|{limit}")
+        search_cache = get_cache(SEARCH)
+        ranking = search_cache.get(key)
+        if ranking is None:
+            jobs = search_listings(keywords, location=location, industry=industry, limit=limit,
+                                   job_type=job_type)
+            search_cache.set(key, [(job.pk, getattr(job, 'search_snippet', ''))
+                                   for job in jobs], ttl)
+            return jobs
+
+        listings = JobListing.objects.in_bulk([pk for pk, _ in ranking]) # pylint: disable=no-member
+        jobs = []
+        for pk, snippet in ranking:
+            if pk in listings:
+                listings[pk].search_snippet = snippet
+                jobs.append(listings[pk])
+        return jobs
 
     @staticmethod
     def search_jobs(search_term: str, params: Optional[Dict[str, Any]] = None) -> List[JobListing]:
         """
-        This function searches for jobs from the Jobicy API.
+        This function searches for jobs: a cached result set for the exact query
+        first, then the local full-text index, and the Jobicy API only when local
+        recall is too low.
+        """
+        jobs = JobicyService._search_without_api(search_term, params)
+        if jobs is None:
+            return JobicyService.fetch_and_cache_jobs(search_term, params)
+        return jobs
+
+    @staticmethod
+    def search_jobs_many(queries: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[JobListing]:
+        """
+        This function runs several related searches, e.g. a term with industry and
+        location variants, and merges their jobs in query order without duplicate
+        job ids. Queries that need the Jobicy API are fetched concurrently.
+        """
+        results = [JobicyService._search_without_api(search_term, params)
+                   for search_term, params in queries]
+        misses = [query for query, jobs in zip(queries, results) if jobs is None]
+        fetched = iter(JobicyService.fetch_many(misses))
+
+        merged = {}
+        for jobs in results:
+            for job in next(fetched) if jobs is None else jobs:
+                merged.setdefault(job.job_id, job)
+        return list(merged.values())
+
+    @staticmethod
+    def _search_without_api(search_term: str,
+                            params: Optional[Dict[str, Any]] = None) -> Optional[List[JobListing]]:
+        """
+        This function answers a query from its cached result set (scheduling a
+        refresh if it expired) or the local index. It returns None when only the
+        Jobicy API can answer it.
         """
         cache_key = JobicyService._build_cache_key(search_term, params)
-        cached_jobs = JobListing.objects.filter(search_key=cache_key) ## pylint: disable=no-member
+        search_result = JobSearchResult.objects.filter( ## pylint: disable=no-member
+            query_hash=JobicyService._hash_cache_key(cache_key)
+        ).first()
+
+        if search_result is None:
+            return JobicyService.search_local(search_term, params)
+
+        if not search_result.is_fresh:
+            JobicyService._schedule_refresh(search_term, params, cache_key)
 
-        if cached_jobs.exists():
-            return list(cached_jobs)
+        return list(search_result.ordered_jobs())
 
-        return JobicyService.fetch_and_cache_jobs(search_term, params)
+    @staticmethod
+    def _schedule_refresh(search_term: str, params: Optional[Dict[str, Any]],
+                          cache_key: str) -> bool:
+        """
+        This function starts a background refresh of an expired query, unless one
+        is already running for the same cache key.
+        """
+        with _refresh_lock:
+            if cache_key in _refreshing_keys:
+                return False
+            _refreshing_keys.add(cache_key)
+
+        thread = threading.Thread(target=JobicyService._run_refresh_thread,
+                                  args=(search_term, params, cache_key),
+                                  name=f"jobicy-refresh-{cache_key[:40]}",
+                                  daemon=True)
+        thread.start()
+        return True
+
+    @staticmethod
+    def _run_refresh_thread(search_term: str, params: Optional[Dict[str, Any]],
+                            cache_key: str) -> None:
+        """
+        This function is the background thread body; it owns its own DB connection.
+        """
+        try:
+            JobicyService._refresh_search(search_term, params, cache_key)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _refresh_search(search_term: str, params: Optional[Dict[str, Any]],
+                        cache_key: str) -> None:
+        """
+        This function re-fetches an expired query and releases its refresh slot.
+        """
+        try:
+            JobicyService.fetch_and_cache_jobs(search_term, params)
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.error("Background refresh failed for %s", cache_key, exc_info=True)
+        finally:
+            with _refresh_lock:
+                _refreshing_keys.discard(cache_key)
 
     @staticmethod
     def get_job_details(job_id: int) -> Optional[JobListing]:
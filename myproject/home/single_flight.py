@@ -0,0 +1,198 @@
+"""
+This file contains the request coalescing (single-flight) of Jobicy fetches.
+
+Only one fetch per key runs at a time. The first caller in a process becomes the
+leader of the key, and later callers in that process wait for it to finish. Across
+gunicorn workers, leaders take an exclusive lock on a file in JOBICY_LOCK_DIR
+before fetching, so a second worker blocks until the first has stored its result.
+Waiters then read that stored result instead of calling the API again.
+
+Keys are hashed onto LOCK_STRIPES lock files, so the directory never grows; two
+keys on the same stripe simply take turns. Without fcntl (or JOBICY_LOCK_DIR,
+as while testing) the coalescing is per process only.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TypeVar
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover - not available on Windows
+    fcntl = None
+
+DEFAULT_TIMEOUT = 30.0
+LOCK_STRIPES = 256
+LOCK_POLL_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+_flights_lock = threading.Lock()
+_flights: Dict[str, threading.Event] = {}
+
+T = TypeVar('T')
+
+
+def get_timeout() -> float:
+    """
+    This function returns how long (in seconds) a caller waits for another fetch of
+    the same key (JOBICY_SINGLE_FLIGHT_TIMEOUT).
+    """
+    return getattr(settings, 'JOBICY_SINGLE_FLIGHT_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def lock_path(key: str) -> Optional[str]:
+    """
+    This function returns the lock file of a key, or None when there is no lock
+    directory to coordinate workers through.
+    """
+    lock_dir = getattr(settings, 'JOBICY_LOCK_DIR', None)
+    if not lock_dir or fcntl is None:
+        return None
+    stripe = int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % LOCK_STRIPES
+    return os.path.join(lock_dir, f'{stripe:03d}.lock')
+
+
+def _acquire(path: str, deadline: float):
+    """
+    This function takes an exclusive lock on a lock file, polling until `deadline`.
+    It returns the open file holding the lock, or None if the time ran out.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, 'a+b') # pylint: disable=consider-using-with
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                lock_file.close()
+                logger.warning("Timed out waiting for the fetch lock %s", path)
+                return None
+            time.sleep(LOCK_POLL_SECONDS)
+
+
+def _release(lock_file) -> None:
+    """
+    This function releases and closes a lock file taken by _acquire().
+    """
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+
+class Flight:
+    """
+    This class contains one caller's claim on a key. The leader fetches and calls
+    finish(); the other callers in the process wait() for it.
+    """
+    def __init__(self, key: str, done: threading.Event, leader: bool):
+        self.key = key
+        self.leader = leader
+        self._done = done
+        self._lock_file = None
+
+    def lock(self) -> bool:
+        """
+        This method takes the cross-worker lock of the key, waiting while another
+        worker holds it. It returns False when the lock could not be taken in time,
+        in which case the leader fetches anyway.
+        """
+        path = lock_path(self.key)
+        if not self.leader or path is None:
+            return True
+        self._lock_file = _acquire(path, time.monotonic() + get_timeout())
+        return self._lock_file is not None
+
+    def wait(self) -> bool:
+        """
+        This method waits for the leader of the key and returns whether it finished
+        in time.
+        """
+        return self._done.wait(get_timeout())
+
+    def finish(self) -> None:
+        """
+        This method releases the key and wakes the callers waiting on it.
+        """
+        if not self.leader:
+            return
+        if self._lock_file is not None:
+            _release(self._lock_file)
+            self._lock_file = None
+        with _flights_lock:
+            if _flights.get(self.key) is self._done:
+                del _flights[self.key]
+        self._done.set()
+
+
+def begin(key: str) -> Flight:
+    """
+    This function claims a key: the first caller in the process leads, later
+    callers follow until the leader finishes.
+    """
+    with _flights_lock:
+        done = _flights.get(key)
+        if done is not None:
+            return Flight(key, done, leader=False)
+        done = _flights[key] = threading.Event()
+    return Flight(key, done, leader=True)
+
+
+@contextmanager
+def lock_keys(keys: Iterable[str]) -> Iterator[Set[str]]:
+    """
+    This context manager takes the cross-worker locks of several keys and yields
+    the keys whose lock is held (all of them when workers are not coordinated).
+
+    Keys sharing a lock file are covered by a single lock on it, so a caller
+    never waits on itself, and lock files are taken in path order, so two workers
+    locking overlapping keys always queue instead of holding one file each while
+    waiting for the other's. All locks share one JOBICY_SINGLE_FLIGHT_TIMEOUT.
+    """
+    keys = list(keys)
+    keys_by_path: Dict[str, List[str]] = {}
+    for key in keys:
+        keys_by_path.setdefault(lock_path(key), []).append(key)
+    if None in keys_by_path:
+        yield set(keys)
+        return
+
+    deadline = time.monotonic() + get_timeout()
+    held = []
+    locked = set()
+    try:
+        for path in sorted(keys_by_path):
+            lock_file = _acquire(path, deadline)
+            if lock_file is not None:
+                held.append(lock_file)
+                locked.update(keys_by_path[path])
+        yield locked
+    finally:
+        for lock_file in held:
+            _release(lock_file)
+
+
+def run(key: str, fetch: Callable[[], T], reuse: Callable[[], Optional[T]]) -> Optional[T]:
+    """
+    This function runs fetch() for a key unless another thread or worker is
+    already doing so, in which case it waits and returns reuse(), the result that
+    fetch stored. The leader also checks reuse() once it holds the worker lock, as
+    another worker may have stored a result while it waited.
+    """
+    flight = begin(key)
+    if not flight.leader:
+        flight.wait()
+        return reuse()
+    try:
+        if flight.lock():
+            result = reuse()
+            if result is not None:
+                return result
+        return fetch()
+    finally:
+        flight.finish()
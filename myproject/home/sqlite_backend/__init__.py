@@ -0,0 +1,3 @@
+"""
+This package contains the SQLite database backend with a configurable transaction mode.
+"""
@@ -0,0 +1,49 @@
+"""
+This file contains Django's SQLite backend with the OPTIONS['transaction_mode'] of
+Django 5.1 backported.
+
+Django 4.2 opens every atomic() block with a deferred BEGIN. A transaction that
+reads before it writes, as ingest_jobs does, then has to upgrade its read lock to
+a write lock, and in WAL mode SQLite fails that upgrade with SQLITE_BUSY straight
+away if another connection wrote meanwhile; the busy timeout does not help. With
+transaction_mode 'IMMEDIATE' the write lock is taken at BEGIN, where the timeout
+does apply, so concurrent writers wait their turn instead of failing.
+
+An IMMEDIATE transaction also holds off every other writer while it runs, so it
+is not the default here: the read-then-write paths ask for it per block with
+home.db.immediate_atomic(), which sets next_transaction_mode for one BEGIN.
+"""
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    This class contains the SQLite backend that starts transactions in the mode set
+    by OPTIONS['transaction_mode'], or in next_transaction_mode for the next BEGIN only.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.next_transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('transaction_mode', None)
+        return params
+
+    @property
+    def transaction_mode(self):
+        """
+        This property returns the BEGIN mode of atomic blocks, or None for the default.
+        """
+        mode = self.next_transaction_mode or self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ValueError(f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}")
+        return mode.upper() if mode else None
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
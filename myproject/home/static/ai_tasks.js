@@ -0,0 +1,63 @@
+/*
+ * Queue an AI task and poll until the background worker has finished it.
+ *
+ * enqueueUrl answers with {task_id, status_url}; status_url is then polled until
+ * the task has succeeded (onSuccess(result)) or failed (onError(message)), for at
+ * most maxPolls attempts (about five minutes by default).
+ */
+function runAiTask(enqueueUrl, formData, callbacks) {
+    const pollInterval = 1500;
+    const maxPolls = callbacks.maxPolls || 200;
+    const defaultError = callbacks.defaultError || 'An unexpected error occurred.';
+    const timeoutError = 'The request is taking longer than expected. Please try again later.';
+    let polls = 0;
+
+    function finish() {
+        if (callbacks.onComplete) {
+            callbacks.onComplete();
+        }
+    }
+
+    function fail(xhr) {
+        let errorMsg = defaultError;
+        if (xhr && xhr.responseJSON && xhr.responseJSON.error) {
+            errorMsg = xhr.responseJSON.error;
+        }
+        callbacks.onError(errorMsg);
+        finish();
+    }
+
+    function poll(statusUrl) {
+        $.getJSON(statusUrl)
+            .done(function(task) {
+                if (task.status === 'succeeded') {
+                    callbacks.onSuccess(task.result);
+                    finish();
+                } else if (task.status === 'failed') {
+                    callbacks.onError(task.error || defaultError);
+                    finish();
+                } else if (++polls >= maxPolls) {
+                    callbacks.onError(timeoutError);
+                    finish();
+                } else {
+                    setTimeout(function() { poll(statusUrl); }, pollInterval);
+                }
+            })
+            .fail(fail);
+    }
+
+    $.ajax({
+        url: enqueueUrl,
+        type: "POST",
+        data: formData,
+        processData: false,
+        contentType: false,
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+    })
+        .done(function(response) {
+            poll(response.status_url);
+        })
+        .fail(fail);
+}
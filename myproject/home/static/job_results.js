@@ -0,0 +1,139 @@
+/*
+ * Infinite scroll and lazily loaded descriptions for the job result cards.
+ *
+ * The #results-sentinel element below the grid holds the page endpoint and the
+ * cursor of the next page. Each response ({html, next_cursor}) appends a page of
+ * cards until no cursor is left. A card's full description is fetched the first
+ * time it is expanded. onCardsAdded(container) runs for every appended page.
+ */
+function initJobResults(grid, onCardsAdded) {
+    const sentinel = document.getElementById('results-sentinel');
+    let loading = false;
+
+    grid.addEventListener('click', function(event) {
+        const button = event.target.closest('.toggle-description');
+        if (button) {
+            toggleDescription(button);
+        }
+    });
+
+    if (!sentinel || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    function loadNextPage() {
+        if (loading || !sentinel.dataset.cursor) {
+            return;
+        }
+        loading = true;
+        $.getJSON(sentinel.dataset.url, {cursor: sentinel.dataset.cursor})
+            .done(function(page) {
+                const container = document.createElement('div');
+                container.innerHTML = page.html;
+                if (onCardsAdded) {
+                    onCardsAdded(container);
+                }
+                while (container.firstElementChild) {
+                    grid.appendChild(container.firstElementChild);
+                }
+                if (page.next_cursor) {
+                    sentinel.dataset.cursor = page.next_cursor;
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            })
+            .fail(function() {
+                sentinel.textContent = 'Could not load more jobs.';
+                observer.disconnect();
+            })
+            .always(function() {
+                loading = false;
+            });
+    }
+
+    const observer = new IntersectionObserver(function(entries) {
+        if (entries.some(function(entry) { return entry.isIntersecting; })) {
+            loadNextPage();
+        }
+    }, {rootMargin: '400px'});
+    observer.observe(sentinel);
+}
+
+function toggleDescription(button) {
+    const target = button.nextElementSibling;
+    if (!target.hidden) {
+        target.hidden = true;
+        button.textContent = 'Show full description';
+        return;
+    }
+    if (target.dataset.loaded) {
+        target.hidden = false;
+        button.textContent = 'Hide description';
+        return;
+    }
+    button.disabled = true;
+    $.getJSON(button.dataset.url)
+        .done(function(job) {
+            target.textContent = job.description;
+            target.dataset.loaded = '1';
+            target.hidden = false;
+            button.textContent = 'Hide description';
+        })
+        .fail(function() {
+            button.textContent = 'Description unavailable';
+        })
+        .always(function() {
+            button.disabled = false;
+        });
+}
+
+/*
+ * Collects job interactions and sends them to the batch tracking endpoint, in
+ * requests of at most maxEvents events (the server's limit): every flushInterval
+ * milliseconds and when the page is left. keepalive lets the last batch finish
+ * after navigation. Events of a request that fails are queued again, unless the
+ * server rejected them as malformed.
+ */
+function createInteractionBatch(url, csrfToken, maxEvents, flushInterval) {
+    const queue = [];
+    const chunkSize = Math.max(1, maxEvents || 100);
+
+    function send(events) {
+        fetch(url, {
+            method: 'POST',
+            keepalive: true,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken,
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            body: JSON.stringify({events: events})
+        }).then(function(response) {
+            if (response.status === 400) {
+                console.error('Job interactions rejected by the server');
+            } else if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+        }).catch(function(error) {
+            console.error('Error tracking job interactions:', error);
+            queue.unshift.apply(queue, events);
+        });
+    }
+
+    function flush() {
+        while (queue.length) {
+            send(queue.splice(0, chunkSize));
+        }
+    }
+
+    window.addEventListener('pagehide', flush);
+    setInterval(flush, flushInterval || 5000);
+
+    return {
+        add: function(jobId, interactionType) {
+            queue.push({job_id: jobId, interaction_type: interactionType});
+        },
+        flush: flush
+    };
+}
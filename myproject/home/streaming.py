@@ -0,0 +1,73 @@
+"""
+This file contains the helpers for streaming AI output to the browser as server-sent events.
+"""
+import json
+
+from django.http import StreamingHttpResponse
+import markdown
+
+
+def sse_event(data, event=None):
+    """
+    This function formats one server-sent event with a JSON payload.
+    """
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+async def _aiterate(events):
+    """
+    This function turns a plain list of events into an async iterator.
+    """
+    for event in events:
+        yield event
+
+
+def sse_response(events):
+    """
+    This function wraps the formatted events in an unbuffered event-stream response.
+
+    The events are served asynchronously, so this is meant for the async views.
+    Only an ASGI server streams them: under WSGI (manage.py runserver) Django
+    reads the whole iterator before sending anything, so the events arrive at
+    once when the generation is finished. python-local-test.sh serves the app with
+    uvicorn for that reason.
+    """
+    if not hasattr(events, '__aiter__'):
+        events = _aiterate(events)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class MarkdownStream:
+    """
+    Renders streamed Markdown one block at a time.
+
+    Text is held back until a blank line closes the block it belongs to, so every
+    block is rendered exactly once; the unfinished tail is sent as plain text.
+    """
+    def __init__(self):
+        self.text = ''
+        self.rendered_upto = 0
+
+    def feed(self, delta):
+        """
+        This method adds a chunk of text and returns (html of newly closed blocks, raw tail).
+        """
+        self.text += delta
+        boundary = self.text.rfind('\n\n')
+        html = ''
+        if boundary >= self.rendered_upto:
+            html = markdown.markdown(self.text[self.rendered_upto:boundary])
+            self.rendered_upto = boundary + 2
+        return html, self.text[self.rendered_upto:]
+
+    def render(self):
+        """
+        This method renders the complete text, once the stream is finished.
+        """
+        return markdown.markdown(self.text)
@@ -0,0 +1,107 @@
+"""
+This module contains the views that queue AI work and report on queued tasks.
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from users.models import Resume ## pylint: disable=import-error,no-name-in-module,wrong-import-order
+
+from .forms import CoverLetterForm # pylint: disable=import-error,no-name-in-module
+from .models import AITask
+from .tasks import enqueue
+
+
+def _job_payload(request):
+    """
+    Collect the job fields posted by the fit analysis and rejection pages.
+    """
+    return {
+        'job_title': request.POST.get('job_title', ''),
+        'job_description': request.POST.get('job_description', ''),
+        'industry': request.POST.get('industry', ''),
+        'location': request.POST.get('location', ''),
+    }
+
+
+def _task_payload(request, kind): # pylint: disable=too-many-return-statements
+    """
+    Validate the posted data for a task kind and return (payload, error response).
+    """
+    if kind == AITask.KIND_RESUME_FEEDBACK:
+        resume_id = request.POST.get('resume_id')
+        if not resume_id:
+            return None, JsonResponse({'error': 'No resume selected'}, status=400)
+        if not resume_id.isdigit() or \
+        not Resume.objects.filter(id=resume_id, user=request.user).exists(): # pylint: disable=no-member
+            return None, JsonResponse({'error': 'Resume not found'}, status=404)
+        return {'resume_id': int(resume_id),
+                'job_description': request.POST.get('job_description', '')}, None
+
+    if kind in (AITask.KIND_FIT_ANALYSIS, AITask.KIND_REJECTION_REASONS):
+        payload = _job_payload(request)
+        if not payload['job_title']:
+            return None, JsonResponse({'error': 'No job title provided'}, status=400)
+        if kind == AITask.KIND_FIT_ANALYSIS and \
+        not Resume.objects.filter(user=request.user).exists(): # pylint: disable=no-member
+            return None, JsonResponse({'error': 'No resume found to analyze fit'}, status=400)
+        return payload, None
+
+    form = CoverLetterForm(request.POST)
+    if not form.is_valid():
+        return None, JsonResponse({'error': 'Invalid form data'}, status=400)
+    return {
+        'job_description': form.cleaned_data['job_description'],
+        'use_resume': form.cleaned_data['use_resume'],
+        'user_info': {
+            'name': form.cleaned_data['user_name'],
+            'email': form.cleaned_data['user_email'],
+            'phone': form.cleaned_data['user_phone'],
+            'address': form.cleaned_data['user_address']
+        },
+        'company_name': form.cleaned_data.get('company_name'),
+        'job_title': form.cleaned_data.get('job_title'),
+    }, None
+
+
+@login_required
+def ajax_enqueue_ai_task(request, kind):
+    """
+    Queue an AI task and return its id; the result is fetched from ai_task_status.
+    """
+    if not (request.method == "POST" and
+            request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    if kind not in dict(AITask.KINDS):
+        return JsonResponse({'error': 'Unknown task'}, status=404)
+
+    payload, error_response = _task_payload(request, kind)
+    if error_response:
+        return error_response
+
+    task = enqueue(request.user, kind, **payload)
+    return JsonResponse({
+        'task_id': str(task.id),
+        'status': task.status,
+        'status_url': reverse('ai_task_status', args=[task.id]),
+    }, status=202)
+
+
+@login_required
+def ai_task_status(request, task_id):
+    """
+    Report the status of one of the user's AI tasks, with its result once finished.
+    """
+    task = get_object_or_404(AITask, id=task_id, user=request.user)
+    data = {
+        'task_id': str(task.id),
+        'kind': task.kind,
+        'status': task.status,
+    }
+    if task.status == AITask.STATUS_SUCCEEDED:
+        data['result'] = task.result
+    elif task.status == AITask.STATUS_FAILED:
+        data['error'] = task.error
+    return JsonResponse(data)
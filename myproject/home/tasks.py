@@ -0,0 +1,324 @@
+"""
+This file contains the background queue for AI generation.
+
+Web requests enqueue an AITask row and hand its id back to the browser, which
+polls for the result. The run_ai_worker management command claims pending rows,
+runs them in a fixed number of slots and paces how often OpenAI work is started.
+Finished rows are purged once they are older than AI_TASK_RETENTION_SECONDS.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from users.models import Resume # pylint: disable=import-error,no-name-in-module
+from users.views import get_resume_feedback, get_resume_text, resume_parse_failed # pylint: disable=import-error,no-name-in-module
+
+from .cover_letter_service import CoverLetterService
+from .models import AITask
+from .views import (fill_cover_letter_placeholders, generate_rejection_reasons,
+                    get_job_fit_analysis, get_job_specific_feedback)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT = 60
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_STALE_SECONDS = 10 * 60
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 60 * 60
+PURGE_INTERVAL = 60 * 60
+
+
+# The generators report failures as text. Results starting with one of these
+# (after their "## Error" heading) are failures: the first group will not go away
+# by retrying, the second may.
+PERMANENT_ERROR_PREFIXES = (
+    'Could not generate feedback',
+    'Job-specific feedback requires',
+    'Job fit analysis requires',
+    'Rejection reason simulator requires',
+    'Cannot analyze fit without a resume',
+)
+RETRYABLE_ERROR_PREFIXES = (
+    'Error generating AI feedback',
+    'Unable to generate',
+)
+
+
+class TaskError(Exception):
+    """
+    A task failure that retrying cannot fix (e.g. the user has no resume).
+    """
+
+
+class RetryableTaskError(Exception):
+    """
+    A task failure reported as text by a generator that may succeed on a retry.
+    """
+
+
+def check_generated(text):
+    """
+    This function returns a generator's text, or raises TaskError or
+    RetryableTaskError if the text is an error message.
+    """
+    if not isinstance(text, str):
+        return text
+    message = strip_tags(text).strip()
+    if message.startswith('Error\n'):
+        message = message[len('Error'):].strip()
+    if message.startswith(PERMANENT_ERROR_PREFIXES):
+        raise TaskError(message)
+    if message.startswith(RETRYABLE_ERROR_PREFIXES):
+        raise RetryableTaskError(message)
+    return text
+
+
+def _setting(name, default):
+    """
+    This function reads an AI_* setting, falling back to the module default.
+    """
+    return getattr(settings, name, default)
+
+
+def _latest_resume_text(user_id):
+    """
+    This function returns the cached text of the user's latest resume, or None.
+    """
+    latest_resume = Resume.objects.filter( # pylint: disable=no-member
+        user_id=user_id).order_by('-uploaded_at').first()
+    if latest_resume is None:
+        return None
+    return get_resume_text(latest_resume)
+
+
+def run_resume_feedback(task):
+    """
+    This function generates general and job-specific feedback for a resume.
+    """
+    try:
+        resume = Resume.objects.get(id=task.payload['resume_id'], # pylint: disable=no-member
+                                    user_id=task.user_id)
+    except Resume.DoesNotExist as e: # pylint: disable=no-member
+        raise TaskError('Resume not found') from e
+
+    resume_text = get_resume_text(resume)
+    return {
+        'general_feedback': check_generated(get_resume_feedback(resume_text)),
+        'job_specific_feedback': check_generated(get_job_specific_feedback(
+            resume_text, task.payload.get('job_description', ''))),
+    }
+
+
+def run_fit_analysis(task):
+    """
+    This function analyzes how well the user's latest resume fits a job.
+    """
+    resume_text = _latest_resume_text(task.user_id)
+    if not resume_text:
+        raise TaskError('No resume found to analyze fit')
+
+    return {'fit_analysis': check_generated(
+        get_job_fit_analysis(resume_text=resume_text, **task.payload))}
+
+
+def run_rejection_reasons(task):
+    """
+    This function simulates why an employer might reject the user for a job.
+    """
+    resume_text = _latest_resume_text(task.user_id)
+    return {'rejection_reasons': check_generated(
+        generate_rejection_reasons(resume_text=resume_text, **task.payload))}
+
+
+def run_cover_letter(task):
+    """
+    This function writes a cover letter, using the user's latest resume if asked to.
+    """
+    payload = task.payload
+    resume_text = None
+    if payload.get('use_resume'):
+        resume_text = _latest_resume_text(task.user_id)
+        if resume_text is None:
+            raise TaskError('Resume not found. Please upload a resume first.')
+        if resume_parse_failed(resume_text):
+            resume_text = None
+
+    cover_letter_text = CoverLetterService.generate_cover_letter(
+        job_description=payload['job_description'],
+        resume_text=resume_text,
+        user_info=payload.get('user_info')
+    )
+    return {'cover_letter_text': fill_cover_letter_placeholders(
+        cover_letter_text, payload.get('company_name'), payload.get('job_title'))}
+
+
+HANDLERS = {
+    AITask.KIND_RESUME_FEEDBACK: run_resume_feedback,
+    AITask.KIND_FIT_ANALYSIS: run_fit_analysis,
+    AITask.KIND_REJECTION_REASONS: run_rejection_reasons,
+    AITask.KIND_COVER_LETTER: run_cover_letter,
+}
+
+
+def enqueue(user, kind, **payload):
+    """
+    This function queues an AI task for the user and returns it.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown AI task kind: {kind}")
+    return AITask.objects.create(user=user, kind=kind, payload=payload) # pylint: disable=no-member
+
+
+def requeue_stale_tasks():
+    """
+    This function hands tasks left running by a dead worker back to the queue and
+    returns how many it requeued.
+
+    A task that has already used its AI_TASK_MAX_ATTEMPTS is failed instead, so a
+    task that keeps crashing or killing the worker is not claimed forever.
+    """
+    now = timezone.now()
+    stale = AITask.objects.filter( # pylint: disable=no-member
+        status=AITask.STATUS_RUNNING,
+        started_at__lt=now - timedelta(
+            seconds=_setting('AI_TASK_STALE_SECONDS', DEFAULT_STALE_SECONDS)))
+    max_attempts = _setting('AI_TASK_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    stale.filter(attempts__gte=max_attempts).update(
+        status=AITask.STATUS_FAILED, result=None, finished_at=now,
+        error='Unable to complete the request. Please try again later.')
+    return stale.filter(attempts__lt=max_attempts).update(status=AITask.STATUS_PENDING)
+
+
+def purge_finished_tasks():
+    """
+    This function deletes succeeded and failed tasks (and their stored results)
+    that finished more than AI_TASK_RETENTION_SECONDS ago. It returns how many
+    it deleted.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=_setting('AI_TASK_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS))
+    deleted, _ = AITask.objects.filter( # pylint: disable=no-member
+        status__in=(AITask.STATUS_SUCCEEDED, AITask.STATUS_FAILED), finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def claim_tasks(limit):
+    """
+    This function claims up to `limit` due tasks for this worker, oldest first.
+
+    A task is only claimed if it is still pending when the UPDATE runs, so two
+    workers polling at once never run the same task.
+    """
+    now = timezone.now()
+    candidates = list(AITask.objects.filter( # pylint: disable=no-member
+        status=AITask.STATUS_PENDING, run_after__lte=now
+    ).order_by('created_at').values_list('pk', flat=True)[:limit])
+
+    claimed = [
+        pk for pk in candidates
+        if AITask.objects.filter(pk=pk, status=AITask.STATUS_PENDING).update( # pylint: disable=no-member
+            status=AITask.STATUS_RUNNING, started_at=now, attempts=F('attempts') + 1)
+    ]
+    return list(AITask.objects.filter(pk__in=claimed).order_by('created_at')) # pylint: disable=no-member
+
+
+def run_task(task):
+    """
+    This function runs a claimed task and records its result, error or retry.
+    """
+    try:
+        result = HANDLERS[task.kind](task)
+    except TaskError as e:
+        _finish(task, AITask.STATUS_FAILED, error=str(e))
+    except Exception as e: # pylint: disable=broad-exception-caught
+        logger.error("AI task %s (%s) failed on attempt %s", task.pk, task.kind,
+                     task.attempts, exc_info=True)
+        if task.attempts < _setting('AI_TASK_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS):
+            delay = _setting('AI_TASK_RETRY_DELAY', DEFAULT_RETRY_DELAY) * task.attempts
+            task.status = AITask.STATUS_PENDING
+            task.run_after = timezone.now() + timedelta(seconds=delay)
+            task.error = str(e)
+            task.save(update_fields=['status', 'run_after', 'error'])
+        else:
+            _finish(task, AITask.STATUS_FAILED, error='Unable to complete the request. '
+                                                      'Please try again later.')
+    else:
+        _finish(task, AITask.STATUS_SUCCEEDED, result=result)
+    return task
+
+
+def _finish(task, status, result=None, error=''):
+    """
+    This function stores the final status of a task.
+    """
+    task.status = status
+    task.result = result
+    task.error = error
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'result', 'error', 'finished_at'])
+
+
+def _run_task_in_thread(task):
+    """
+    This function runs a task on a pool thread and releases the thread's connection.
+    """
+    try:
+        return run_task(task)
+    finally:
+        connection.close()
+
+
+def run_worker(concurrency=None, rate_limit=None, poll_interval=None, once=False):
+    """
+    This function is the worker loop behind the run_ai_worker command.
+
+    Up to `concurrency` tasks run in parallel threads, and a new task is claimed as
+    soon as one of them finishes, so one slow call does not hold up the others.
+    Starts are spaced so no more than `rate_limit` tasks begin per minute
+    (0 disables the limit). With `once`, the loop exits when the queue is empty.
+    Returns the number of tasks run.
+    """
+    concurrency = concurrency or _setting('AI_WORKER_CONCURRENCY', DEFAULT_CONCURRENCY)
+    if rate_limit is None:
+        rate_limit = _setting('AI_WORKER_RATE_LIMIT', DEFAULT_RATE_LIMIT)
+    if poll_interval is None:
+        poll_interval = _setting('AI_WORKER_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+    start_interval = 60.0 / rate_limit if rate_limit else 0
+    last_start = 0.0
+    last_purge = None
+    processed = 0
+    running = set()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purge_finished_tasks()
+                last_purge = time.monotonic()
+            requeue_stale_tasks()
+
+            free_slots = concurrency - len(running)
+            for task in claim_tasks(free_slots) if free_slots else []:
+                pause = last_start + start_interval - time.monotonic()
+                if pause > 0:
+                    time.sleep(pause)
+                last_start = time.monotonic()
+                running.add(executor.submit(_run_task_in_thread, task))
+
+            if running:
+                done, running = wait(running, timeout=poll_interval,
+                                     return_when=FIRST_COMPLETED)
+                processed += len(done)
+            elif once:
+                return processed
+            else:
+                time.sleep(poll_interval)
@@ -2,37 +2,26 @@
 This file contains the filters for the jobs app.
 """
 
-import html
-import ast
-
 from django import template
 
+from .. import tracking
+from ..normalize import format_label
+
 register = template.Library()
 
 @register.filter(name='format_field')
 def format_field(value):
     """
-    This function formats the field value.
+    This function formats the field value. Listings already carry the formatted
+    value in their *_label columns; this filter is for raw values.
     """
+    return format_label(value)
 
-    if value is None:
-        return None
-
-    processed_value = value
-
-    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
-        try:
-            list_val = ast.literal_eval(value)
-            if isinstance(list_val, list) and len(list_val) > 0:
-                processed_value = list_val[0]
-            elif isinstance(list_val, list):
-                processed_value = ''
-        except (ValueError, SyntaxError):
-            processed_value = value.strip('\'"[] ')
 
-    if isinstance(processed_value, str):
-        processed_value = html.unescape(processed_value)
-        if processed_value:
-            processed_value = processed_value.replace('_', ' ').replace('-', ' ').title()
-
-    return processed_value
+@register.simple_tag
+def tracking_batch_max_events():
+    """
+    This function returns how many events the batch tracking endpoint accepts per
+    request, so the page can split its queue to match.
+    """
+    return tracking.get_batch_max_events()
@@ -0,0 +1,409 @@
+"""
+This file contains the tests for the async AI AJAX views.
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from openai import APITimeoutError
+
+from users.models import Profile, Resume # pylint: disable=import-error,no-name-in-module
+from home.models import InterviewQuestionSet, JobListing # pylint: disable=import-error,no-name-in-module
+
+
+def completion(content):
+    """
+    This function builds a fake chat completion with the given message content.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+async def fake_stream(parts):
+    """
+    This function yields fake streamed chat completion chunks.
+    """
+    for part in parts:
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = part
+        yield chunk
+
+
+def parse_events(body):
+    """
+    This function splits a server-sent event stream into (event, data) pairs.
+    """
+    events = []
+    for raw in body.decode().strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in raw.split('\n'))
+        events.append((lines.get('event', 'message'), json.loads(lines['data'])))
+    return events
+
+
+def patch_async_openai(*contents, side_effect=None):
+    """
+    This function patches the async OpenAI client to answer with the given contents.
+    """
+    create = AsyncMock(side_effect=side_effect or [completion(c) for c in contents])
+    client = MagicMock()
+    client.chat.completions.create = create
+    return patch('home.http_client.get_async_openai_client', return_value=client), create
+
+
+def patch_async_openai_stream(*parts):
+    """
+    This function patches the async OpenAI client to stream the given parts.
+    """
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=fake_stream(parts))
+    return patch('home.http_client.get_async_openai_client', return_value=client)
+
+
+@patch.dict('os.environ', {'OPENAI_API_KEY': 'sk-test'})
+class AsyncAjaxViewTests(TestCase): # pylint: disable=too-many-public-methods
+    """
+    This class contains the tests for the async AI AJAX views.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='StrongTestPass123'
+        )
+        self.async_client.force_login(self.user)
+
+    async def post(self, name, data):
+        """
+        This method sends an AJAX POST to the named async endpoint.
+        """
+        return await self.async_client.post(reverse(name), data,
+                                            headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    async def test_login_required(self):
+        """
+        This test checks that anonymous users are redirected to login.
+        """
+        response = await AsyncClient().post(reverse('generate_questions_async'),
+                                            {'job_description': 'Python'},
+                                            headers={'X-Requested-With': 'XMLHttpRequest'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith('/users/login/'))
+
+    async def test_rejects_non_ajax_requests(self):
+        """
+        This test checks that plain GET requests are rejected.
+        """
+        response = await self.async_client.get(reverse('evaluate_response_async'))
+
+        self.assertEqual(response.status_code, 405)
+
+    async def test_generate_questions(self):
+        """
+        This test checks that questions come back from the async OpenAI client.
+        """
+        patcher, create = patch_async_openai('["Why Django?", "Why Python?"]')
+        with patcher:
+            response = await self.post('generate_questions_async',
+                                       {'job_description': 'Python developer'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['questions'], ["Why Django?", "Why Python?"])
+        create.assert_awaited_once()
+
+    async def test_generate_questions_for_job_are_stored(self):
+        """
+        This test checks that a listing's questions are generated once and then read
+        from the database.
+        """
+        job = await JobListing.objects.acreate(job_id='job-1', title='Engineer', # pylint: disable=no-member
+                                               company='Acme', description='Python developer')
+        patcher, create = patch_async_openai('["Why Django?"]')
+        with patcher:
+            for _ in range(2):
+                response = await self.post('generate_questions_async', {'job_id': job.job_id})
+                self.assertEqual(response.json()['questions'], ["Why Django?"])
+
+        create.assert_awaited_once()
+        self.assertTrue(await InterviewQuestionSet.objects.filter(job=job).aexists()) # pylint: disable=no-member
+
+    async def test_evaluate_response(self):
+        """
+        This test checks that an answer is scored through the async OpenAI client.
+        """
+        feedback = {"score": 8, "strengths": ["Clear"], "areas_to_improve": ["Depth"],
+                    "suggestions": "Add an example."}
+        patcher, _ = patch_async_openai(json.dumps(feedback))
+        with patcher:
+            response = await self.post('evaluate_response_async', {
+                'question': 'Why Django?',
+                'response': 'Batteries included.',
+                'job_description': 'Python developer'
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), feedback)
+
+    async def test_evaluate_response_requires_answer(self):
+        """
+        This test checks that an empty answer is rejected before calling OpenAI.
+        """
+        patcher, create = patch_async_openai()
+        with patcher:
+            response = await self.post('evaluate_response_async', {'question': 'Why?'})
+
+        self.assertEqual(response.status_code, 400)
+        create.assert_not_awaited()
+
+    async def test_generate_cover_letter_fills_placeholders(self):
+        """
+        This test checks the async cover letter and its placeholder replacement.
+        """
+        patcher, _ = patch_async_openai("Dear [Company Name], I want the [Job Title] role.")
+        with patcher:
+            response = await self.post('ajax_generate_cover_letter_async', {
+                'job_description': 'Python developer',
+                'company_name': 'Acme',
+                'job_title': 'Engineer',
+                'user_name': 'Test User',
+                'user_email': 'test@example.com',
+                'user_phone': '555-0100',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cover_letter_text'],
+                         "Dear Acme, I want the Engineer role.")
+
+    async def test_generate_cover_letter_falls_back_to_template(self):
+        """
+        This test checks that an OpenAI failure falls back to the template letter.
+        """
+        patcher, _ = patch_async_openai(side_effect=APITimeoutError(request=MagicMock()))
+        with patcher:
+            response = await self.post('ajax_generate_cover_letter_async', {
+                'job_description': 'Python developer',
+                'user_name': 'Test User',
+                'user_email': 'test@example.com',
+                'user_phone': '555-0100',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Test User', response.json()['cover_letter_text'])
+
+    async def test_resume_feedback_not_found(self):
+        """
+        This test checks that another user's resume id is reported as missing.
+        """
+        response = await self.post('resume_feedback_async',
+                                   {'resume_id': 999, 'job_description': 'Python'})
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('users.views.parse_resume', return_value="Python, Django")
+    @patch('users.views.load_resume_guide', return_value="Be concise.")
+    async def test_resume_feedback(self, _guide, _parse):
+        """
+        This test checks general and job-specific feedback from the async client.
+        """
+        resume = await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+        patcher, create = patch_async_openai("General **tips**", "Job **fit**")
+        with patcher:
+            response = await self.post('resume_feedback_async',
+                                       {'resume_id': resume.id, 'job_description': 'Python'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('<strong>tips</strong>', data['general_feedback'])
+        self.assertIn('<strong>fit</strong>', data['job_specific_feedback'])
+        self.assertEqual(create.await_count, 2)
+
+    async def test_job_outlook_requires_resume(self):
+        """
+        This test checks that a fit analysis needs an uploaded resume.
+        """
+        response = await self.post('job_outlook_async', {'job_title': 'Engineer'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'No resume found to analyze fit')
+
+    @patch('users.views.parse_resume', return_value="Python, Django")
+    async def test_job_outlook(self, _parse):
+        """
+        This test checks the async fit analysis.
+        """
+        await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+        patcher, _ = patch_async_openai("Match score: 80%")
+        with patcher:
+            response = await self.post('job_outlook_async',
+                                       {'job_title': 'Engineer', 'job_description': 'Python'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['fit_analysis'], "Match score: 80%")
+
+    async def test_rejection_generator_timeout(self):
+        """
+        This test checks that a timeout is reported in the rejection reasons.
+        """
+        patcher, _ = patch_async_openai(side_effect=APITimeoutError(request=MagicMock()))
+        with patcher:
+            response = await self.post('rejection_generator_async', {'job_title': 'Engineer'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Request timed out', response.json()['rejection_reasons'])
+
+    async def read_stream(self, response):
+        """
+        This method collects the body of a streaming response.
+        """
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_stream_cover_letter(self):
+        """
+        This test checks that cover letter chunks are forwarded as they arrive.
+        """
+        with patch_async_openai_stream("Dear [Company Name],", " I am applying."):
+            response = await self.post('ajax_stream_cover_letter', {
+                'job_description': 'Python developer',
+                'company_name': 'Acme',
+                'user_name': 'Test User',
+                'user_email': 'test@example.com',
+                'user_phone': '555-0100',
+            })
+            events = parse_events(await self.read_stream(response))
+
+        self.assertEqual(events, [
+            ('message', {'delta': "Dear [Company Name],"}),
+            ('message', {'delta': " I am applying."}),
+            ('done', {'cover_letter_text': "Dear Acme, I am applying."}),
+        ])
+
+    async def test_stream_cover_letter_failing_midway(self):
+        """
+        This test checks that a stream broken after the first chunk ends with an
+        error event instead of a truncated letter marked as done.
+        """
+        async def broken_stream():
+            async for chunk in fake_stream(["Dear [Company Name],"]):
+                yield chunk
+            raise APITimeoutError(request=MagicMock())
+
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=broken_stream())
+        with patch('home.http_client.get_async_openai_client', return_value=client):
+            response = await self.post('ajax_stream_cover_letter', {
+                'job_description': 'Python developer',
+                'user_name': 'Test User',
+                'user_email': 'test@example.com',
+                'user_phone': '555-0100',
+            })
+            events = parse_events(await self.read_stream(response))
+
+        self.assertEqual([event for event, _ in events], ['message', 'error'])
+
+    async def test_stream_cover_letter_invalid_form(self):
+        """
+        This test checks that an invalid form is answered with JSON before streaming.
+        """
+        response = await self.post('ajax_stream_cover_letter', {'user_name': 'Test User'})
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('users.views.parse_resume', return_value="Python, Django")
+    @patch('users.views.load_resume_guide', return_value="Be concise.")
+    async def test_stream_resume_feedback(self, _guide, _parse):
+        """
+        This test checks block-by-block Markdown rendering and that the feedback is saved.
+        """
+        await sync_to_async(Profile.objects.filter(user=self.user).update)(
+            whitelisted_for_ai=True)
+        resume = await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+        with patch_async_openai_stream("## Summ", "ary\n\nGood **re", "sume**"):
+            response = await self.async_client.get(
+                reverse('resume_feedback_stream', args=[resume.id]))
+            events = parse_events(await self.read_stream(response))
+
+        self.assertEqual(events[0], ('message', {'html': '', 'tail': '## Summ'}))
+        self.assertEqual(events[1], ('message', {'html': '<h2>Summary</h2>', 'tail': 'Good **re'}))
+        self.assertEqual(events[2], ('message', {'html': '', 'tail': 'Good **resume**'}))
+        done_html = '<h2>Summary</h2>\n<p>Good <strong>resume</strong></p>'
+        self.assertEqual(events[3], ('done', {'html': done_html}))
+        await resume.arefresh_from_db()
+        self.assertEqual(resume.ai_feedback, done_html)
+
+    @patch('users.views.parse_resume', return_value="Python, Django")
+    @patch('users.views.load_resume_guide', return_value="Be concise.")
+    async def test_stream_resume_feedback_openai_exception(self, _guide, _parse):
+        """
+        This test checks that a failed OpenAI call ends the stream with an error event
+        and leaves no feedback saved.
+        """
+        await sync_to_async(Profile.objects.filter(user=self.user).update)(
+            whitelisted_for_ai=True)
+        resume = await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=Exception("AI Error"))
+        with patch('home.http_client.get_async_openai_client', return_value=client):
+            response = await self.async_client.get(
+                reverse('resume_feedback_stream', args=[resume.id]))
+            events = parse_events(await self.read_stream(response))
+
+        self.assertEqual(events[-1][0], 'error')
+        self.assertIn('Error generating AI feedback: AI Error', events[-1][1]['html'])
+        await resume.arefresh_from_db()
+        self.assertFalse(resume.ai_feedback)
+
+    @patch('users.views.parse_resume', return_value="Python, Django")
+    @patch('users.views.load_resume_guide', return_value="Be concise.")
+    async def test_stream_resume_feedback_errors_are_out_of_band(self, _guide, _parse):
+        """
+        This test checks that errors are told apart by the error event, not by the
+        text: feedback quoting an error message is saved, a missing API key is not.
+        """
+        await sync_to_async(Profile.objects.filter(user=self.user).update)(
+            whitelisted_for_ai=True)
+        resume = await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+        text = "Avoid lines like 'Could not generate feedback' in your summary."
+        with patch_async_openai_stream(text):
+            events = parse_events(await self.read_stream(await self.async_client.get(
+                reverse('resume_feedback_stream', args=[resume.id]))))
+
+        self.assertEqual(events[-1][0], 'done')
+        await resume.arefresh_from_db()
+        self.assertIn('Could not generate feedback', resume.ai_feedback)
+
+        resume.ai_feedback = None
+        await resume.asave(update_fields=['ai_feedback'])
+        with patch('home.http_client.get_openai_api_key', return_value=None):
+            events = parse_events(await self.read_stream(await self.async_client.get(
+                reverse('resume_feedback_stream', args=[resume.id]))))
+
+        self.assertEqual([event for event, _ in events], ['error'])
+        self.assertIn('OpenAI API key not configured', events[0][1]['html'])
+        await resume.arefresh_from_db()
+        self.assertFalse(resume.ai_feedback)
+
+    async def test_stream_resume_feedback_requires_eligibility(self):
+        """
+        This test checks that users not whitelisted for AI get an error event.
+        """
+        resume = await Resume.objects.acreate(
+            user=self.user, resume=SimpleUploadedFile("resume.pdf", b"%PDF"))
+
+        response = await self.async_client.get(
+            reverse('resume_feedback_stream', args=[resume.id]))
+        events = parse_events(await self.read_stream(response))
+
+        self.assertEqual(events[0][0], 'error')
+        self.assertIn('not currently eligible', events[0][1]['html'])
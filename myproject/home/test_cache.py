@@ -0,0 +1,171 @@
+"""
+This file contains the tests for the named caches and their hit/miss counters.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from home import cache # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing # pylint: disable=import-error,no-name-in-module
+from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
+
+
+class FileCacheTests(SimpleTestCase):
+    """
+    This class contains the tests for the file-based cache used in production.
+    """
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.worker_cache().clear()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def worker_cache(self, max_entries=100):
+        """
+        This method opens the cache directory the way one gunicorn worker would.
+        """
+        return cache.StatsFileBasedCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': 2}})
+
+    def test_entries_and_counters_are_shared_between_workers(self):
+        """
+        This test checks that one worker reads what another wrote and that the
+        counters add up the lookups of both.
+        """
+        first, second = self.worker_cache(), self.worker_cache()
+
+        self.assertIsNone(first.get('search:python'))
+        first.set('search:python', [1, 2, 3])
+        self.assertEqual(second.get('search:python'), [1, 2, 3])
+
+        first.stats()
+        self.assertEqual(second.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    @patch('home.cache.STATS_FLUSH_EVERY', 2)
+    def test_counters_are_written_in_batches(self):
+        """
+        This test checks that counters reach the shared store every few lookups.
+        """
+        worker, reader = self.worker_cache(), self.worker_cache()
+
+        worker.get('a')
+        self.assertEqual(reader.stats()['misses'], 0)
+        worker.get('b')
+        self.assertEqual(reader.stats()['misses'], 2)
+
+    def test_full_cache_culls_entries(self):
+        """
+        This test checks that an alias never grows past its MAX_ENTRIES.
+        """
+        worker = self.worker_cache(max_entries=4)
+        for i in range(20):
+            worker.set(f'key-{i}', i)
+
+        self.assertLessEqual(len(os.listdir(self.location)), 4)
+        self.assertEqual(worker.get('key-19'), 19)
+
+    def test_culling_drops_least_recently_used(self):
+        """
+        This test checks that culling keeps the entries read last, not the ones
+        written last.
+        """
+        worker = self.worker_cache(max_entries=4)
+        now = time.time()
+        for age, key in enumerate(('d', 'c', 'b', 'a'), start=1):
+            worker.set(key, key)
+            path = worker._key_to_file(key) # pylint: disable=protected-access
+            os.utime(path, (now - age * 60, now - age * 60))
+
+        self.assertEqual(worker.get('a'), 'a')
+        self.assertEqual(worker.get('b'), 'b')
+        worker.set('e', 'e')
+
+        self.assertEqual([worker.get(key) for key in 'abcde'], ['a', 'b', None, None, 'e'])
+
+    @patch('home.cache.STATS_FLUSH_EVERY', 1)
+    def test_culling_keeps_the_counters(self):
+        """
+        This test checks that the counters are not among the entries culled.
+        """
+        worker = self.worker_cache(max_entries=4)
+        for i in range(20):
+            worker.get(f'key-{i}')
+            worker.set(f'key-{i}', i)
+
+        self.assertEqual(worker.stats()['misses'], 20)
+        worker.clear()
+        self.assertEqual(worker.stats()['misses'], 0)
+
+    def test_production_aliases(self):
+        """
+        This test checks that every named alias is configured with a size cap.
+        """
+        for alias in ('default',) + cache.ALIASES:
+            self.assertIn(alias, settings.CACHES)
+            self.assertGreater(settings.CACHES[alias]['OPTIONS']['MAX_ENTRIES'], 0)
+
+
+@override_settings(SEARCH_RESULTS_CACHE_TTL=60, JOBICY_LOCAL_MIN_RESULTS=2)
+class SearchResultsCacheTests(TestCase):
+    """
+    This class contains the tests for the cached ranking of local searches.
+    """
+    def setUp(self):
+        caches[cache.SEARCH].clear()
+        for job_id, title in (('1', 'Python Developer'), ('2', 'Senior Python Engineer')):
+            JobListing.objects.create(job_id=job_id, title=title, company='Acme', # pylint: disable=no-member
+                                      description='Build Python services')
+
+    def tearDown(self):
+        caches[cache.SEARCH].clear()
+
+    def test_repeat_search_reuses_ranking(self):
+        """
+        This test checks that a repeated query skips the full-text search and keeps
+        its order and snippets.
+        """
+        first = JobicyService.search_local('python')
+
+        with patch('home.services.search_listings') as mock_search, \
+                CaptureQueriesContext(connection) as queries:
+            second = JobicyService.search_local('python')
+
+        mock_search.assert_not_called()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([job.pk for job in second], [job.pk for job in first])
+        self.assertEqual([job.search_snippet for job in second],
+                         [job.search_snippet for job in first])
+        self.assertEqual(caches[cache.SEARCH].stats()['hits'], 1)
+
+    def test_deleted_listing_is_dropped_from_cached_ranking(self):
+        """
+        This test checks that a listing removed since the search is skipped.
+        """
+        JobicyService.search_local('python')
+        JobListing.objects.filter(job_id='1').delete() # pylint: disable=no-member
+
+        self.assertIsNone(JobicyService.search_local('python'))
+
+    def test_cache_stats_command(self):
+        """
+        This test checks that the command reports every alias.
+        """
+        JobicyService.search_local('python')
+
+        output = StringIO()
+        call_command('cache_stats', stdout=output)
+
+        for alias in cache.ALIASES:
+            self.assertIn(alias, output.getvalue())
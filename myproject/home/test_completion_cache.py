@@ -0,0 +1,217 @@
+"""
+This file contains the tests for the OpenAI completion cache.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from home import completion_cache # pylint: disable=import-error,no-name-in-module
+from home.interview_service import InterviewService # pylint: disable=import-error,no-name-in-module
+from home.views import generate_rejection_reasons, get_job_fit_analysis # pylint: disable=import-error,no-name-in-module
+
+
+def completion(content):
+    """
+    This function builds a fake chat completion with the given message content.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def request(user_prompt, model='gpt-4o-mini', temperature=None):
+    """
+    This function builds a minimal chat completion request.
+    """
+    return {
+        'model': model,
+        'messages': [{'role': 'system', 'content': 'You are a recruiter.'},
+                     {'role': 'user', 'content': user_prompt}],
+        'temperature': temperature,
+        'max_tokens': 100,
+    }
+
+
+@override_settings(AI_COMPLETION_CACHE_ENABLED=True)
+class CompletionCacheTests(SimpleTestCase):
+    """
+    This class contains the tests for keying, expiry and eviction of cached completions.
+    """
+    def setUp(self):
+        completion_cache.clear()
+
+    def tearDown(self):
+        completion_cache.clear()
+
+    def test_key_covers_model_prompts_and_temperature(self):
+        """
+        This test checks that only the model, messages and temperature address a completion.
+        """
+        key = completion_cache.completion_key(request('Python'))
+
+        self.assertEqual(key, completion_cache.completion_key({**request('Python'),
+                                                               'max_tokens': 5}))
+        self.assertNotEqual(key, completion_cache.completion_key(request('Java')))
+        self.assertNotEqual(key, completion_cache.completion_key(request('Python',
+                                                                         model='gpt-4o')))
+        self.assertNotEqual(key, completion_cache.completion_key(request('Python',
+                                                                         temperature=0.7)))
+
+    def test_lookup_returns_stored_content(self):
+        """
+        This test checks a miss, then a hit once content has been stored.
+        """
+        self.assertIsNone(completion_cache.lookup('fit_analysis', request('Python')))
+        completion_cache.store('fit_analysis', request('Python'), 'Great fit')
+
+        self.assertEqual(completion_cache.lookup('fit_analysis', request('Python')), 'Great fit')
+        self.assertEqual(completion_cache.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_completions_are_kept_in_shared_alias(self):
+        """
+        This test checks that stored content lives in the 'ai_completions' cache.
+        """
+        completion_cache.store('fit_analysis', request('Python'), 'Great fit')
+
+        self.assertEqual(caches['ai_completions'].get(
+            completion_cache.completion_key(request('Python'))), 'Great fit')
+
+    @override_settings(CACHES={**settings.CACHES, 'ai_completions': {
+        'BACKEND': 'home.cache.StatsLocMemCache', 'LOCATION': 'lru-completions',
+        'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2}}})
+    def test_full_cache_evicts_least_recently_used(self):
+        """
+        This test checks that a full cache drops the completion looked up least recently.
+        """
+        completion_cache.store('fit_analysis', request('Python'), 'Python fit')
+        completion_cache.store('fit_analysis', request('Java'), 'Java fit')
+        self.assertEqual(completion_cache.lookup('fit_analysis', request('Python')), 'Python fit')
+
+        completion_cache.store('fit_analysis', request('Go'), 'Go fit')
+
+        self.assertEqual(completion_cache.lookup('fit_analysis', request('Python')), 'Python fit')
+        self.assertIsNone(completion_cache.lookup('fit_analysis', request('Java')))
+        completion_cache.clear()
+
+    @override_settings(AI_COMPLETION_CACHE_TTLS={'fit_analysis': 60})
+    @patch('time.time')
+    def test_entries_expire_after_feature_ttl(self, mock_time):
+        """
+        This test checks that an entry is dropped once its feature's TTL has passed.
+        """
+        mock_time.return_value = 1000.0
+        completion_cache.store('fit_analysis', request('Python'), 'Great fit')
+
+        mock_time.return_value = 1059.0
+        self.assertEqual(completion_cache.lookup('fit_analysis', request('Python')), 'Great fit')
+        mock_time.return_value = 1061.0
+        self.assertIsNone(completion_cache.lookup('fit_analysis', request('Python')))
+
+    @override_settings(AI_COMPLETION_CACHE_TTLS={'rejection_reasons': 0})
+    def test_zero_ttl_disables_a_feature(self):
+        """
+        This test checks that a feature with a TTL of 0 is never cached.
+        """
+        completion_cache.store('rejection_reasons', request('Python'), 'Too junior')
+
+        self.assertIsNone(completion_cache.lookup('rejection_reasons', request('Python')))
+
+    @override_settings(AI_COMPLETION_CACHE_ENABLED=False)
+    def test_opt_out_setting_bypasses_cache(self):
+        """
+        This test checks that disabling the cache calls OpenAI every time.
+        """
+        with patch('home.http_client.get_openai_client') as mock_client:
+            mock_client.return_value.chat.completions.create.return_value = completion('Fit')
+            for _ in range(2):
+                completion_cache.create_completion('fit_analysis', 'sk-test', request('Python'))
+
+        self.assertEqual(mock_client.return_value.chat.completions.create.call_count, 2)
+        self.assertIsNone(caches['ai_completions'].get(
+            completion_cache.completion_key(request('Python'))))
+
+    def test_use_cache_false_bypasses_cache(self):
+        """
+        This test checks the per-call opt-out.
+        """
+        with patch('home.http_client.get_openai_client') as mock_client:
+            mock_client.return_value.chat.completions.create.return_value = completion('Fit')
+            for _ in range(2):
+                completion_cache.create_completion('fit_analysis', 'sk-test', request('Python'),
+                                                   use_cache=False)
+
+        self.assertEqual(mock_client.return_value.chat.completions.create.call_count, 2)
+
+    @patch('home.http_client.get_openai_api_key', return_value='sk-test')
+    def test_repeat_fit_analysis_and_rejection_reasons_hit_cache(self, _api_key):
+        """
+        This test checks that repeating the same analysis does not call OpenAI again.
+        """
+        with patch('home.http_client.get_openai_client') as mock_client:
+            create = mock_client.return_value.chat.completions.create
+            create.side_effect = [completion('Great fit'), completion('Too junior')]
+            for _ in range(2):
+                fit = get_job_fit_analysis('Engineer', 'Python', resume_text='Resume')
+                reasons = generate_rejection_reasons('Engineer', 'Python', resume_text='Resume')
+
+        self.assertEqual(fit, 'Great fit')
+        self.assertEqual(reasons, 'Too junior')
+        self.assertEqual(create.call_count, 2)
+
+    @patch('home.http_client.get_openai_api_key', return_value='sk-test')
+    def test_failed_completion_is_not_cached(self, _api_key):
+        """
+        This test checks that errors are retried on the next call instead of memoized.
+        """
+        with patch('home.http_client.get_openai_client') as mock_client:
+            create = mock_client.return_value.chat.completions.create
+            create.side_effect = [RuntimeError('boom'), completion('Great fit')]
+            get_job_fit_analysis('Engineer', 'Python', resume_text='Resume')
+            fit = get_job_fit_analysis('Engineer', 'Python', resume_text='Resume')
+
+        self.assertEqual(fit, 'Great fit')
+        self.assertEqual(create.call_count, 2)
+
+    @patch('home.interview_service.http_client.get_openai_api_key', return_value='sk-test')
+    @patch('home.interview_service.http_client.post')
+    def test_interview_questions_shared_between_sync_and_async(self, mock_post, _api_key):
+        """
+        This test checks that questions generated once are reused by both code paths.
+        """
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {
+            'choices': [{'message': {'content': '["Q1?", "Q2?"]'}}]
+        }
+
+        first = InterviewService.generate_interview_questions('Python developer', 2) ## pylint: disable=no-member
+        second = InterviewService.generate_interview_questions('Python developer', 2) ## pylint: disable=no-member
+        with patch('home.http_client.get_async_openai_client') as mock_async_client:
+            third = async_to_sync(InterviewService.agenerate_interview_questions)( ## pylint: disable=no-member
+                'Python developer', 2)
+
+        self.assertEqual(first, ['Q1?', 'Q2?'])
+        self.assertEqual(second, first)
+        self.assertEqual(third, first)
+        mock_post.assert_called_once()
+        mock_async_client.assert_not_called()
+
+    @patch('home.completion_cache.store', side_effect=AssertionError('blocking write'))
+    @patch('home.completion_cache.lookup', side_effect=AssertionError('blocking read'))
+    def test_async_completion_keeps_cache_io_off_the_event_loop(self, _lookup, _store):
+        """
+        This test checks that the async path memoizes through the cache's aget/aset
+        instead of the blocking lookup/store.
+        """
+        with patch('home.http_client.get_async_openai_client') as mock_client:
+            create = mock_client.return_value.chat.completions.create
+            create.side_effect = AsyncMock(return_value=completion('Great fit'))
+            for _ in range(2):
+                content = async_to_sync(completion_cache.acreate_completion)(
+                    'fit_analysis', 'sk-test', request('Python'))
+
+        self.assertEqual(content, 'Great fit')
+        self.assertEqual(create.call_count, 1)
@@ -0,0 +1,136 @@
+"""
+This file contains the tests for the SQLite connection tuning.
+"""
+
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from home import db # pylint: disable=import-error,no-name-in-module
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    """
+    This class contains the tests for the pragmas applied to new connections.
+    """
+    def test_settings_override_and_skip_pragmas(self):
+        """
+        This test checks that SQLITE_PRAGMAS overrides a default and None drops one.
+        """
+        with override_settings(SQLITE_PRAGMAS={'synchronous': 'full', 'mmap_size': None}):
+            pragmas = db.get_pragmas()
+
+        self.assertEqual(pragmas['synchronous'], 'full')
+        self.assertNotIn('mmap_size', pragmas)
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+
+    def test_file_database_uses_wal(self):
+        """
+        This test checks the effect of the pragmas on a file-backed database.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            raw = sqlite3.connect(os.path.join(directory, 'db.sqlite3'))
+            db.apply_pragmas(raw.cursor(), db.get_pragmas())
+
+            self.assertEqual(raw.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(raw.execute('PRAGMA synchronous').fetchone()[0], 1)
+            raw.close()
+
+    def test_other_vendors_are_left_alone(self):
+        """
+        This test checks that the hook only touches SQLite connections.
+        """
+        other = MagicMock(vendor='postgresql')
+
+        db.configure_sqlite_connection(sender=None, connection=other)
+
+        other.cursor.assert_not_called()
+
+    def test_benchmark_command_reports_both_modes(self):
+        """
+        This test checks that the benchmark runs and reports before and after numbers.
+        """
+        out = StringIO()
+
+        call_command('benchmark_sqlite', seconds=0.2, writers=1, readers=1, rows=10, stdout=out)
+
+        self.assertIn('default:', out.getvalue())
+        self.assertIn('tuned:', out.getvalue())
+        self.assertIn('tuned-asgi:', out.getvalue())
+
+
+class SQLiteConnectionTests(TestCase):
+    """
+    This class contains the tests for the tuning of Django's own connection.
+    """
+    def test_connection_created_applies_pragmas(self):
+        """
+        This test checks that the connection_created hook ran on the test database.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0],
+                             connection.settings_dict['OPTIONS']['timeout'] * 1000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -20000)
+
+
+class TransactionModeTests(TransactionTestCase):
+    """
+    This class contains the tests for the transaction mode of home.sqlite_backend.
+    """
+    def record(self, block):
+        """
+        This method returns the statements run inside an atomic block.
+        """
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            with block:
+                connection.cursor().execute('SELECT 1')
+        return statements
+
+    def test_atomic_blocks_begin_deferred(self):
+        """
+        This test checks that a plain atomic block does not take the write lock at BEGIN.
+        """
+        self.assertEqual(self.record(transaction.atomic())[0], 'BEGIN')
+        self.assertNotIn('transaction_mode', connection.get_connection_params())
+
+    def test_immediate_atomic_takes_the_write_lock_once(self):
+        """
+        This test checks that immediate_atomic begins IMMEDIATE, only for its own
+        block, and does nothing extra when nested in a transaction.
+        """
+        self.assertEqual(self.record(db.immediate_atomic())[0], 'BEGIN IMMEDIATE')
+        self.assertEqual(self.record(transaction.atomic())[0], 'BEGIN')
+
+        with transaction.atomic():
+            statements = self.record(db.immediate_atomic())
+        self.assertFalse([sql for sql in statements if sql.startswith('BEGIN')])
+        self.assertIsNone(connection.next_transaction_mode)
+
+    def test_transaction_mode_option(self):
+        """
+        This test checks the backported OPTIONS['transaction_mode'].
+        """
+        options = connection.settings_dict['OPTIONS']
+        self.addCleanup(options.pop, 'transaction_mode', None)
+        options['transaction_mode'] = 'exclusive'
+
+        self.assertEqual(self.record(transaction.atomic())[0], 'BEGIN EXCLUSIVE')
+        self.assertNotIn('transaction_mode', connection.get_connection_params())
+
+        options['transaction_mode'] = 'sometimes'
+        with self.assertRaises(ValueError):
+            connection.transaction_mode # pylint: disable=pointless-statement
@@ -0,0 +1,139 @@
+"""
+This file contains the tests for the shared outbound HTTP clients.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from home import http_client # pylint: disable=import-error,no-name-in-module
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answers 503 for the first request it sees and 200 afterwards.
+    """
+    protocol_version = 'HTTP/1.1'
+    hits = []
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """
+        This method answers a GET request.
+        """
+        FlakyHandler.hits.append(self.client_address[1])
+        status = 503 if len(FlakyHandler.hits) == 1 else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        """
+        This method silences the request log.
+        """
+
+
+class HttpClientTests(SimpleTestCase):
+    """
+    This class contains the tests for the http_client module.
+    """
+    def setUp(self):
+        http_client.reset_clients()
+
+    def tearDown(self):
+        http_client.reset_clients()
+
+    def test_session_is_shared_per_host(self):
+        """
+        This test checks that URLs on the same host reuse one pooled session.
+        """
+        first = http_client.get_session("https://api.openai.com/v1/chat/completions")
+        second = http_client.get_session("https://api.openai.com/v1/embeddings")
+        other = http_client.get_session("https://jobicy.com/api/v2/remote-jobs")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    @override_settings(OUTBOUND_POOL_MAXSIZE=4, OUTBOUND_MAX_RETRIES=2)
+    def test_session_adapter_is_bounded_and_retries(self):
+        """
+        This test checks the pool bound and retry policy of a session.
+        """
+        adapter = http_client.get_session("https://jobicy.com").get_adapter("https://jobicy.com")
+
+        self.assertEqual(adapter._pool_maxsize, 4) # pylint: disable=protected-access
+        self.assertTrue(adapter._pool_block) # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertGreater(adapter.max_retries.backoff_jitter, 0)
+        self.assertIsNone(adapter.max_retries.allowed_methods)
+
+    @override_settings(OUTBOUND_TIMEOUTS={'jobicy': 3})
+    def test_get_timeout_uses_settings_override(self):
+        """
+        This test checks per-endpoint timeouts and their fallback.
+        """
+        self.assertEqual(http_client.get_timeout('jobicy'), 3)
+        self.assertEqual(http_client.get_timeout('openai.cover_letter'), 30.0)
+        self.assertEqual(http_client.get_timeout('unknown'), 60.0)
+
+    def test_request_applies_endpoint_timeout(self):
+        """
+        This test checks that a request gets its endpoint's timeout by default.
+        """
+        with patch('requests.Session.request') as mock_request:
+            http_client.post("https://api.openai.com/v1/chat/completions",
+                             endpoint='openai.interview', json={})
+            http_client.get("https://jobicy.com/api", endpoint='jobicy', timeout=1)
+
+        self.assertEqual(mock_request.call_args_list[0].kwargs['timeout'], 10.0)
+        self.assertEqual(mock_request.call_args_list[1].kwargs['timeout'], 1)
+
+    @override_settings(OUTBOUND_BACKOFF_FACTOR=0, OUTBOUND_BACKOFF_JITTER=0)
+    def test_retries_5xx_over_a_kept_alive_connection(self):
+        """
+        This test checks that a 503 is retried and the connection is reused.
+        """
+        FlakyHandler.hits = []
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/jobs"
+
+        try:
+            first = http_client.get(url, endpoint='jobicy')
+            second = http_client.get(url, endpoint='jobicy')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(FlakyHandler.hits), 3)
+        self.assertEqual(len(set(FlakyHandler.hits[1:])), 1)
+
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'sk-shared'})
+    def test_openai_client_is_shared_and_configured(self):
+        """
+        This test checks that the SDK client is built once per key.
+        """
+        client = http_client.get_openai_client()
+
+        self.assertIs(client, http_client.get_openai_client('sk-shared'))
+        self.assertIsNot(client, http_client.get_openai_client('sk-other'))
+        self.assertEqual(client.api_key, 'sk-shared')
+        self.assertEqual(client.max_retries, http_client.DEFAULT_MAX_RETRIES)
+        self.assertEqual(client.timeout, 60.0)
+
+    @patch.dict('os.environ', {}, clear=True)
+    @override_settings(OPENAI_API_KEY='sk-from-settings')
+    def test_get_openai_api_key_falls_back_to_settings(self):
+        """
+        This test checks the settings fallback for the API key.
+        """
+        self.assertEqual(http_client.get_openai_api_key(), 'sk-from-settings')
@@ -162,7 +162,7 @@ class InterviewServiceTests(TestCase):
         """
         self.assertIsNone(InterviewService.get_api_key()) ## pylint: disable=no-member
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_generate_questions_success_json(self, mock_post):
         """
@@ -180,7 +180,7 @@ class InterviewServiceTests(TestCase):
         self.assertEqual(questions, ["Mock Question 1?",
                                      "Mock Question 2!", "Tell me about Mock 3."])
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_generate_questions_success_text(self, mock_post):
         """
@@ -198,7 +198,7 @@ class InterviewServiceTests(TestCase):
         self.assertEqual(len(questions), 5)
         self.assertEqual(questions, GENERIC_QUESTIONS)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {}, clear=True)
     def test_generate_questions_no_api_key(self, mock_post):
         """
@@ -208,7 +208,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_not_called()
         self.assertEqual(questions, GENERIC_QUESTIONS)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_generate_questions_api_http_error(self, mock_post):
         """
@@ -224,7 +224,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(questions, GENERIC_QUESTIONS)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_generate_questions_api_request_exception(self, mock_post):
         """
@@ -236,7 +236,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(questions, GENERIC_QUESTIONS)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_generate_questions_json_decode_error(self, mock_post):
         """
@@ -253,7 +253,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(questions, GENERIC_QUESTIONS)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_success(self, mock_post):
         """
@@ -269,7 +269,7 @@ class InterviewServiceTests(TestCase):
         expected_feedback = json.loads(MOCK_EVAL_RESPONSE_JSON['choices'][0]['message']['content'])
         self.assertEqual(feedback, expected_feedback)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {}, clear=True) # No API key
     def test_evaluate_response_no_api_key(self, mock_post):
         """
@@ -279,7 +279,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_not_called()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_api_http_error(self, mock_post):
         """
@@ -295,7 +295,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_api_request_exception(self, mock_post):
         """
@@ -307,7 +307,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_malformed_json(self, mock_post):
         """
@@ -322,7 +322,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_missing_keys(self, mock_post):
         """
@@ -337,7 +337,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_non_numeric_score(self, mock_post):
         """
@@ -362,7 +362,7 @@ class InterviewServiceTests(TestCase):
         self.assertEqual(feedback['score'], 7) # Should default to 7
         self.assertEqual(feedback['suggestions'], "Test")
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_json_decode_error(self, mock_post):
         """
@@ -380,7 +380,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_no_json_object_found(self, mock_post):
         """
@@ -401,7 +401,7 @@ class InterviewServiceTests(TestCase):
         mock_post.assert_called_once()
         self.assertEqual(feedback, GENERIC_FEEDBACK)
 
-    @patch('home.interview_service.requests.post')
+    @patch('home.interview_service.http_client.post')
     @patch.dict(os.environ, {"OPENAI_API_KEY": "fake_key"})
     def test_evaluate_response_score_clamping(self, mock_post):
         """Test score clamping between 1 and 10."""
@@ -0,0 +1,66 @@
+"""
+This file contains the tests for the list projection of job listings.
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from home.models import JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
+from home.serializers import serialize_listing # pylint: disable=import-error,no-name-in-module
+
+
+class ListProjectionTests(TestCase):
+    """
+    This class contains the tests for JobListing.objects.for_list() and its serializer.
+    """
+    def setUp(self):
+        self.job = JobListing.objects.create( # pylint: disable=no-member
+            job_id='listed', title='Data Engineer', company='Acme',
+            description='<p>' + 'Pipelines and warehouses. ' * 100 + '</p>',
+            salary_min=100000, salary_currency='USD', published_at=timezone.now())
+
+    def test_serializer_reads_only_projected_fields(self):
+        """
+        This test checks that serializing a projected listing needs no further query.
+        """
+        job = JobListing.objects.for_list().get(pk=self.job.pk) # pylint: disable=no-member
+
+        with self.assertNumQueries(0):
+            data = serialize_listing(job)
+
+        self.assertEqual(data['title'], 'Data Engineer')
+        self.assertEqual(data['salary'], 'From 100,000 USD')
+        self.assertNotIn('description', data)
+        self.assertTrue(job.description_preview.startswith('<p>Pipelines'))
+
+    def test_applications_page_skips_descriptions(self):
+        """
+        This test checks that the applications page renders previews without loading
+        the full description of each job.
+        """
+        user = User.objects.create_user(username='lister', password='StrongTestPass123')
+        UserJobInteraction.objects.create(user=user, job=self.job, interaction_type='viewed') # pylint: disable=no-member
+        self.client.login(username='lister', password='StrongTestPass123')
+
+        response = self.client.get(reverse('applications'))
+
+        job = response.context['viewed_jobs_list'][0]
+        self.assertIn('description', job.get_deferred_fields())
+        self.assertContains(response, 'Pipelines and warehouses.')
+
+    def test_benchmark_command_reports_each_page(self):
+        """
+        This test checks that the benchmark runs and leaves the database unchanged.
+        """
+        out = StringIO()
+
+        call_command('benchmark_list_queries', rows=5, page_size=2, stdout=out)
+
+        for label in ('result page', 'applications', 'json page'):
+            self.assertIn(label, out.getvalue())
+        self.assertEqual(JobListing.objects.count(), 1) # pylint: disable=no-member
@@ -0,0 +1,94 @@
+"""
+This file contains the tests for the project's middleware.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from home.middleware import AsyncWhiteNoiseMiddleware # pylint: disable=import-error,no-name-in-module
+
+
+class AsgiMiddlewareChainTests(SimpleTestCase):
+    """
+    This class contains the tests for running the middleware chain under ASGI.
+    """
+    @override_settings(DEBUG=True)
+    def test_asgi_chain_is_not_adapted_to_sync(self):
+        """
+        This test checks that no middleware makes Django drive the async views
+        through async_to_sync (it logs each adaptation while DEBUG is on).
+        """
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('loading middleware')
+            ASGIHandler()
+
+        self.assertFalse([line for line in logs.output if 'adapted' in line], logs.output)
+
+
+class AsyncWhiteNoiseMiddlewareTests(SimpleTestCase):
+    """
+    This class contains the tests for serving static files natively under ASGI.
+    """
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        with open(os.path.join(self.static_root, 'app.css'), 'w', encoding='utf-8') as file:
+            file.write('body { color: black; }\n' * 1000)
+
+    def middleware(self, get_response):
+        """
+        This method builds the middleware around a view, serving the temporary files.
+        """
+        middleware = AsyncWhiteNoiseMiddleware(get_response)
+        middleware.add_files(self.static_root, prefix='/static/')
+        return middleware
+
+    def test_async_static_file_streams_asynchronously(self):
+        """
+        This test checks that a static file is served as an async stream of the
+        whole file without reaching the view.
+        """
+        async def view(request): # pylint: disable=unused-argument
+            raise AssertionError('the view should not be called')
+
+        async def fetch():
+            response = await self.middleware(view)(RequestFactory().get('/static/app.css'))
+            content = b''.join([chunk async for chunk in response])
+            response.close()
+            return response, content
+
+        response, content = async_to_sync(fetch)()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(content, b'body { color: black; }\n' * 1000)
+        self.assertEqual(response['Content-Length'], str(len(content)))
+
+    def test_async_other_paths_reach_the_view(self):
+        """
+        This test checks that requests for other paths are passed on.
+        """
+        async def view(request): # pylint: disable=unused-argument
+            return HttpResponse('page')
+
+        response = async_to_sync(self.middleware(view))(RequestFactory().get('/dashboard/'))
+
+        self.assertEqual(response.content, b'page')
+
+    def test_sync_mode_is_unchanged(self):
+        """
+        This test checks that under WSGI the middleware serves files synchronously.
+        """
+        response = self.middleware(lambda request: HttpResponse('page'))(
+            RequestFactory().get('/static/app.css'))
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response), b'body { color: black; }\n' * 1000)
+        response.close()
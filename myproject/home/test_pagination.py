@@ -0,0 +1,173 @@
+"""
+This file contains the tests for the keyset pagination of job search results.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from home import pagination # pylint: disable=import-error,no-name-in-module
+from home.models import DESCRIPTION_PREVIEW_LENGTH, JobListing # pylint: disable=import-error,no-name-in-module
+
+
+def make_jobs(count, with_undated=0):
+    """
+    This function creates `count` dated listings, newest first, and `with_undated`
+    listings without a publication date.
+    """
+    now = timezone.now()
+    jobs = [JobListing.objects.create(job_id=f'job-{i}', title=f'Job {i}', company='Acme', # pylint: disable=no-member
+                                      description=f'<p>Description of job {i}</p>' * 50,
+                                      published_at=now - timedelta(hours=i))
+            for i in range(count)]
+    jobs += [JobListing.objects.create(job_id=f'undated-{i}', title=f'Undated {i}', # pylint: disable=no-member
+                                       company='Acme')
+             for i in range(with_undated)]
+    return jobs
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    This class contains the tests for the cursor-based result pages.
+    """
+    def test_pages_cover_results_once_in_order(self):
+        """
+        This test walks every page and checks order, coverage and the last cursor.
+        """
+        jobs = make_jobs(5, with_undated=2)
+        # two listings published at the same instant are ordered by id
+        JobListing.objects.filter(pk=jobs[3].pk).update(published_at=jobs[2].published_at) # pylint: disable=no-member
+
+        seen, cursor = [], None
+        for _ in range(4):
+            page = pagination.paginate_results(jobs, cursor, page_size=2)
+            seen += [job.job_id for job in page.jobs]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, ['job-0', 'job-1', 'job-3', 'job-2', 'job-4',
+                                'undated-1', 'undated-0'])
+        self.assertIsNone(cursor)
+
+    def test_page_defers_description(self):
+        """
+        This test checks that a page loads a bounded preview instead of the description.
+        """
+        jobs = make_jobs(3)
+
+        page = pagination.paginate_results(jobs, page_size=2)
+
+        self.assertIn('description', page.jobs[0].get_deferred_fields())
+        self.assertEqual(len(page.jobs[0].description_preview), DESCRIPTION_PREVIEW_LENGTH)
+        with CaptureQueriesContext(connection) as queries:
+            pagination.paginate_results(jobs, page.next_cursor, page_size=2)
+        self.assertEqual(len(queries), 1)
+
+    def test_malformed_cursor_starts_over(self):
+        """
+        This test checks that a tampered cursor is treated as the first page.
+        """
+        self.assertIsNone(pagination.decode_cursor('not-a-cursor'))
+        self.assertIsNone(pagination.decode_cursor('!!'))
+        job = make_jobs(1)[0]
+        published_at, pk = pagination.decode_cursor(pagination.encode_cursor(job))
+        self.assertEqual((published_at, pk), (job.published_at, job.pk))
+
+    def test_search_snippets_carry_over(self):
+        """
+        This test checks that highlighted search snippets survive the re-query.
+        """
+        job = make_jobs(1)[0]
+        job.search_snippet = 'a <mark>match</mark>'
+
+        page = pagination.paginate_results([job])
+
+        self.assertEqual(page.jobs[0].search_snippet, 'a <mark>match</mark>')
+
+
+    def test_ranked_results_keep_their_order(self):
+        """
+        This test checks that ranked search results are paged best match first,
+        not newest first, and that the offset cursor walks the whole ranking.
+        """
+        jobs = make_jobs(5)
+        ranked = [jobs[3], jobs[0], jobs[4], jobs[1], jobs[2]]
+        for job in ranked:
+            job.search_snippet = f'snippet {job.job_id}'
+
+        page = pagination.paginate_results(ranked, page_size=2)
+
+        self.assertEqual([job.job_id for job in page.jobs], ['job-3', 'job-0'])
+        self.assertEqual(page.jobs[0].search_snippet, 'snippet job-3')
+        self.assertIn('description', page.jobs[0].get_deferred_fields())
+
+        seen = [job.job_id for job in page.jobs]
+        while page.next_cursor:
+            page = pagination.paginate_results(ranked, page.next_cursor, page_size=2)
+            seen += [job.job_id for job in page.jobs]
+        self.assertEqual(seen, ['job-3', 'job-0', 'job-4', 'job-1', 'job-2'])
+        self.assertEqual(pagination.decode_offset_cursor('not-a-cursor'), 0)
+
+
+@override_settings(JOB_RESULTS_PAGE_SIZE=2)
+class ResultPageEndpointTests(TestCase):
+    """
+    This class contains the tests for the infinite scroll and description endpoints.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='StrongTestPass123')
+        self.client.login(username='pager', password='StrongTestPass123')
+        self.jobs = make_jobs(3)
+
+    @patch('home.services.JobicyService.search_jobs')
+    def test_dashboard_renders_first_page_and_scrolls(self, mock_search):
+        """
+        This test checks the first page on the dashboard and the next page as JSON.
+        """
+        mock_search.return_value = self.jobs
+        response = self.client.post(reverse('dashboard'), {'search_term': 'job'})
+
+        self.assertEqual(len(response.context['job_list']), 2)
+        self.assertNotContains(response, 'Description of job 0</p>')
+        cursor = response.context['next_cursor']
+
+        response = self.client.get(reverse('dashboard_results'), {'cursor': cursor})
+
+        self.assertEqual(response.json()['count'], 1)
+        self.assertIn('Job 2', response.json()['html'])
+        self.assertIsNone(response.json()['next_cursor'])
+        mock_search.assert_called_with('job', {})
+
+    @patch('jobs.views.JobicyService.search_jobs_many')
+    def test_recommendations_scroll_reuses_search_term(self, mock_search):
+        """
+        This test checks that further recommendation pages reuse the stored term.
+        """
+        mock_search.return_value = self.jobs
+        session = self.client.session
+        session['recommendation_search_term'] = 'python developer'
+        session.save()
+
+        response = self.client.get(reverse('recommendations_results'))
+
+        self.assertEqual(response.json()['count'], 2)
+        mock_search.assert_called_once_with([('python developer', {})])
+
+    def test_description_is_loaded_on_expand(self):
+        """
+        This test checks that the full description is returned as plain text.
+        """
+        response = self.client.get(reverse('job_description', args=['job-0']))
+
+        description = response.json()['description']
+        self.assertTrue(description.startswith('Description of job 0\nDescription'))
+        self.assertNotIn('<p>', description)
+        self.assertEqual(self.client.get(reverse('job_description',
+                                                 args=['missing'])).status_code, 404)
@@ -0,0 +1,296 @@
+"""
+This file contains the tests for the local full-text search over job listings.
+"""
+
+import importlib
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from home import search # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing # pylint: disable=import-error,no-name-in-module
+from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
+
+
+def make_job(job_id, title, description='', **fields):
+    """
+    This function creates a job listing with sensible defaults.
+    """
+    return JobListing.objects.create(job_id=job_id, title=title, # pylint: disable=no-member
+                                     company=fields.pop('company', 'Acme'),
+                                     description=description, **fields)
+
+
+class SQLiteSearchBackendTests(TestCase):
+    """
+    This class contains the tests for the SQLite FTS5 fallback.
+    """
+    def test_backend_follows_database_vendor(self):
+        """
+        This test checks that the backend is chosen from the database engine.
+        """
+        self.assertIsInstance(search.get_search_backend(), search.SQLiteSearchBackend)
+        self.assertIsInstance(search.get_search_backend('postgresql'),
+                              search.PostgresSearchBackend)
+        with self.assertRaises(NotImplementedError):
+            search.get_search_backend('oracle')
+
+    def test_search_module_matches_the_index_migration(self):
+        """
+        This test checks that the live search schema and vector still match what
+        migration 0016 created. Changing them needs a new migration, which this
+        test should then point at.
+        """
+        migration = importlib.import_module('home.migrations.0016_joblisting_search_index')
+
+        self.assertEqual(search.SQLITE_FTS_SCHEMA, migration.SQLITE_FTS_SCHEMA)
+        self.assertEqual(search.FTS_TABLE, migration.FTS_TABLE)
+        self.assertEqual(search.search_vector(), migration.search_vector())
+
+    def test_title_matches_rank_above_description_matches(self):
+        """
+        This test checks ranked results and prefix matching.
+        """
+        make_job('1', 'Office Manager', 'Some python scripting is a plus.')
+        make_job('2', 'Senior Python Developer', 'Build Python services with Python.')
+        make_job('3', 'Accountant', 'Spreadsheets.')
+
+        results = search.search_listings('pyth')
+
+        self.assertEqual([job.job_id for job in results], ['2', '1'])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_index_follows_updates_deletes_and_bulk_ingest(self):
+        """
+        This test checks that the triggers keep the index in sync with the table.
+        """
+        job = make_job('1', 'Python Developer')
+        JobListing.objects.bulk_create([JobListing(job_id='2', title='Go Developer', # pylint: disable=no-member
+                                                   company='Acme')])
+
+        job.title = 'Rust Developer'
+        job.save()
+        self.assertEqual(search.search_listings('python'), [])
+        self.assertEqual([j.job_id for j in search.search_listings('rust')], ['1'])
+        self.assertEqual([j.job_id for j in search.search_listings('go')], ['2'])
+
+        JobListing.objects.filter(job_id='2').delete() # pylint: disable=no-member
+        self.assertEqual(search.search_listings('go'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """
+        This test checks that FTS5 operators in user input are treated as text.
+        """
+        make_job('1', 'C++ Engineer', company='NEAR Labs')
+
+        self.assertEqual([j.job_id for j in search.search_listings('c++ (near')], ['1'])
+        self.assertEqual([j.job_id for j in search.search_listings('"*', location='x')], [])
+
+    def test_post_migrate_restores_dropped_triggers(self):
+        """
+        This test checks that triggers dropped by a table rebuild are recreated.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.FTS_TABLE}_ai')
+
+        search.ensure_search_index(sender=None)
+        make_job('1', 'Python Developer')
+
+        self.assertEqual(len(search.search_listings('python')), 1)
+
+    def test_location_and_industry_filters(self):
+        """
+        This test checks keyword search combined with location and industry filters,
+        and filter-only queries ordered newest first.
+        """
+        now = timezone.now()
+        make_job('1', 'Python Developer', location='USA', industry='Software',
+                 published_at=now - timedelta(days=2))
+        make_job('2', 'Python Developer', location='Germany', industry='Software',
+                 published_at=now - timedelta(days=1))
+        make_job('3', 'Python Analyst', location='USA', industry='Finance', published_at=now)
+
+        self.assertEqual([j.job_id for j in search.search_listings('python', location='usa',
+                                                                   industry='soft')], ['1'])
+        self.assertEqual([j.job_id for j in search.search_listings('', location='usa')],
+                         ['3', '1'])
+        self.assertEqual(search.search_listings('python', location='100%'), [])
+
+    def test_snippet_highlights_matches_in_plain_text(self):
+        """
+        This test checks that snippets drop the description HTML and mark the matches.
+        """
+        make_job('1', 'Engineer', '<p>We build <b>Django</b> apps &amp; APIs.</p>')
+
+        snippet = search.search_listings('django')[0].search_snippet
+
+        self.assertEqual(snippet, 'We build <mark>Django</mark> apps &amp; APIs.')
+
+    def test_render_snippet_escapes_and_trims_partial_tags(self):
+        """
+        This test checks snippets cut in the middle of a tag or containing markup.
+        """
+        raw = 'ss="x">Use \x02Python\x03 &lt;script&gt; <a hre'
+
+        self.assertEqual(search.render_snippet(raw),
+                         'Use <mark>Python</mark> &lt;script&gt;')
+
+
+@override_settings(JOBICY_LOCAL_MIN_RESULTS=2)
+class LocalSearchModeTests(TestCase):
+    """
+    This class contains the tests for answering dashboard searches from the local index.
+    """
+    def setUp(self):
+        make_job('1', 'Python Developer', location='USA')
+        make_job('2', 'Senior Python Engineer', location='USA')
+
+    @patch('home.services.JobicyService.fetch_and_cache_jobs')
+    def test_search_jobs_answers_locally(self, mock_fetch):
+        """
+        This test checks that enough local matches means no API call.
+        """
+        jobs = JobicyService.search_jobs('python', {'geo': 'usa'})
+
+        self.assertEqual({job.job_id for job in jobs}, {'1', '2'})
+        mock_fetch.assert_not_called()
+
+    @patch('home.services.JobicyService.fetch_and_cache_jobs', return_value=[])
+    def test_search_jobs_falls_through_when_recall_is_low(self, mock_fetch):
+        """
+        This test checks that too few local matches sends the query to the API.
+        """
+        JobicyService.search_jobs('rust', {'geo': 'usa'})
+
+        mock_fetch.assert_called_once_with('rust', {'geo': 'usa'})
+
+    @override_settings(JOBICY_LOCAL_SEARCH=False)
+    @patch('home.services.JobicyService.fetch_and_cache_jobs', return_value=[])
+    def test_local_search_can_be_disabled(self, mock_fetch):
+        """
+        This test checks that JOBICY_LOCAL_SEARCH=False always asks the API.
+        """
+        JobicyService.search_jobs('python')
+
+        mock_fetch.assert_called_once_with('python', None)
+
+
+class NormalizedFieldTests(TestCase):
+    """
+    This class contains the tests for the cleaned job type, industry and level fields.
+    """
+    def test_ingest_cleans_list_encoded_fields(self):
+        """
+        This test checks that Jobicy lists and HTML entities are stored as plain text
+        with lowercase filter keys.
+        """
+        result = JobicyService.ingest_jobs([{
+            'id': 1, 'jobTitle': 'Analyst', 'companyName': 'Acme', 'jobType': ['full-time'],
+            'jobIndustry': ['Finance &amp; Accounting', 'Software'], 'jobLevel': 'Senior',
+        }])
+        job = JobListing.objects.get(pk=result.jobs[0].pk) # pylint: disable=no-member
+
+        self.assertEqual((job.job_type, job.industry, job.job_level),
+                         ('full-time', 'Finance & Accounting, Software', 'Senior'))
+        self.assertEqual((job.job_type_normalized, job.industry_normalized),
+                         ('full-time', 'finance & accounting, software'))
+        self.assertEqual(JobicyService.ingest_jobs([{
+            'id': 1, 'jobTitle': 'Analyst', 'companyName': 'Acme', 'jobType': ['full-time'],
+            'jobIndustry': ['Finance &amp; Accounting', 'Software'], 'jobLevel': 'Senior',
+        }]).unchanged, 1)
+
+    def test_save_cleans_stored_strings(self):
+        """
+        This test checks that a stringified list saved directly is cleaned too.
+        """
+        job = make_job('1', 'Analyst', job_type="['part-time']", industry='["Sales"]')
+
+        job.refresh_from_db()
+        self.assertEqual((job.job_type, job.industry, job.industry_normalized),
+                         ('part-time', 'Sales', 'sales'))
+
+    def test_filters_use_normalized_index(self):
+        """
+        This test checks that industry and job type filters are index range lookups.
+        """
+        make_job('1', 'Analyst', industry='Finance', job_type='full-time')
+        make_job('2', 'Developer', industry='Software', job_type='contract')
+
+        filtered = JobListing.objects.filter_normalized(industry=' FIN ') # pylint: disable=no-member
+        self.assertEqual([job.job_id for job in filtered], ['1'])
+        self.assertRegex(filtered.explain(), r'(?i)index.*industry_normalized')
+        self.assertEqual([j.job_id for j in search.search_listings('', job_type='contract')],
+                         ['2'])
+        self.assertEqual([j.job_id for j in search.search_listings('developer',
+                                                                   job_type='full')], [])
+
+    def test_data_migration_cleans_existing_rows(self):
+        """
+        This test checks that the data migration rewrites rows stored before the
+        fields were cleaned at ingest.
+        """
+        job = make_job('1', 'Analyst')
+        JobListing.objects.filter(pk=job.pk).update( # pylint: disable=no-member
+            job_type="['full-time']", industry="['Marketing &amp; Sales']",
+            industry_normalized='', industry_label='')
+        migration = importlib.import_module('home.migrations.0019_joblisting_normalized_fields')
+
+        migration.normalize_listings(django_apps, None)
+
+        job.refresh_from_db()
+        self.assertEqual((job.job_type, job.industry, job.industry_normalized,
+                          job.industry_label),
+                         ('full-time', 'Marketing & Sales', 'marketing & sales',
+                          'Marketing & Sales'))
+
+    def test_data_migration_reverse_restores_list_encoding(self):
+        """
+        This test checks that unapplying the data migration stores the fields as
+        stringified lists again, which the older code still labels the same way.
+        """
+        job = make_job('1', 'Analyst')
+        JobListing.objects.filter(pk=job.pk).update( # pylint: disable=no-member
+            job_type="['full-time']", industry="['Marketing &amp; Sales', 'Design']")
+        migration = importlib.import_module('home.migrations.0019_joblisting_normalized_fields')
+
+        migration.normalize_listings(django_apps, None)
+        migration.restore_list_encoding(django_apps, None)
+
+        job.refresh_from_db()
+        self.assertEqual((job.job_type, job.industry, job.job_level),
+                         ("['full-time']", "['Marketing & Sales', 'Design']", None))
+        self.assertEqual(migration.format_label(job.industry), 'Marketing & Sales')
+
+    def test_label_migration_fills_labels_in_batches(self):
+        """
+        This test checks that the label migration fills every listing when they span
+        several batches.
+        """
+        jobs = [make_job(str(number), 'Analyst') for number in range(3)]
+        JobListing.objects.update(job_type="['full-time']", job_type_label='') # pylint: disable=no-member
+        migration = importlib.import_module('home.migrations.0018_joblisting_labels')
+
+        with patch.object(migration, 'BATCH_SIZE', 2):
+            migration.populate_labels(django_apps, None)
+
+        self.assertEqual([JobListing.objects.get(pk=job.pk).job_type_label for job in jobs], # pylint: disable=no-member
+                         ['Full Time'] * 3)
+
+    @override_settings(JOBICY_LOCAL_MIN_RESULTS=1)
+    @patch('home.services.JobicyService.fetch_and_cache_jobs', return_value=[])
+    def test_search_jobs_filters_local_results_by_job_type(self, mock_fetch):
+        """
+        This test checks that the jobType parameter filters local results instead of
+        being matched as a keyword.
+        """
+        make_job('1', 'Python Developer', job_type='contract')
+        make_job('2', 'Python Developer', job_type='full-time')
+
+        jobs = JobicyService.search_jobs('python', {'jobType': 'contract'})
+
+        self.assertEqual([job.job_id for job in jobs], ['1'])
+        mock_fetch.assert_not_called()
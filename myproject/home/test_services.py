@@ -2,16 +2,21 @@
 This file contains the tests for the home app.
 """
 
+import math
+import threading
+import time
 from unittest.mock import patch, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 import requests
 
+from home import services # pylint: disable=import-error,no-name-in-module
 from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
-from home.models import JobListing # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing, JobSearchResult # pylint: disable=import-error,no-name-in-module
 
 MOCK_API_RESPONSE = {
     "jobs": [
@@ -48,7 +53,7 @@ class JobicyServiceTests(TestCase):
     """
     This class contains the tests for the JobicyService class.
     """
-    @patch('home.services.requests.get')
+    @patch('home.services.http_client.get')
     def test_search_jobs_api_success(self, mock_get):
         """
         This test searches for jobs from the Jobicy API.
@@ -73,16 +78,19 @@ class JobicyServiceTests(TestCase):
         job1 = JobListing.objects.get(job_id='job1')
         self.assertEqual(job1.title, "Test Job 1")
         self.assertEqual(job1.company, "TestCo")
-        self.assertEqual(job1.search_key, cache_key)
         expected_datetime = datetime(2024, 1, 1, 10, 0, 0, tzinfo=timezone.utc)
         self.assertEqual(job1.published_at, expected_datetime)
 
         job2 = JobListing.objects.get(job_id='job2')
         self.assertEqual(job2.title, "Test Job 2")
-        self.assertEqual(job2.search_key, cache_key)
         self.assertIsNone(job2.company_logo)
 
-    @patch('home.services.requests.get')
+        search_result = JobSearchResult.objects.get(
+            query_hash=JobicyService._hash_cache_key(cache_key)) # pylint: disable=protected-access
+        self.assertEqual(search_result.query_key, cache_key)
+        self.assertEqual([job.job_id for job in search_result.ordered_jobs()], ['job1', 'job2'])
+
+    @patch('home.services.http_client.get')
     def test_search_jobs_api_no_jobs_field(self, mock_get):
         """
         This test searches for jobs from the Jobicy API when the 'jobs' field is not present.
@@ -98,7 +106,12 @@ class JobicyServiceTests(TestCase):
         self.assertEqual(len(jobs), 0)
         self.assertEqual(JobListing.objects.count(), 0)
 
-    @patch('home.services.requests.get')
+        jobs = JobicyService.search_jobs("java", None)
+
+        mock_get.assert_called_once()
+        self.assertEqual(len(jobs), 0)
+
+    @patch('home.services.http_client.get')
     def test_search_jobs_api_http_error(self, mock_get):
         """
         This test searches for jobs from the Jobicy API when the API returns an HTTP error.
@@ -112,8 +125,9 @@ class JobicyServiceTests(TestCase):
         mock_get.assert_called_once()
         self.assertEqual(len(jobs), 0)
         self.assertEqual(JobListing.objects.count(), 0)
+        self.assertEqual(JobSearchResult.objects.count(), 0)
 
-    @patch('home.services.requests.get')
+    @patch('home.services.http_client.get')
     def test_search_jobs_api_request_exception(self, mock_get):
         """
         This test searches for jobs from the Jobicy API when the API returns a request exception.
@@ -126,7 +140,7 @@ class JobicyServiceTests(TestCase):
         self.assertEqual(len(jobs), 0)
         self.assertEqual(JobListing.objects.count(), 0)
 
-    @patch('home.services.requests.get')
+    @patch('home.services.http_client.get')
     def test_search_jobs_cache_hit(self, mock_get):
         """
         This test searches for jobs from the Jobicy API when the cache hits.
@@ -140,9 +154,9 @@ class JobicyServiceTests(TestCase):
             job_id='cached-job-1',
             title='Cached Job',
             company='Cache Inc.',
-            search_key=cache_key,
             published_at=timezone.now()
         )
+        JobicyService._store_search_result(cache_key, [cached_job]) # pylint: disable=protected-access
         jobs = JobicyService.search_jobs(search_term, params)
 
         mock_get.assert_not_called()
@@ -151,6 +165,186 @@ class JobicyServiceTests(TestCase):
         self.assertEqual(jobs[0], cached_job)
         self.assertEqual(JobListing.objects.count(), 1)
 
+    @patch('home.services.http_client.get')
+    def test_search_jobs_shared_listing_stays_cached_for_both_queries(self, mock_get):
+        """
+        This test checks that a listing returned by two queries is a cache hit for both.
+        """
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = MOCK_API_RESPONSE
+        mock_get.return_value = mock_response
+
+        JobicyService.search_jobs("python", None)
+        JobicyService.search_jobs("django", None)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(JobListing.objects.count(), 2)
+
+        python_jobs = JobicyService.search_jobs("python", None)
+        django_jobs = JobicyService.search_jobs("django", None)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual([job.job_id for job in python_jobs], ['job1', 'job2'])
+        self.assertEqual([job.job_id for job in django_jobs], ['job1', 'job2'])
+        self.assertEqual(JobListing.objects.get(job_id='job1').search_results.count(), 2)
+
+    def test_store_search_result_replaces_entries(self):
+        """
+        This test checks that re-storing a query replaces its ordered job list.
+        """
+        job_a = JobListing.objects.create(job_id='a', title='A', company='Co')
+        job_b = JobListing.objects.create(job_id='b', title='B', company='Co')
+
+        JobicyService._store_search_result("key:", [job_a, job_b, job_a]) # pylint: disable=protected-access
+        search_result = JobicyService._store_search_result("key:", [job_b]) # pylint: disable=protected-access
+
+        self.assertEqual(JobSearchResult.objects.count(), 1)
+        self.assertEqual(list(search_result.ordered_jobs()), [job_b])
+
+    @patch('home.services.threading.Thread')
+    @patch('home.services.http_client.get')
+    def test_search_jobs_fresh_result_skips_refresh(self, mock_get, mock_thread):
+        """
+        This test checks that a fresh cached result is served without any refresh.
+        """
+        job = JobListing.objects.create(job_id='fresh', title='Fresh', company='Co')
+        JobicyService._store_search_result("fresh:", [job]) # pylint: disable=protected-access
+
+        jobs = JobicyService.search_jobs("fresh", None)
+
+        self.assertEqual(jobs, [job])
+        mock_get.assert_not_called()
+        mock_thread.assert_not_called()
+
+    @patch('home.services.threading.Thread')
+    @patch('home.services.http_client.get')
+    def test_search_jobs_stale_result_served_and_refreshed_once(self, mock_get, mock_thread):
+        """
+        This test checks that an expired result is served immediately while a single
+        background refresh is scheduled for its key.
+        """
+        job = JobListing.objects.create(job_id='stale', title='Stale', company='Co')
+        search_result = JobicyService._store_search_result("stale:", [job]) # pylint: disable=protected-access
+        search_result.fetched_at = timezone.now() - timedelta(seconds=search_result.ttl_seconds + 1)
+        search_result.save()
+        self.assertFalse(search_result.is_fresh)
+
+        try:
+            first = JobicyService.search_jobs("stale", None)
+            second = JobicyService.search_jobs("stale", None)
+        finally:
+            services._refreshing_keys.discard("stale:") # pylint: disable=protected-access
+
+        self.assertEqual(first, [job])
+        self.assertEqual(second, [job])
+        mock_get.assert_not_called()
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+
+    @patch('home.services.http_client.get')
+    def test_refresh_search_repopulates_and_releases_key(self, mock_get):
+        """
+        This test checks that a background refresh stores new results and frees the key.
+        """
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = MOCK_API_RESPONSE
+        mock_get.return_value = mock_response
+
+        old_job = JobListing.objects.create(job_id='old', title='Old', company='Co')
+        search_result = JobicyService._store_search_result("python:", [old_job]) # pylint: disable=protected-access
+        search_result.fetched_at = timezone.now() - timedelta(days=1)
+        search_result.save()
+        services._refreshing_keys.add("python:") # pylint: disable=protected-access
+
+        JobicyService._refresh_search("python", None, "python:") # pylint: disable=protected-access
+
+        search_result.refresh_from_db()
+        self.assertTrue(search_result.is_fresh)
+        self.assertEqual([job.job_id for job in search_result.ordered_jobs()], ['job1', 'job2'])
+        self.assertNotIn("python:", services._refreshing_keys) # pylint: disable=protected-access
+
+    @patch('home.services.JobicyService.fetch_and_cache_jobs', side_effect=RuntimeError("boom"))
+    def test_refresh_search_failure_releases_key(self, mock_fetch):
+        """
+        This test checks that a failed background refresh still frees its key.
+        """
+        services._refreshing_keys.add("broken:") # pylint: disable=protected-access
+
+        JobicyService._refresh_search("broken", None, "broken:") # pylint: disable=protected-access
+
+        mock_fetch.assert_called_once_with("broken", None)
+        self.assertNotIn("broken:", services._refreshing_keys) # pylint: disable=protected-access
+
+    def test_ingest_jobs_reports_inserted_updated_and_unchanged(self):
+        """
+        This test checks the counts reported by the bulk ingestion path.
+        """
+        first = JobicyService.ingest_jobs(MOCK_API_RESPONSE['jobs'])
+        self.assertEqual((first.inserted, first.updated, first.unchanged), (2, 0, 0))
+        self.assertEqual([job.job_id for job in first.jobs], ['job1', 'job2'])
+        self.assertTrue(all(job.pk for job in first.jobs))
+
+        second = JobicyService.ingest_jobs(MOCK_API_RESPONSE['jobs'])
+        self.assertEqual((second.inserted, second.updated, second.unchanged), (0, 0, 2))
+
+        changed_payload = [dict(MOCK_API_RESPONSE['jobs'][0], jobTitle="Renamed Job"),
+                           MOCK_API_RESPONSE['jobs'][1],
+                           dict(MOCK_API_RESPONSE['jobs'][1], id="job3")]
+        third = JobicyService.ingest_jobs(changed_payload)
+        self.assertEqual((third.inserted, third.updated, third.unchanged), (1, 1, 1))
+        self.assertEqual(JobListing.objects.get(job_id='job1').title, "Renamed Job")
+        self.assertEqual(JobListing.objects.count(), 3)
+
+    def test_ingest_jobs_uses_constant_number_of_queries(self):
+        """
+        This test checks that a whole payload is written with bulk statements. SQLite
+        caps the parameters of a statement, so a wide payload may take a few of them.
+        """
+        payload = [dict(MOCK_API_RESPONSE['jobs'][0], id=f"bulk{i}") for i in range(50)]
+        fields = [field for field in JobListing._meta.concrete_fields # pylint: disable=protected-access,no-member
+                  if not field.primary_key]
+        updated_fields = JobicyService.INGEST_FIELDS + ['updated_at']
+
+        def statements(columns):
+            return math.ceil(len(payload) / connection.ops.bulk_batch_size(columns, payload))
+
+        with self.assertNumQueries(2 + statements(fields)):
+            result = JobicyService.ingest_jobs(payload)
+        self.assertEqual(result.inserted, 50)
+
+        updated_payload = [dict(job, jobTitle="Updated") for job in payload]
+        with self.assertNumQueries(1 + statements(['pk', 'pk'] + updated_fields)):
+            result = JobicyService.ingest_jobs(updated_payload)
+        self.assertEqual(result.updated, 50)
+
+    def test_ingest_jobs_survives_concurrent_insert(self):
+        """
+        This test checks that a listing inserted by another worker between the
+        lookup and the bulk insert is read back instead of failing the ingest.
+        """
+        raced = JobListing.objects.create(job_id='job1', title='Inserted meanwhile') # pylint: disable=no-member
+        real_in_bulk = JobListing.objects.in_bulk # pylint: disable=no-member
+
+        with patch.object(JobListing.objects, 'in_bulk', # pylint: disable=no-member
+                          side_effect=[{}, real_in_bulk(['job1'], field_name='job_id')]):
+            result = JobicyService.ingest_jobs([MOCK_API_RESPONSE['jobs'][0]])
+
+        self.assertEqual([job.pk for job in result.jobs], [raced.pk])
+        self.assertEqual(JobListing.objects.filter(job_id='job1').count(), 1) # pylint: disable=no-member
+
+    def test_ingest_jobs_skips_duplicates_and_missing_ids(self):
+        """
+        This test checks that repeated or id-less payload entries are ignored.
+        """
+        payload = [MOCK_API_RESPONSE['jobs'][0], MOCK_API_RESPONSE['jobs'][0],
+                   {"jobTitle": "No id"}]
+
+        result = JobicyService.ingest_jobs(payload)
+
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(len(result.jobs), 1)
+
     def test_get_job_details_found(self):
         """
         This test gets job details from the Jobicy API when the job exists.
@@ -182,3 +376,76 @@ class JobicyServiceTests(TestCase):
         self.assertNotEqual(key1, key3)
         self.assertNotEqual(key1, key4)
         self.assertEqual(key5, "python:")
+
+
+class FanOutSearchTests(TestCase):
+    """
+    This class contains the tests for running several Jobicy searches concurrently.
+    """
+    QUERIES = [('python', {}), ('python', {'jobIndustry': 'Tech'}), ('python', {'geo': 'USA'})]
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.urls = []
+
+    def fake_get(self, url, endpoint): # pylint: disable=unused-argument
+        """
+        This method stands in for a slow Jobicy call and records how many overlap.
+        """
+        with self.lock:
+            self.urls.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.2)
+        with self.lock:
+            self.active -= 1
+        if 'geo=' in url:
+            raise requests.exceptions.Timeout("slow upstream")
+        jobs = MOCK_API_RESPONSE['jobs']
+        if 'industry=' in url:
+            jobs = [jobs[0], dict(jobs[1], id='job3')]
+        response = MagicMock()
+        response.json.return_value = {'jobs': jobs}
+        return response
+
+    def test_queries_run_in_parallel_and_merge(self):
+        """
+        This test checks that the API calls overlap, that the total wait is close to
+        one call, and that jobs are merged without duplicates in query order.
+        """
+        with patch('home.services.http_client.get', side_effect=self.fake_get):
+            started = time.monotonic()
+            jobs = JobicyService.search_jobs_many(self.QUERIES)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual([job.job_id for job in jobs], ['job1', 'job2', 'job3'])
+        self.assertEqual(self.max_active, 3)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(JobSearchResult.objects.count(), 2) # pylint: disable=no-member
+
+    @override_settings(JOBICY_MAX_CONCURRENCY=2)
+    def test_concurrency_is_bounded(self):
+        """
+        This test checks that no more than JOBICY_MAX_CONCURRENCY calls are open.
+        """
+        queries = self.QUERIES + [('django', {})]
+        with patch('home.services.http_client.get', side_effect=self.fake_get):
+            JobicyService.search_jobs_many(queries)
+
+        self.assertEqual(len(self.urls), 4)
+        self.assertEqual(self.max_active, 2)
+
+    def test_cached_queries_skip_the_api(self):
+        """
+        This test checks that only queries without a cached result set are fetched.
+        """
+        with patch('home.services.http_client.get', side_effect=self.fake_get):
+            JobicyService.search_jobs_many(self.QUERIES[:2])
+            self.urls.clear()
+            jobs = JobicyService.search_jobs_many(self.QUERIES)
+
+        self.assertEqual(len(self.urls), 1)
+        self.assertIn('geo=usa', self.urls[0])
+        self.assertEqual([job.job_id for job in jobs], ['job1', 'job2', 'job3'])
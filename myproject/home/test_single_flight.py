@@ -0,0 +1,274 @@
+"""
+This file contains the tests for the coalescing of identical Jobicy fetches.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from home import single_flight # pylint: disable=import-error,no-name-in-module
+from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing, JobSearchResult # pylint: disable=import-error,no-name-in-module
+from home.test_services import MOCK_API_RESPONSE # pylint: disable=import-error,no-name-in-module
+
+
+class SingleFlightTests(SimpleTestCase):
+    """
+    This class contains the tests for the in-process and cross-worker locks.
+    """
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.calls = 0
+        self.stored = None
+
+    def tearDown(self):
+        shutil.rmtree(self.lock_dir, ignore_errors=True)
+
+    def slow_fetch(self):
+        """
+        This method stands in for a slow fetch that stores its result.
+        """
+        self.calls += 1
+        time.sleep(0.2)
+        self.stored = ['job1']
+        return self.stored
+
+    def test_concurrent_callers_share_one_fetch(self):
+        """
+        This test checks that threads asking for the same key run one fetch and all
+        get its result.
+        """
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            single_flight.run('python:', self.slow_fetch, lambda: self.stored)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [['job1']] * 5)
+        self.assertNotIn('python:', single_flight._flights) # pylint: disable=protected-access
+
+    def test_different_keys_do_not_wait(self):
+        """
+        This test checks that only callers of the same key are coalesced.
+        """
+        first = single_flight.begin('python:')
+        second = single_flight.begin('django:')
+        try:
+            self.assertTrue(first.leader)
+            self.assertTrue(second.leader)
+        finally:
+            first.finish()
+            second.finish()
+
+    def test_failed_fetch_releases_the_key(self):
+        """
+        This test checks that a key is released when its fetch raises.
+        """
+        with self.assertRaises(RuntimeError):
+            single_flight.run('python:', MagicMock(side_effect=RuntimeError), lambda: None)
+
+        flight = single_flight.begin('python:')
+        self.assertTrue(flight.leader)
+        flight.finish()
+
+    def test_workers_take_turns_on_the_lock_file(self):
+        """
+        This test checks that a second worker's leader only takes the lock file once
+        the first worker has stored its result and released it.
+        """
+        with override_settings(JOBICY_LOCK_DIR=self.lock_dir):
+            # leaders in two different workers, so not coalesced in memory
+            first = single_flight.Flight('python:', threading.Event(), leader=True)
+            second = single_flight.Flight('python:', threading.Event(), leader=True)
+            self.assertTrue(first.lock())
+
+            def finish_first():
+                time.sleep(0.2)
+                self.stored = ['job1']
+                first.finish()
+
+            threading.Thread(target=finish_first).start()
+            started = time.monotonic()
+            self.assertTrue(second.lock())
+            second.finish()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(self.stored, ['job1'])
+        self.assertEqual(len(os.listdir(self.lock_dir)), 1)
+
+    @override_settings(JOBICY_SINGLE_FLIGHT_TIMEOUT=0.1)
+    def test_lock_timeout_lets_the_leader_fetch(self):
+        """
+        This test checks that a stuck worker does not block others past the timeout.
+        """
+        with override_settings(JOBICY_LOCK_DIR=self.lock_dir):
+            stuck = single_flight.Flight('python:', threading.Event(), leader=True)
+            stuck.lock()
+            try:
+                result = single_flight.run('python:', self.slow_fetch, lambda: None)
+            finally:
+                stuck.finish()
+
+        self.assertEqual(result, ['job1'])
+        self.assertEqual(self.calls, 1)
+
+    @patch('home.single_flight.LOCK_STRIPES', 1)
+    def test_keys_on_one_stripe_lock_it_once(self):
+        """
+        This test checks that keys sharing a lock file do not wait on each other.
+        """
+        with override_settings(JOBICY_LOCK_DIR=self.lock_dir):
+            started = time.monotonic()
+            with single_flight.lock_keys(['python:', 'django:', 'rust:']) as locked:
+                self.assertEqual(locked, {'python:', 'django:', 'rust:'})
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(os.listdir(self.lock_dir), ['000.lock'])
+
+    @override_settings(JOBICY_SINGLE_FLIGHT_TIMEOUT=0.1)
+    def test_lock_keys_reports_stripes_it_could_not_take(self):
+        """
+        This test checks that a stripe held by another worker only leaves its own
+        keys unlocked.
+        """
+        with override_settings(JOBICY_LOCK_DIR=self.lock_dir):
+            other_worker = single_flight.Flight('python:', threading.Event(), leader=True)
+            other_worker.lock()
+            try:
+                with single_flight.lock_keys(['python:', 'django:']) as locked:
+                    self.assertEqual(locked, {'django:'})
+            finally:
+                other_worker.finish()
+
+    def test_overlapping_lock_keys_queue_instead_of_deadlocking(self):
+        """
+        This test checks that two workers locking the same keys in opposite order
+        both get all of them, one after the other.
+        """
+        keys = ['python:', 'django:', 'rust:', 'go:']
+        results = []
+
+        def worker(order):
+            with single_flight.lock_keys(order) as locked:
+                results.append(locked)
+                time.sleep(0.1)
+
+        with override_settings(JOBICY_LOCK_DIR=self.lock_dir):
+            threads = [threading.Thread(target=worker, args=(order,))
+                       for order in (keys, keys[::-1])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, [set(keys)] * 2)
+
+
+class CoalescedSearchTests(TransactionTestCase):
+    """
+    This class contains the tests for identical searches that miss the cache at
+    the same moment.
+    """
+    def setUp(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def fake_get(self, url, endpoint): # pylint: disable=unused-argument
+        """
+        This method stands in for a slow Jobicy call and counts the calls. Other
+        queries take longer so two threads never write at the same moment.
+        """
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.2 if 'python' in url else 0.4)
+        response = MagicMock()
+        response.json.return_value = MOCK_API_RESPONSE
+        return response
+
+    def search_in_thread(self, results):
+        """
+        This method searches on its own thread and DB connection, like a request.
+        """
+        try:
+            results.append([job.job_id for job in JobicyService.search_jobs('python')])
+        finally:
+            connection.close()
+
+    def test_identical_searches_fetch_once(self):
+        """
+        This test checks that concurrent misses for one query make one API call and
+        one ingest, and that every caller gets the jobs.
+        """
+        results = []
+        with patch('home.services.http_client.get', side_effect=self.fake_get):
+            threads = [threading.Thread(target=self.search_in_thread, args=(results,))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [['job1', 'job2']] * 4)
+        self.assertEqual(JobListing.objects.count(), 2) # pylint: disable=no-member
+        self.assertEqual(JobSearchResult.objects.count(), 1) # pylint: disable=no-member
+
+    def test_fan_out_skips_a_query_in_flight(self):
+        """
+        This test checks that a fan-out search waits for a query another request
+        is already fetching instead of fetching it again.
+        """
+        results = []
+        with patch('home.services.http_client.get', side_effect=self.fake_get):
+            thread = threading.Thread(target=self.search_in_thread, args=(results,))
+            thread.start()
+            time.sleep(0.05)
+            jobs = JobicyService.search_jobs_many([('python', {}), ('django', {})])
+            thread.join()
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(results, [['job1', 'job2']])
+        self.assertEqual([job.job_id for job in jobs], ['job1', 'job2'])
+        self.assertEqual(JobSearchResult.objects.count(), 2) # pylint: disable=no-member
+
+    @patch('home.single_flight.LOCK_STRIPES', 1)
+    def test_worker_locks(self):
+        """
+        This test checks searches with the lock files enabled: a fan-out whose
+        queries share one lock file fetches them all without waiting on itself, and
+        a second worker's leader reuses the stored result instead of fetching.
+        """
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, ignore_errors=True)
+        queries = [('python', {}), ('django', {}), ('rust', {})]
+
+        with override_settings(JOBICY_LOCK_DIR=lock_dir), \
+                patch('home.services.http_client.get', side_effect=self.fake_get):
+            started = time.monotonic()
+            JobicyService.fetch_many(queries)
+            elapsed = time.monotonic() - started
+
+            # a leader in another worker that was blocked on the lock file meanwhile
+            other_worker = single_flight.run(
+                JobicyService._build_cache_key('python'), # pylint: disable=protected-access
+                MagicMock(side_effect=AssertionError("fetched twice")),
+                lambda: JobicyService._stored_since( # pylint: disable=protected-access
+                    JobicyService._build_cache_key('python'), # pylint: disable=protected-access
+                    timezone.now() - timedelta(seconds=5)))
+
+        self.assertEqual(self.calls, 3)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(os.listdir(lock_dir), ['000.lock'])
+        self.assertEqual([job.job_id for job in other_worker], ['job1', 'job2'])
@@ -0,0 +1,304 @@
+"""
+This file contains the tests for the background AI task queue.
+"""
+
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from home import tasks # pylint: disable=import-error,no-name-in-module
+from home.models import AITask # pylint: disable=import-error,no-name-in-module
+
+
+class InlineExecutor:
+    """
+    Stands in for ThreadPoolExecutor and runs each task on the test thread.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, *args):
+        """
+        This method runs the function immediately and returns a finished future.
+        """
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class AITaskQueueTests(TestCase):
+    """
+    This class contains the tests for enqueueing, claiming and running AI tasks.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='StrongTestPass123')
+
+    def test_enqueue_rejects_unknown_kind(self):
+        """
+        This test checks that only registered task kinds can be queued.
+        """
+        with self.assertRaises(ValueError):
+            tasks.enqueue(self.user, 'unknown')
+
+    def test_claim_tasks_claims_each_task_once(self):
+        """
+        This test checks that a claimed task is not handed out again.
+        """
+        first = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+        second = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+        tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+
+        claimed = tasks.claim_tasks(2)
+
+        self.assertEqual([task.pk for task in claimed], [first.pk, second.pk])
+        self.assertTrue(all(task.status == AITask.STATUS_RUNNING for task in claimed))
+        self.assertTrue(all(task.attempts == 1 for task in claimed))
+        self.assertEqual(len(tasks.claim_tasks(5)), 1)
+        self.assertEqual(tasks.claim_tasks(5), [])
+
+    def test_claim_tasks_skips_tasks_waiting_for_retry(self):
+        """
+        This test checks that a task is not claimed before its run_after time.
+        """
+        task = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+        AITask.objects.filter(pk=task.pk).update( # pylint: disable=no-member
+            run_after=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(tasks.claim_tasks(5), [])
+
+    @patch('home.tasks.generate_rejection_reasons', return_value="Too junior")
+    def test_run_task_stores_result(self, mock_generate):
+        """
+        This test checks that a successful handler result is stored on the task.
+        """
+        tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer',
+                      job_description='Python', industry='', location='')
+        task = tasks.run_task(tasks.claim_tasks(1)[0])
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, AITask.STATUS_SUCCEEDED)
+        self.assertEqual(task.result, {'rejection_reasons': "Too junior"})
+        self.assertIsNotNone(task.finished_at)
+        mock_generate.assert_called_once_with(resume_text=None, job_title='Engineer',
+                                              job_description='Python', industry='',
+                                              location='')
+
+    @override_settings(AI_TASK_MAX_ATTEMPTS=2, AI_TASK_RETRY_DELAY=30)
+    @patch('home.tasks.generate_rejection_reasons', side_effect=RuntimeError("boom"))
+    def test_run_task_retries_then_fails(self, _generate):
+        """
+        This test checks that unexpected errors are retried with a delay, then fail.
+        """
+        tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+
+        task = tasks.run_task(tasks.claim_tasks(1)[0])
+        self.assertEqual(task.status, AITask.STATUS_PENDING)
+        self.assertGreater(task.run_after, timezone.now() + timedelta(seconds=20))
+
+        AITask.objects.filter(pk=task.pk).update(run_after=timezone.now()) # pylint: disable=no-member
+        task = tasks.run_task(tasks.claim_tasks(1)[0])
+        self.assertEqual(task.status, AITask.STATUS_FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    @patch('home.tasks.generate_rejection_reasons',
+           return_value="Unable to generate rejection reasons due to an internal error.")
+    def test_error_text_is_retried(self, _generate):
+        """
+        This test checks that a failure reported as text is not stored as a result.
+        """
+        tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+
+        task = tasks.run_task(tasks.claim_tasks(1)[0])
+
+        self.assertEqual(task.status, AITask.STATUS_PENDING)
+        self.assertIsNone(task.result)
+        self.assertIn('internal error', task.error)
+
+    @patch('home.tasks.get_job_specific_feedback',
+           return_value='<h2>Error</h2>\n<p>Job-specific feedback requires an OpenAI API key.</p>')
+    @patch('home.tasks.get_resume_feedback', return_value='<p>Looks good</p>')
+    @patch('home.tasks.get_resume_text', return_value='Resume text')
+    def test_permanent_error_text_fails_without_retry(self, *_mocks):
+        """
+        This test checks that a failure retrying cannot fix fails the task at once.
+        """
+        with patch('home.tasks.Resume.objects.get'):
+            tasks.enqueue(self.user, AITask.KIND_RESUME_FEEDBACK, resume_id=1)
+            task = tasks.run_task(tasks.claim_tasks(1)[0])
+
+        self.assertEqual(task.status, AITask.STATUS_FAILED)
+        self.assertEqual(task.error, 'Job-specific feedback requires an OpenAI API key.')
+
+    def test_fit_analysis_without_resume_fails_without_retry(self):
+        """
+        This test checks that a TaskError fails the task straight away.
+        """
+        tasks.enqueue(self.user, AITask.KIND_FIT_ANALYSIS, job_title='Engineer')
+
+        task = tasks.run_task(tasks.claim_tasks(1)[0])
+
+        self.assertEqual(task.status, AITask.STATUS_FAILED)
+        self.assertEqual(task.error, 'No resume found to analyze fit')
+
+    @override_settings(AI_TASK_STALE_SECONDS=60)
+    def test_requeue_stale_tasks(self):
+        """
+        This test checks that tasks abandoned by a dead worker are queued again.
+        """
+        task = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+        AITask.objects.filter(pk=task.pk).update( # pylint: disable=no-member
+            status=AITask.STATUS_RUNNING, started_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(tasks.requeue_stale_tasks(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, AITask.STATUS_PENDING)
+
+    @override_settings(AI_TASK_MAX_ATTEMPTS=2)
+    def test_stale_task_out_of_attempts_fails(self):
+        """
+        This test checks that a task that keeps killing its worker is failed once it
+        has used its attempts instead of being claimed forever.
+        """
+        task = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+        AITask.objects.filter(pk=task.pk).update( # pylint: disable=no-member
+            status=AITask.STATUS_RUNNING, attempts=2,
+            started_at=timezone.now() - timedelta(minutes=20))
+
+        self.assertEqual(tasks.requeue_stale_tasks(), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, AITask.STATUS_FAILED)
+        self.assertIsNotNone(task.finished_at)
+        self.assertEqual(tasks.claim_tasks(1), [])
+
+    @override_settings(AI_TASK_RETENTION_SECONDS=60 * 60)
+    def test_purge_finished_tasks(self):
+        """
+        This test checks that only tasks that finished before the retention period
+        are deleted.
+        """
+        old = timezone.now() - timedelta(hours=2)
+        expired = [tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title=title)
+                   for title in ('Succeeded', 'Failed')]
+        AITask.objects.filter(pk=expired[0].pk).update( # pylint: disable=no-member
+            status=AITask.STATUS_SUCCEEDED, finished_at=old)
+        AITask.objects.filter(pk=expired[1].pk).update( # pylint: disable=no-member
+            status=AITask.STATUS_FAILED, finished_at=old)
+        recent = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Recent')
+        AITask.objects.filter(pk=recent.pk).update( # pylint: disable=no-member
+            status=AITask.STATUS_SUCCEEDED, finished_at=timezone.now())
+        pending = tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Pending')
+        AITask.objects.filter(pk=pending.pk).update(created_at=old) # pylint: disable=no-member
+
+        self.assertEqual(tasks.purge_finished_tasks(), 2)
+        self.assertEqual(set(AITask.objects.values_list('pk', flat=True)), # pylint: disable=no-member
+                         {recent.pk, pending.pk})
+
+    @patch('home.tasks.purge_finished_tasks')
+    @patch('home.tasks.requeue_stale_tasks')
+    def test_worker_claims_as_soon_as_a_slot_frees(self, *_mocks):
+        """
+        This test checks that a slow task does not hold up the next one: the third
+        task starts when the fast one finishes, not when the whole batch does.
+        """
+        queue = ['slow', 'fast', 'next']
+        events = []
+
+        def claim(limit):
+            claimed, queue[:] = queue[:limit], queue[limit:]
+            return claimed
+
+        def run(task):
+            events.append(('start', task))
+            time.sleep(0.5 if task == 'slow' else 0.05)
+            events.append(('end', task))
+
+        with patch('home.tasks.claim_tasks', side_effect=claim), \
+                patch('home.tasks._run_task_in_thread', side_effect=run):
+            processed = tasks.run_worker(concurrency=2, rate_limit=0, poll_interval=0.01,
+                                         once=True)
+
+        self.assertEqual(processed, 3)
+        self.assertLess(events.index(('start', 'next')), events.index(('end', 'slow')))
+
+    @patch('home.tasks.connection')
+    @patch('home.tasks.ThreadPoolExecutor', InlineExecutor)
+    @patch('home.tasks.generate_rejection_reasons', return_value="Too junior")
+    def test_worker_command_drains_queue(self, _generate, _connection):
+        """
+        This test checks that run_ai_worker --once runs every queued task and exits.
+        """
+        for _ in range(3):
+            tasks.enqueue(self.user, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+
+        call_command('run_ai_worker', once=True, concurrency=2, rate_limit=0)
+
+        self.assertEqual(AITask.objects.filter( # pylint: disable=no-member
+            status=AITask.STATUS_SUCCEEDED).count(), 3)
+
+
+class AITaskViewTests(TestCase):
+    """
+    This class contains the tests for the enqueue and status endpoints.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='StrongTestPass123')
+        self.client.login(username='testuser', password='StrongTestPass123')
+
+    def enqueue(self, kind, data):
+        """
+        This method posts an AJAX request to queue a task.
+        """
+        return self.client.post(reverse('enqueue_ai_task', args=[kind]), data,
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_enqueue_returns_pollable_task(self):
+        """
+        This test checks that a queued task can be polled until it has a result.
+        """
+        response = self.enqueue('rejection_reasons', {'job_title': 'Engineer'})
+
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pending')
+
+        with patch('home.tasks.generate_rejection_reasons', return_value="Too junior"):
+            tasks.run_task(tasks.claim_tasks(1)[0])
+
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['status'], 'succeeded')
+        self.assertEqual(data['result'], {'rejection_reasons': "Too junior"})
+
+    def test_enqueue_validates_input(self):
+        """
+        This test checks the per-kind validation and unknown kinds.
+        """
+        self.assertEqual(self.enqueue('rejection_reasons', {}).status_code, 400)
+        self.assertEqual(self.enqueue('fit_analysis', {'job_title': 'Engineer'}).status_code, 400)
+        self.assertEqual(self.enqueue('resume_feedback', {'resume_id': 'x'}).status_code, 404)
+        self.assertEqual(self.enqueue('cover_letter', {'user_name': 'Test'}).status_code, 400)
+        self.assertEqual(self.enqueue('unknown', {}).status_code, 404)
+        self.assertFalse(AITask.objects.exists()) # pylint: disable=no-member
+
+    def test_status_is_private_to_the_owner(self):
+        """
+        This test checks that users cannot read each other's tasks.
+        """
+        other = User.objects.create_user(username='other', password='StrongTestPass123')
+        task = tasks.enqueue(other, AITask.KIND_REJECTION_REASONS, job_title='Engineer')
+
+        response = self.client.get(reverse('ai_task_status', args=[task.id]))
+
+        self.assertEqual(response.status_code, 404)
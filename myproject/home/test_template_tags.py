@@ -2,7 +2,11 @@
 This file contains the tests for the job filters.
 """
 
-from django.test import SimpleTestCase
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase
+from home.models import JobListing # pylint: disable=import-error,no-name-in-module
+from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
 from home.templatetags.job_filters import format_field
 
 class JobFiltersTests(SimpleTestCase):
@@ -81,3 +85,54 @@ class JobFiltersTests(SimpleTestCase):
         This function tests the format_field function with multiple words.
         """
         self.assertEqual(format_field('senior_software_engineer'), 'Senior Software Engineer')
+
+
+class JobCardFragmentTests(TestCase):
+    """
+    This class contains the tests for the precomputed labels and cached job cards.
+    """
+    def setUp(self):
+        caches['fragments'].clear()
+
+    def tearDown(self):
+        caches['fragments'].clear()
+
+    def test_labels_are_computed_on_save_and_ingest(self):
+        """
+        This test checks that saved and ingested listings carry formatted labels.
+        """
+        job = JobListing.objects.create(job_id='1', title='Dev', company='Acme', # pylint: disable=no-member
+                                        job_type="['full-time']",
+                                        industry='["Finance &amp; Accounting"]')
+        self.assertEqual((job.job_type_label, job.industry_label, job.job_level_label),
+                         ('Full Time', 'Finance & Accounting', ''))
+
+        result = JobicyService.ingest_jobs([{'id': 2, 'jobTitle': 'Dev', 'companyName': 'Acme',
+                                             'jobType': ['part-time'], 'jobLevel': 'Senior'}])
+        job = JobListing.objects.get(pk=result.jobs[0].pk) # pylint: disable=no-member
+        self.assertEqual((job.job_type_label, job.job_level_label), ('Part Time', 'Senior'))
+
+        job.job_type = 'contract'
+        job.save(update_fields=['job_type'])
+        job.refresh_from_db()
+        self.assertEqual(job.job_type_label, 'Contract')
+
+    def test_card_is_cached_until_listing_changes(self):
+        """
+        This test checks that a card is rendered from the fragment cache until the
+        listing's updated_at moves, while the search snippet is always fresh.
+        """
+        job = JobListing.objects.create(job_id='1', title='Old Title', company='Acme', # pylint: disable=no-member
+                                        job_type="['full-time']")
+        render_to_string('home/job_card.html', {'job': job})
+
+        JobListing.objects.filter(pk=job.pk).update(title='New Title') # pylint: disable=no-member
+        job = JobListing.objects.for_list().get(pk=job.pk) # pylint: disable=no-member
+        job.search_snippet = 'a <mark>match</mark>'
+        html = render_to_string('home/job_card.html', {'job': job})
+        self.assertIn('Old Title', html)
+        self.assertIn('Full Time', html)
+        self.assertIn('a &lt;mark&gt;match&lt;/mark&gt;', html)
+
+        job.save()
+        self.assertIn('New Title', render_to_string('home/job_card.html', {'job': job}))
@@ -0,0 +1,226 @@
+"""
+This file contains the tests for the write-behind buffer of job views and the
+batch tracking endpoint.
+"""
+
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from home import tracking # pylint: disable=import-error,no-name-in-module
+from home.models import JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
+
+
+@override_settings(JOB_VIEW_WRITE_BEHIND=True, JOB_VIEW_BUFFER_SIZE=3,
+                   JOB_VIEW_BUFFER_SECONDS=60)
+class ViewBufferTests(TestCase):
+    """
+    This class contains the tests for buffered job view tracking.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='viewer', password='StrongTestPass123')
+        self.jobs = [JobListing.objects.create(job_id=f'buffered-{i}', title=f'Job {i}', # pylint: disable=no-member
+                                               company='Acme') for i in range(3)]
+        self.client.login(username='viewer', password='StrongTestPass123')
+
+    def tearDown(self):
+        tracking.flush()
+
+    def track(self, job_id):
+        """
+        This method posts one view to the tracking endpoint.
+        """
+        return self.client.post(reverse('track_job_view'), {'job_id': job_id},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_view_is_queued_without_a_write(self):
+        """
+        This test checks that tracking a view only appends to the buffer.
+        """
+        response = self.track('buffered-0')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()['queued'])
+        self.assertFalse(self.track('buffered-0').json()['queued'])
+        self.assertEqual(tracking.pending_count(), 1)
+        self.assertFalse(UserJobInteraction.objects.exists()) # pylint: disable=no-member
+
+    def test_full_buffer_flushes_in_one_insert(self):
+        """
+        This test checks that the buffer is written once it holds enough views,
+        skipping unknown jobs and views that are already stored.
+        """
+        UserJobInteraction.objects.create(user=self.user, job=self.jobs[0], # pylint: disable=no-member
+                                          interaction_type='viewed')
+        tracking.record_view(self.user.pk, 'buffered-0')
+        tracking.record_view(self.user.pk, 'missing')
+
+        with self.assertNumQueries(2):
+            tracking.record_view(self.user.pk, 'buffered-1')
+
+        self.assertEqual(tracking.pending_count(), 0)
+        self.assertEqual(set(UserJobInteraction.objects.values_list('job__job_id', flat=True)), # pylint: disable=no-member
+                         {'buffered-0', 'buffered-1'})
+
+    def test_batch_endpoint_views_go_through_the_buffer(self):
+        """
+        This test checks that 'viewed' events of the batch endpoint are queued
+        while applications are still written at once.
+        """
+        events = [{'job_id': 'buffered-0', 'interaction_type': 'viewed'},
+                  {'job_id': 'buffered-0', 'interaction_type': 'viewed'},
+                  {'job_id': 'buffered-1', 'interaction_type': 'applied'}]
+
+        response = self.client.post(reverse('track_interactions'),
+                                    data=json.dumps({'events': events}),
+                                    content_type='application/json',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual([item['status'] for item in response.json()['results']],
+                         ['queued', 'exists', 'created'])
+        self.assertEqual(tracking.pending_count(), 1)
+        self.assertEqual(set(UserJobInteraction.objects.values_list( # pylint: disable=no-member
+            'job__job_id', 'interaction_type')),
+                         {('buffered-1', 'applied'), ('buffered-1', 'viewed')})
+
+        tracking.flush()
+        self.assertTrue(UserJobInteraction.objects.filter( # pylint: disable=no-member
+            job__job_id='buffered-0', interaction_type='viewed').exists())
+
+    def test_page_gets_the_batch_limit(self):
+        """
+        This test checks that the job pages split their queue at the server's limit.
+        """
+        with override_settings(TRACKING_BATCH_MAX_EVENTS=7):
+            response = self.client.get(reverse('dashboard'))
+
+        self.assertContains(response, f"'{response.context['csrf_token']}', 7);")
+
+    @override_settings(JOB_VIEW_BUFFER_SECONDS=0.01)
+    def test_timer_flushes_pending_views(self):
+        """
+        This test checks that a flush is scheduled JOB_VIEW_BUFFER_SECONDS after the
+        first pending view.
+        """
+        buffer = tracking.ViewBuffer()
+        with patch.object(buffer, 'flush') as mock_flush, patch('home.tracking.connection'):
+            buffer.add(self.user.pk, 'buffered-2')
+            buffer._timer.join(5) # pylint: disable=protected-access
+
+        mock_flush.assert_called_once_with()
+
+    def test_failed_flush_requeues_the_batch(self):
+        """
+        This test checks that a batch the database rejects is kept and written by
+        the next flush, and that the retry is scheduled.
+        """
+        buffer = tracking.ViewBuffer()
+        buffer.add(self.user.pk, 'buffered-0')
+        buffer.add(self.user.pk, 'buffered-1')
+        locked = OperationalError('database is locked')
+
+        with patch('home.tracking.UserJobInteraction.objects.bulk_create',
+                   side_effect=locked), self.assertLogs('home.tracking', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+
+        self.assertEqual(len(buffer), 2)
+        self.assertIsNotNone(buffer._timer) # pylint: disable=protected-access
+        with self.assertNumQueries(2):
+            buffer.add(self.user.pk, 'buffered-2') # fills the buffer and flushes
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(UserJobInteraction.objects.count(), 3) # pylint: disable=no-member
+
+    @override_settings(JOB_VIEW_BUFFER_SIZE=10, JOB_VIEW_BUFFER_MAX_PENDING=2)
+    def test_requeued_views_are_capped(self):
+        """
+        This test checks that while writes keep failing the buffer keeps only the
+        newest JOB_VIEW_BUFFER_MAX_PENDING views.
+        """
+        buffer = tracking.ViewBuffer()
+        self.addCleanup(buffer.flush)
+        for job in self.jobs:
+            buffer.add(self.user.pk, job.job_id)
+
+        with patch('home.tracking.UserJobInteraction.objects.bulk_create',
+                   side_effect=OperationalError('database is locked')), \
+                self.assertLogs('home.tracking', 'WARNING') as logs:
+            buffer.flush()
+
+        self.assertEqual(list(buffer._pending), # pylint: disable=protected-access
+                         [(self.user.pk, 'buffered-1'), (self.user.pk, 'buffered-2')])
+        self.assertIn('Dropped 1 buffered job views', '\n'.join(logs.output))
+
+
+class BatchTrackingTests(TestCase):
+    """
+    This class contains the tests for the batch tracking endpoint.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='batcher', password='StrongTestPass123')
+        self.jobs = [JobListing.objects.create(job_id=f'batch-{i}', title=f'Job {i}', # pylint: disable=no-member
+                                               company='Acme') for i in range(3)]
+        self.client.login(username='batcher', password='StrongTestPass123')
+
+    def post(self, body):
+        """
+        This method posts a JSON body to the batch endpoint.
+        """
+        return self.client.post(reverse('track_interactions'), data=json.dumps(body),
+                                content_type='application/json',
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_batch_reports_status_per_event(self):
+        """
+        This test checks the per-event statuses and the stored interactions.
+        """
+        UserJobInteraction.objects.create(user=self.user, job=self.jobs[0], # pylint: disable=no-member
+                                          interaction_type='viewed')
+        events = [
+            {'job_id': 'batch-0', 'interaction_type': 'viewed'},
+            {'job_id': 'batch-1', 'interaction_type': 'viewed'},
+            {'job_id': 'batch-2', 'interaction_type': 'applied'},
+            {'job_id': 'missing', 'interaction_type': 'viewed'},
+            {'job_id': 'batch-1', 'interaction_type': 'liked'},
+            'not an event',
+        ]
+
+        response = self.post({'events': events})
+
+        self.assertEqual([item['status'] for item in response.json()['results']],
+                         ['exists', 'created', 'created', 'not_found', 'invalid', 'invalid'])
+        stored = set(UserJobInteraction.objects.filter(user=self.user).values_list( # pylint: disable=no-member
+            'job__job_id', 'interaction_type'))
+        self.assertEqual(stored, {('batch-0', 'viewed'), ('batch-1', 'viewed'),
+                                  ('batch-2', 'applied'), ('batch-2', 'viewed')})
+
+    def test_batch_uses_constant_queries(self):
+        """
+        This test checks that a batch costs the same queries whatever its size.
+        """
+        events = [{'job_id': f'batch-{i % 3}', 'interaction_type': kind}
+                  for i in range(30) for kind in ('viewed', 'applied')]
+
+        with self.assertNumQueries(3):
+            results = tracking.record_interactions(self.user, events)
+
+        self.assertEqual(len(results), 60)
+        self.assertEqual(UserJobInteraction.objects.count(), 6) # pylint: disable=no-member
+
+    @override_settings(TRACKING_BATCH_MAX_EVENTS=2)
+    def test_rejects_malformed_and_oversized_batches(self):
+        """
+        This test checks the validation of the request body.
+        """
+        event = {'job_id': 'batch-0', 'interaction_type': 'viewed'}
+
+        self.assertEqual(self.post({'events': [event] * 3}).status_code, 400)
+        self.assertEqual(self.post({'events': []}).status_code, 400)
+        self.assertEqual(self.post(['no', 'wrapper']).status_code, 400)
+        response = self.client.post(reverse('track_interactions'), data='{',
+                                    content_type='application/json',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 400)
@@ -4,9 +4,13 @@ This file contains the tests for the home app.
 """
 
 import datetime
-from unittest.mock import patch, MagicMock
+from io import StringIO
+from unittest.mock import AsyncMock, patch, MagicMock
 
-from django.test import TestCase, Client
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -15,7 +19,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 import requests
 
 from users.models import Profile, Resume # pylint: disable=import-error,no-name-in-module
-from home.models import JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
+from home.models import InterviewQuestionSet, JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
 from home.cover_letter_service import CoverLetterService # pylint: disable=import-error,no-name-in-module
 from home.interview_service import InterviewService # pylint: disable=import-error,no-name-in-module
 from home.views import get_job_specific_feedback # pylint: disable=import-error,no-name-in-module
@@ -129,8 +133,7 @@ class DashboardViewTest(TestCase):
             description='Test job description',
             url='https://example.com/job1',
             industry='Technology',
-            published_at=timezone.now(),
-            search_key='python'
+            published_at=timezone.now()
         )
 
         self.job2 = JobListing.objects.create(
@@ -141,8 +144,7 @@ class DashboardViewTest(TestCase):
             description='Another test job description',
             url='https://example.com/job2',
             industry='Data Science',
-            published_at=timezone.now(),
-            search_key='data-science'
+            published_at=timezone.now()
         )
 
     def test_dashboard_login_required(self):
@@ -272,8 +274,7 @@ class InterviewCoachViewTest(TestCase):
             Django, and API development.',
             url='https://example.com/job1',
             job_type='Full-time',
-            published_at=timezone.now(),
-            search_key='python'
+            published_at=timezone.now()
         )
 
         # URL with job ID
@@ -323,7 +324,8 @@ class InterviewCoachViewTest(TestCase):
     def test_ajax_evaluate_response(self):
         """Test the AJAX endpoint for evaluating responses"""
         # mocking the evaluation response
-        with patch('home.interview_service.InterviewService.evaluate_response') as mock_evaluate:
+        with patch('home.interview_service.InterviewService.aevaluate_response',
+                   new_callable=AsyncMock) as mock_evaluate:
             mock_evaluate.return_value = {
                 "score": 9,
                 "strengths": ["Excellent communication", "Strong technical knowledge"],
@@ -390,42 +392,42 @@ class InterviewCoachViewTest(TestCase):
             }
         )
 
-        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.status_code, 405)
         data = response.json()
         self.assertIn('error', data)
-        self.assertEqual(data['error'], 'Invalid request')
+        self.assertEqual(data['error'], 'Invalid request method')
 
     def test_ajax_generate_questions(self):
         """Test the API endpoint for generating questions asynchronously."""
         self.client.login(username='testuser', password='StrongTestPass123')
         generate_url = reverse('generate_questions')
 
-        with patch('home.interview_service.InterviewService.generate_interview_questions') \
-            as mock_generate:
+        with patch('home.interview_service.InterviewService.agenerate_interview_questions',
+                   new_callable=AsyncMock) as mock_generate:
             mock_generate.return_value = ["Generic Q1", "Generic Q2"]
             response = self.client.post(generate_url, {}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {'questions': ["Generic Q1", "Generic Q2"]})
-            mock_generate.assert_called_once_with("")
+            mock_generate.assert_called_once_with("", use_cache=True)
 
-        with patch('home.interview_service.InterviewService.generate_interview_questions') \
-            as mock_generate:
+        with patch('home.interview_service.InterviewService.agenerate_interview_questions',
+                   new_callable=AsyncMock) as mock_generate:
             mock_generate.return_value = ["Job Q1", "Job Q2"]
             response = self.client.post(generate_url,
             {'job_description': self.job.description}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {'questions': ["Job Q1", "Job Q2"]})
-            mock_generate.assert_called_once_with(self.job.description)
+            mock_generate.assert_called_once_with(self.job.description, use_cache=True)
 
     def test_ajax_generate_questions_error(self):
         """Test error handling in the question generation API."""
         self.client.login(username='testuser', password='StrongTestPass123')
         generate_url = reverse('generate_questions')
 
-        with patch('home.interview_service.InterviewService.generate_interview_questions') \
-            as mock_generate:
+        with patch('home.interview_service.InterviewService.agenerate_interview_questions',
+                   new_callable=AsyncMock) as mock_generate:
             mock_generate.side_effect = Exception("AI Service Down") # Simulate an error
             response = self.client.post(generate_url, {}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
 
@@ -433,6 +435,89 @@ class InterviewCoachViewTest(TestCase):
             self.assertEqual(response.json(),
                              {'error': 'Failed to generate questions. Please try again.'})
 
+    def test_job_questions_are_generated_once_and_stored(self):
+        """Test that questions for a listing are stored and served from the DB afterwards."""
+        self.client.login(username='testuser', password='StrongTestPass123')
+        generate_url = reverse('generate_questions')
+
+        with patch('home.interview_service.InterviewService.agenerate_interview_questions',
+                   new_callable=AsyncMock) as mock_generate:
+            mock_generate.return_value = ["Job Q1", "Job Q2"]
+            for _ in range(2):
+                response = self.client.post(generate_url, {'job_id': self.job.job_id},
+                                            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                self.assertEqual(response.json(), {'questions': ["Job Q1", "Job Q2"]})
+
+            mock_generate.assert_called_once_with(self.job.description, use_cache=True)
+
+        response = self.client.get(self.interview_coach_with_job_url)
+        self.assertEqual(response.context['questions'], ["Job Q1", "Job Q2"])
+        self.assertContains(response, 'id="stored-questions"')
+
+    def regenerate_questions(self):
+        """
+        This method asks for new questions for the job, as the Regenerate button does.
+        """
+        InterviewQuestionSet.objects.update_or_create( # pylint: disable=no-member
+            job=self.job, defaults={
+                'questions': ["Old Q"],
+                'description_hash': InterviewService._description_hash(self.job)}) # pylint: disable=protected-access,no-member
+
+        with patch('home.interview_service.InterviewService.agenerate_interview_questions',
+                   new_callable=AsyncMock) as mock_generate:
+            mock_generate.return_value = ["New Q"]
+            response = self.client.post(reverse('generate_questions'),
+                                        {'job_id': self.job.job_id, 'regenerate': '1'},
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+            mock_generate.assert_called_once_with(self.job.description, use_cache=False)
+        self.assertEqual(response.json(), {'questions': ["New Q"]})
+
+    def test_regenerate_keeps_shared_job_questions(self):
+        """Test that a user's regenerate bypasses the caches without replacing the shared set."""
+        self.client.login(username='testuser', password='StrongTestPass123')
+
+        self.regenerate_questions()
+
+        self.assertEqual(InterviewService.stored_questions(self.job), ["Old Q"]) ## pylint: disable=no-member
+
+    def test_staff_regenerate_replaces_stored_job_questions(self):
+        """Test that staff can replace the shared question set of a job."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username='testuser', password='StrongTestPass123')
+
+        self.regenerate_questions()
+
+        self.assertEqual(InterviewService.stored_questions(self.job), ["New Q"]) ## pylint: disable=no-member
+
+    def test_stored_questions_expire_when_description_changes(self):
+        """Test that a changed job description invalidates the stored questions."""
+        InterviewQuestionSet.objects.create( # pylint: disable=no-member
+            job=self.job, questions=["Old Q"],
+            description_hash=InterviewService._description_hash(self.job)) # pylint: disable=protected-access,no-member
+        self.assertEqual(InterviewService.stored_questions(self.job), ["Old Q"]) ## pylint: disable=no-member
+
+        self.job.description = 'Now a Go role.'
+        self.job.save()
+
+        self.assertIsNone(InterviewService.stored_questions(self.job)) ## pylint: disable=no-member
+
+    @patch('home.interview_service.InterviewService.get_api_key', return_value='fake_key')
+    def test_warm_interview_questions_command(self, _api_key):
+        """Test that the warm-up pass stores questions for recent listings only once."""
+        JobListing.objects.create(job_id='test-job-2', title='Go Developer',
+                                  company='Test Company', description='')
+
+        with patch('home.interview_service.InterviewService.generate_interview_questions') \
+            as mock_generate:
+            mock_generate.return_value = ["Warm Q"]
+            call_command('warm_interview_questions', stdout=StringIO())
+            call_command('warm_interview_questions', stdout=StringIO())
+
+            mock_generate.assert_called_once_with(self.job.description, use_cache=True)
+        self.assertEqual(InterviewService.stored_questions(self.job), ["Warm Q"]) ## pylint: disable=no-member
+
 
 class InterviewServiceTest(TestCase):
     """tests for the InterviewService class"""
@@ -655,8 +740,7 @@ class CoverLetterGeneratorViewTest(TestCase):
             description='This job requires expertise in Python, Django, and API development.',
             url='https://example.com/job1',
             job_type='Full-time',
-            published_at=timezone.now(),
-            search_key='python'
+            published_at=timezone.now()
         )
 
         self.cover_letter_with_job_url = reverse('cover_letter_generator_with_job',
@@ -734,7 +818,7 @@ class CoverLetterGeneratorViewTest(TestCase):
             )
     def test_generate_cover_letter_api_error(self):
         """tests that the cover letter is generated when the api error occurs"""
-        with patch('home.cover_letter_service.requests.post') as mock_post, \
+        with patch('home.cover_letter_service.http_client.post') as mock_post, \
              patch.object(CoverLetterService, 'get_api_key', return_value='fake-key'):
 
             mock_post.return_value.status_code = 500
@@ -748,7 +832,7 @@ class CoverLetterGeneratorViewTest(TestCase):
             self.assertIn("Dear Hiring Manager", result)  # fallback letter
     def test_generate_cover_letter_api_exception(self):
         """tests that the cover letter is generated when the api exception occurs"""
-        with patch('home.cover_letter_service.requests.post',
+        with patch('home.cover_letter_service.http_client.post',
                    side_effect=requests.RequestException("Connection error")), \
              patch.object(CoverLetterService, 'get_api_key', return_value='fake-key'):
 
@@ -778,13 +862,6 @@ class CoverLetterGeneratorViewTest(TestCase):
         self.assertIsInstance(result, bytes)
         self.assertTrue(len(result) > 0)
 
-    @patch('home.cover_letter_service.PdfReader', side_effect=ValueError("boom!"))
-    def test_extract_text_from_resume_error(self, mock_pdf_reader): # pylint: disable=unused-argument
-        """Test error handling when PDF extraction fails."""
-        mock_file = MagicMock()
-        result = CoverLetterService.extract_text_from_resume(mock_file)
-        self.assertIsNone(result) # Check that None is returned on error
-
 
 class ResumeFeedbackTest(TestCase):# pylint: disable=too-many-instance-attributes
     """tests for the resume feedback"""
@@ -805,8 +882,7 @@ class ResumeFeedbackTest(TestCase):# pylint: disable=too-many-instance-attribute
             description='This job requires expertise in Python, Django, and API development.',
             url='https://example.com/job1',
             job_type='Full-time',
-            published_at=timezone.now(),
-            search_key='python'
+            published_at=timezone.now()
         )
         self.resume_content = b"Bob Smith\nSenior Python Developer\n \
             5 years experience in Python, Django"
@@ -868,7 +944,8 @@ class ResumeFeedbackTest(TestCase):# pylint: disable=too-many-instance-attribute
 
     def test_get_job_specific_feedback(self):
         """tests that the job specific feedback is generated"""
-        with patch('openai.chat.completions.create') as mock_openai:
+        with patch('home.views.http_client.get_openai_client') as mock_client:
+            mock_openai = mock_client.return_value.chat.completions.create
             mock_openai.return_value.choices = \
                 [MagicMock(message=MagicMock(content="Mocked feedback"))]
 
@@ -888,7 +965,8 @@ class ResumeFeedbackTest(TestCase):# pylint: disable=too-many-instance-attribute
             self.assertTrue(result.startswith("<h2>Error</h2>"),
                             "Error message should start with H2")
 
-        with patch('openai.chat.completions.create', side_effect=Exception("API error")):
+        with patch('home.views.http_client.get_openai_client',
+                   **{'return_value.chat.completions.create.side_effect': Exception("API error")}):
             result = get_job_specific_feedback("Resume text", "Job description")
             self.assertTrue(result.startswith("<h2>Error</h2>"),
                             "Error message should start with H2")
@@ -914,8 +992,7 @@ class ApplyFlowViewTest(TestCase):
             description='This job requires expertise in Python, Django, and API development.',
             url='https://example.com/job1',
             job_type='Full-time',
-            published_at=timezone.now(),
-            search_key='python'
+            published_at=timezone.now()
         )
         self.resume_content = b"Bob Smith\nSenior Python Developer\n \
             5 years experience in Python, Django"
@@ -957,7 +1034,8 @@ class ApplyFlowViewTest(TestCase):
         """tests that the job outlook is generated when the job title is provided"""
         self.client.login(username='testuser', password='StrongTestPass123')
 
-        with patch('home.views.get_job_fit_analysis', return_value="Sample job fit analysis"), \
+        with patch('home.async_views.aget_job_fit_analysis', new_callable=AsyncMock,
+                   return_value="Sample job fit analysis"), \
              patch('users.views.parse_resume', return_value="Resume content"):
 
             response = self.client.post(
@@ -998,7 +1076,7 @@ class ApplyFlowViewTest(TestCase):
         """tests that the rejection simulator is generated when the job title is provided"""
         self.client.login(username='testuser', password='StrongTestPass123')
 
-        with patch('home.views.generate_rejection_reasons',
+        with patch('home.async_views.agenerate_rejection_reasons', new_callable=AsyncMock,
                    return_value="Sample rejection reasons"), \
              patch('users.views.parse_resume', return_value="Resume content"):
 
@@ -1136,3 +1214,49 @@ class JobTrackingTest(TestCase):
         self.assertIn(self.job1, response.context['viewed_jobs_list'])
         self.assertNotIn(self.job2, response.context['viewed_jobs_list'],\
                          "Applied job should not appear in the viewed list.")
+
+
+@override_settings(APPLICATIONS_PAGE_SIZE=2)
+class ApplicationsPaginationTest(TestCase):
+    """tests for the paginated applications page"""
+    def setUp(self):
+        """creates a user who viewed five jobs and applied to two of them"""
+        self.user = User.objects.create_user(username='heavyuser', password='StrongTestPass123')
+        self.jobs = [JobListing.objects.create(job_id=f'history-{i}', title=f'History Job {i}',
+                                               company='Acme') for i in range(5)]
+        start = timezone.now()
+        for i, job in enumerate(self.jobs):
+            UserJobInteraction.objects.create(user=self.user, job=job, interaction_type='viewed')
+            if i < 2:
+                UserJobInteraction.objects.create(user=self.user, job=job,
+                                                  interaction_type='applied')
+        for i, interaction in enumerate(UserJobInteraction.objects.order_by('id')):
+            UserJobInteraction.objects.filter(pk=interaction.pk).update(
+                timestamp=start + datetime.timedelta(minutes=i))
+        self.client.login(username='heavyuser', password='StrongTestPass123')
+
+    def test_first_pages_and_totals_in_one_query(self):
+        """tests that both lists and their totals come from a single query"""
+        self.client.get(reverse('applications'))  # warm the session and user lookups
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('applications'))
+        history_queries = [q for q in queries if 'home_userjobinteraction' in q['sql']]
+
+        self.assertEqual(len(history_queries), 1)
+        self.assertEqual(response.context['applied_jobs_list'], [self.jobs[1], self.jobs[0]])
+        self.assertEqual(response.context['viewed_jobs_list'], [self.jobs[4], self.jobs[3]])
+        self.assertEqual(response.context['applied_page']['count'], 2)
+        self.assertEqual(response.context['viewed_page']['count'], 3)
+        self.assertEqual(response.context['viewed_page']['next'], 2)
+
+    def test_later_and_out_of_range_pages(self):
+        """tests the last viewed page and a page past the end"""
+        response = self.client.get(reverse('applications'),
+                                   {'viewed_page': 2, 'applied_page': 5, 'show': 'viewed'})
+
+        self.assertEqual(response.context['viewed_jobs_list'], [self.jobs[2]])
+        self.assertEqual(response.context['applied_jobs_list'], [])
+        self.assertEqual(response.context['applied_page']['count'], 2)
+        self.assertIsNone(response.context['viewed_page']['next'])
+        self.assertEqual(response.context['show'], 'viewed')
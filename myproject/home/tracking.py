@@ -0,0 +1,240 @@
+"""
+This file contains the write-behind buffer for job view tracking and the batch
+recording of job interactions.
+
+Opening a job card (a 'viewed' event sent to the batch tracking endpoint) only
+appends (user, job) to an in-process buffer. The buffer
+drops duplicates and writes everything in one bulk insert once it holds
+JOB_VIEW_BUFFER_SIZE events, JOB_VIEW_BUFFER_SECONDS after the first pending
+event, or when the process exits. Views already in the database are skipped by
+the (user, job, interaction_type) unique constraint. A batch that fails to write
+(e.g. "database is locked") goes back into the buffer and is retried with the
+next flush; at most JOB_VIEW_BUFFER_MAX_PENDING views are kept, oldest dropped first.
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from .models import JobListing, UserJobInteraction
+
+DEFAULT_BUFFER_SIZE = 50
+DEFAULT_BUFFER_SECONDS = 5.0
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_BATCH_MAX_EVENTS = 100
+INTERACTION_TYPES = {kind for kind, _ in UserJobInteraction.INTERACTION_TYPES}
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """
+    Pending job views, keyed by (user id, Jobicy job id), in arrival order.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, user_id: int, job_id: str) -> bool:
+        """
+        This method queues one view and returns False if it was already pending.
+        The buffer is flushed in the calling thread once it is full.
+        """
+        with self._lock:
+            key = (user_id, job_id)
+            if key in self._pending:
+                return False
+            self._pending[key] = None
+            full = len(self._pending) >= get_buffer_size()
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+        return True
+
+    def _schedule(self) -> None:
+        """
+        This method starts the flush timer unless one is running. The caller holds the lock.
+        """
+        if self._timer is None:
+            self._timer = threading.Timer(get_buffer_seconds(), self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _requeue(self, pending: List) -> None:
+        """
+        This method puts a batch that failed to write back in front of the views
+        queued since, dropping the oldest beyond JOB_VIEW_BUFFER_MAX_PENDING, and
+        schedules the retry.
+        """
+        with self._lock:
+            merged = list(dict.fromkeys(pending + list(self._pending)))
+            dropped = max(len(merged) - get_max_pending(), 0)
+            self._pending = dict.fromkeys(merged[dropped:])
+            if self._pending:
+                self._schedule()
+        if dropped:
+            logger.warning("Dropped %d buffered job views over the buffer limit", dropped)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        This method writes the pending views in one bulk insert and returns how many
+        were attempted. Views of unknown job ids are dropped; if the write fails the
+        views are requeued and 0 is returned.
+        """
+        with self._lock:
+            pending, self._pending = list(self._pending), {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            job_pks = dict(JobListing.objects.filter( # pylint: disable=no-member
+                job_id__in={job_id for _, job_id in pending}).values_list('job_id', 'pk'))
+            UserJobInteraction.objects.bulk_create([ # pylint: disable=no-member
+                UserJobInteraction(user_id=user_id, job_id=job_pks[job_id],
+                                   interaction_type='viewed')
+                for user_id, job_id in pending if job_id in job_pks
+            ], ignore_conflicts=True)
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.error("Failed to flush %d buffered job views, will retry", len(pending),
+                         exc_info=True)
+            self._requeue(pending)
+            return 0
+        return len(pending)
+
+    def _flush_from_timer(self) -> None:
+        """
+        This method is the timer thread body; it owns its own DB connection.
+        """
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+_buffer = ViewBuffer()
+
+
+def get_buffer_size() -> int:
+    """
+    This function returns how many pending views trigger a flush.
+    """
+    return getattr(settings, 'JOB_VIEW_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+
+
+def get_buffer_seconds() -> float:
+    """
+    This function returns how long a view may stay pending before it is written.
+    """
+    return getattr(settings, 'JOB_VIEW_BUFFER_SECONDS', DEFAULT_BUFFER_SECONDS)
+
+
+def get_max_pending() -> int:
+    """
+    This function returns how many views the buffer keeps while writes are failing.
+    """
+    return getattr(settings, 'JOB_VIEW_BUFFER_MAX_PENDING', DEFAULT_MAX_PENDING)
+
+
+def is_enabled() -> bool:
+    """
+    This function returns whether job views are buffered (JOB_VIEW_WRITE_BEHIND).
+    """
+    return getattr(settings, 'JOB_VIEW_WRITE_BEHIND', True)
+
+
+def record_view(user_id: int, job_id: str) -> bool:
+    """
+    This function queues a job view and returns False if it was already pending.
+    """
+    return _buffer.add(user_id, job_id)
+
+
+def flush() -> int:
+    """
+    This function writes all pending job views now.
+    """
+    return _buffer.flush()
+
+
+def pending_count() -> int:
+    """
+    This function returns the number of views waiting to be written.
+    """
+    return len(_buffer)
+
+
+def get_batch_max_events() -> int:
+    """
+    This function returns how many events one batch tracking request may carry.
+    """
+    return getattr(settings, 'TRACKING_BATCH_MAX_EVENTS', DEFAULT_BATCH_MAX_EVENTS)
+
+
+def record_interactions(user, events: List[Any]) -> List[Dict[str, Any]]:
+    """
+    This function stores a batch of {job_id, interaction_type} events for `user`
+    and returns one {job_id, interaction_type, status} per event, in order. Status
+    is 'created', 'queued', 'exists', 'not_found' or 'invalid'. Applying also
+    records a view, as ajax_track_application does.
+
+    All job ids are resolved with one query, already stored interactions are read
+    with a second and the new ones are written with a single bulk insert. With
+    JOB_VIEW_WRITE_BEHIND, new 'viewed' events go to the view buffer instead and
+    are reported as 'queued'.
+    """
+    parsed = []
+    for event in events:
+        if isinstance(event, dict) and isinstance(event.get('job_id'), str) \
+                and event.get('interaction_type') in INTERACTION_TYPES:
+            parsed.append((event['job_id'], event['interaction_type']))
+        else:
+            parsed.append(None)
+
+    job_pks = dict(JobListing.objects.filter( # pylint: disable=no-member
+        job_id__in={event[0] for event in parsed if event}).values_list('job_id', 'pk'))
+    existing = set(UserJobInteraction.objects.filter( # pylint: disable=no-member
+        user=user, job_id__in=job_pks.values()).values_list('job_id', 'interaction_type'))
+
+    to_create = {}
+    results = []
+    for event, raw in zip(parsed, events):
+        if event is None:
+            raw = raw if isinstance(raw, dict) else {}
+            results.append({'job_id': raw.get('job_id'),
+                            'interaction_type': raw.get('interaction_type'),
+                            'status': 'invalid'})
+            continue
+        job_id, interaction_type = event
+        status = 'not_found'
+        if job_id in job_pks:
+            key = (job_pks[job_id], interaction_type)
+            status = 'exists' if key in existing or key in to_create else 'created'
+            if interaction_type == 'viewed' and status == 'created' and is_enabled():
+                status = 'queued' if record_view(user.pk, job_id) else 'exists'
+                results.append({'job_id': job_id, 'interaction_type': interaction_type,
+                                'status': status})
+                continue
+            implied = [key] + ([(key[0], 'viewed')] if interaction_type == 'applied' else [])
+            for pk_and_type in implied:
+                if pk_and_type not in existing:
+                    to_create.setdefault(pk_and_type, None)
+        results.append({'job_id': job_id, 'interaction_type': interaction_type,
+                        'status': status})
+
+    if to_create:
+        UserJobInteraction.objects.bulk_create([ # pylint: disable=no-member
+            UserJobInteraction(user=user, job_id=job_pk, interaction_type=interaction_type)
+            for job_pk, interaction_type in to_create
+        ], ignore_conflicts=True)
+    return results
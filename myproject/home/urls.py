@@ -3,20 +3,25 @@ This file contains the urls for the home app.
 """
 
 from django.urls import path
-from . import views
+from . import async_views, task_views, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('ajax/dashboard-results/',
+         views.ajax_dashboard_results, name='dashboard_results'),
+    path('ajax/job-description/<str:job_id>/',
+         views.ajax_job_description, name='job_description'),
     path('interview-coach/', views.interview_coach, name='interview_coach'),
     path('interview-coach/<str:job_id>/',
          views.interview_coach, name='interview_coach_with_job'),
     path('rejection-simulator/<str:job_id>/',
          views.rejection_simulator_page, name='rejection_simulator'),
+    # the AI endpoints are served by the async views, under both URL prefixes
     path('api/evaluate-response/',
-         views.ajax_evaluate_response, name='evaluate_response'),
+         async_views.ajax_evaluate_response, name='evaluate_response'),
     path('api/generate-questions/',
-         views.ajax_generate_questions, name='generate_questions'),
+         async_views.ajax_generate_questions, name='generate_questions'),
     path('applications/', views.applications, name='applications'),
     path('apply/<str:job_id>/', views.apply_flow, name='apply_flow'),
     path('cover-letter/',
@@ -24,19 +29,41 @@ urlpatterns = [
     path('cover-letter/<str:job_id>/',
          views.cover_letter_generator, name='cover_letter_generator_with_job'),
     path('ajax/generate-cover-letter/',
-         views.ajax_generate_cover_letter, name='ajax_generate_cover_letter'),
+         async_views.ajax_generate_cover_letter, name='ajax_generate_cover_letter'),
     path('generate-cover-letter-pdf/',
          views.generate_cover_letter_pdf, name='generate_cover_letter_pdf'),
     path('ajax/resume-feedback/',
-         views.ajax_resume_feedback, name='resume_feedback'),
+         async_views.ajax_resume_feedback, name='resume_feedback'),
     path('ajax/job-outlook/',
-         views.ajax_job_outlook, name='job_outlook'),
+         async_views.ajax_job_outlook, name='job_outlook'),
     path('ajax/rejection-generator/',
-         views.ajax_rejection_generator, name='rejection_generator'),
+         async_views.ajax_rejection_generator, name='rejection_generator'),
     path('ajax/track-job-view/',
          views.ajax_track_job_view, name='track_job_view'),
     path('ajax/track-application/',
          views.ajax_track_application, name='track_application'),
+    path('ajax/track-interactions/',
+         views.ajax_track_interactions, name='track_interactions'),
     path('fit-analysis/<str:job_id>/',
          views.job_fit_analysis_page, name='job_fit_analysis'),
+    path('async/api/evaluate-response/',
+         async_views.ajax_evaluate_response, name='evaluate_response_async'),
+    path('async/api/generate-questions/',
+         async_views.ajax_generate_questions, name='generate_questions_async'),
+    path('async/ajax/generate-cover-letter/',
+         async_views.ajax_generate_cover_letter, name='ajax_generate_cover_letter_async'),
+    path('async/ajax/resume-feedback/',
+         async_views.ajax_resume_feedback, name='resume_feedback_async'),
+    path('async/ajax/job-outlook/',
+         async_views.ajax_job_outlook, name='job_outlook_async'),
+    path('async/ajax/rejection-generator/',
+         async_views.ajax_rejection_generator, name='rejection_generator_async'),
+    path('async/ajax/stream-cover-letter/',
+         async_views.ajax_stream_cover_letter, name='ajax_stream_cover_letter'),
+    path('async/resume/<int:resume_id>/feedback/stream/',
+         async_views.resume_feedback_stream, name='resume_feedback_stream'),
+    path('tasks/<str:kind>/',
+         task_views.ajax_enqueue_ai_task, name='enqueue_ai_task'),
+    path('tasks/status/<uuid:task_id>/',
+         task_views.ai_task_status, name='ai_task_status'),
 ]
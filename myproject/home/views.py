@@ -2,28 +2,47 @@
 This module contains the views for the home page.
 """
 import base64
-import os
+import html
+import json
 import logging
+import re
 
 from openai import APITimeoutError
-import openai
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse, HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from django.views.decorators.http import require_GET
 import markdown
 
-from users.views import parse_resume, get_resume_feedback ## pylint: disable=import-error,no-name-in-module,wrong-import-order
+from users.views import get_resume_text, resume_parse_failed ## pylint: disable=import-error,no-name-in-module,wrong-import-order
 from users.models import Resume ## pylint: disable=import-error,no-name-in-module,wrong-import-order
 from home.models import JobListing, UserJobInteraction # pylint: disable=import-error,no-name-in-module
 
 from .forms import SearchJobForm, CoverLetterForm # pylint: disable=import-error,no-name-in-module
+from . import completion_cache, http_client, tracking
+from .pagination import paginate_results
+from .serializers import serialize_listing
 from .services import JobicyService # pylint: disable=import-error,no-name-in-module
 from .interview_service import InterviewService # pylint: disable=import-error,no-name-in-module
 from .cover_letter_service import CoverLetterService # pylint: disable=import-error,no-name-in-module
 
 logger = logging.getLogger(__name__)
 
+JOB_FEEDBACK_NO_KEY_ERROR = "## Error\n\nJob-specific feedback requires an OpenAI API key."
+JOB_FEEDBACK_TIMEOUT_ERROR = ("## Error\n\nUnable to generate job-specific feedback: "
+                              "The request to the AI service timed out after 60 seconds. "
+                              "Please try again later.")
+JOB_FEEDBACK_GENERIC_ERROR = ("## Error\n\nUnable to generate job-specific feedback: "
+                              "An unexpected error occurred.")
+DEFAULT_APPLICATIONS_PAGE_SIZE = 20
+APPLICATION_LISTS = ('applied', 'viewed')
+_BLOCK_END_RE = re.compile(r'<br\s*/?>|</(?:p|li|div|h[1-6])>', re.IGNORECASE)
+
 def index(request):
     """
     View to handle the index page.
@@ -92,48 +111,105 @@ def dashboard(request): ## pylint: disable=too-many-branches
              logger.debug("GET request with empty initial_data, not performing search.") ## pylint: disable=bad-indentation
              job_list = []## pylint: disable=bad-indentation
 
+    page = paginate_results(job_list)
     context = {
         'form': form,
-        'job_list': job_list
+        'job_list': page.jobs,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'home/dashboard.html', context)
 
+def results_page_response(request, job_list):
+    """
+    This function renders the page of `job_list` after the `cursor` GET parameter
+    as the JSON the infinite scroll on the result pages appends.
+    """
+    page = paginate_results(job_list, request.GET.get('cursor'))
+    cards = render_to_string('home/job_cards.html', {'jobs': page.jobs}, request=request)
+    return JsonResponse({'html': cards, 'next_cursor': page.next_cursor,
+                         'count': len(page.jobs),
+                         'jobs': [serialize_listing(job) for job in page.jobs]})
+
+@login_required
+@require_GET
+def ajax_dashboard_results(request):
+    """
+    View to handle the next page of the dashboard search results. It repeats the
+    last search stored in the session, which is answered from the search cache.
+    """
+    last_search = request.session.get('last_search_params') or {}
+    search_term = last_search.get('search_term', '')
+    params = {}
+    if last_search.get('location'):
+        params['geo'] = last_search['location']
+    if last_search.get('industry'):
+        params['industry'] = last_search['industry']
+
+    job_list = JobicyService.search_jobs(search_term, params) if search_term or params else []
+    return results_page_response(request, job_list)
+
+@login_required
+@require_GET
+def ajax_job_description(request, job_id): # pylint: disable=unused-argument
+    """
+    View to handle loading the full description of a job card when it is expanded.
+    The listing HTML comes from a third party, so it is returned as plain text.
+    """
+    job = get_object_or_404(JobListing.objects.only('job_id', 'description'), job_id=job_id)
+    text = html.unescape(strip_tags(_BLOCK_END_RE.sub('\n', job.description or '')))
+    description = re.sub(r'\n\s*\n+', '\n\n', text).strip()
+    return JsonResponse({'job_id': job.job_id, 'description': description})
+
+def page_number(value):
+    """
+    This function parses a 1-based page number from a query parameter.
+    """
+    return int(value) if value and value.isdigit() and int(value) > 0 else 1
+
+def applications_page(total, number, page_size):
+    """
+    This function describes one page of an applications list for the template.
+    """
+    num_pages = max(1, -(-total // page_size))
+    return {'number': number, 'count': total, 'num_pages': num_pages,
+            'previous': number - 1 if number > 1 else None,
+            'next': number + 1 if number < num_pages else None}
+
 @login_required
 def applications(request):
     """
-    View to handle the applications page.
-    """
-    applied_interactions = UserJobInteraction.objects.filter(
-        user=request.user,
-        interaction_type='applied'
-    ).select_related('job').order_by('-timestamp')
-
-    applied_jobs_list = []
-    applied_job_ids = set()
-    for interaction in applied_interactions:
-        if interaction.job.job_id not in applied_job_ids:
-            applied_jobs_list.append(interaction.job)
-            applied_job_ids.add(interaction.job.job_id)
-
-    viewed_interactions = UserJobInteraction.objects.filter(
-        user=request.user,
-        interaction_type='viewed'
-    ).exclude(
-        job__job_id__in=applied_job_ids
-    ).select_related('job').order_by('-timestamp')
-
-    viewed_jobs_list = []
-    viewed_job_ids_processed = set()
-    for interaction in viewed_interactions:
-        if interaction.job.job_id not in viewed_job_ids_processed:
-            viewed_jobs_list.append(interaction.job)
-            viewed_job_ids_processed.add(interaction.job.job_id)
+    View to handle the applications page. One query returns a page of applied jobs,
+    a page of viewed jobs (excluding jobs also applied to) and both totals, so the
+    cost does not grow with the user's history.
+    """
+    page_size = getattr(settings, 'APPLICATIONS_PAGE_SIZE', DEFAULT_APPLICATIONS_PAGE_SIZE)
+    numbers = {kind: page_number(request.GET.get(f'{kind}_page'))
+               for kind in APPLICATION_LISTS}
+
+    interactions = UserJobInteraction.objects.filter(user=request.user).without_applied_views()
+    jobs = {kind: [] for kind in APPLICATION_LISTS}
+    totals = {}
+    for interaction in interactions.for_list().page_per_type(
+            {kind: (number - 1) * page_size for kind, number in numbers.items()}, page_size):
+        interaction.job.description_preview = interaction.description_preview
+        jobs[interaction.interaction_type].append(interaction.job)
+        totals[interaction.interaction_type] = interaction.type_total
+
+    # a page past the end has no rows to carry its total; count it separately
+    missing = [kind for kind in APPLICATION_LISTS if kind not in totals and numbers[kind] > 1]
+    if missing:
+        totals.update(interactions.filter(interaction_type__in=missing).values_list(
+            'interaction_type').annotate(total=Count('id')).order_by())
 
     context = {
         'user': request.user,
-        'applied_jobs_list': applied_jobs_list,
-        'viewed_jobs_list': viewed_jobs_list
+        'applied_jobs_list': jobs['applied'],
+        'viewed_jobs_list': jobs['viewed'],
+        'show': 'viewed' if request.GET.get('show') == 'viewed' else 'applied',
     }
+    for kind in APPLICATION_LISTS:
+        context[f'{kind}_page'] = applications_page(totals.get(kind, 0), numbers[kind],
+                                                    page_size)
 
     return render(request, 'home/applications.html', context)
 
@@ -142,59 +218,25 @@ def applications(request):
 def interview_coach(request, job_id=None):
     """
     View to handle the interview coach functionality.
-    Renders the page initially, questions are loaded via AJAX.
+    Questions already stored for the job are rendered with the page; otherwise
+    they are loaded via AJAX.
     """
     job = None
     job_description = ""
+    questions = []
 
     if job_id:
         job = get_object_or_404(JobListing, job_id=job_id)
         job_description = job.description
+        questions = InterviewService.stored_questions(job) or []
 
     context = {
         'job': job,
         'job_description': job_description,
-        'questions': [],
+        'questions': questions,
     }
     return render(request, 'home/interview_coach.html', context)
 
-@login_required
-def ajax_generate_questions(request):
-    """API endpoint to generate interview questions asynchronously."""
-    if (request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
-        job_description = request.POST.get('job_description', '')
-
-        try:
-            questions = InterviewService.generate_interview_questions(job_description)
-            return JsonResponse({'questions': questions})
-        except Exception: # pylint: disable=broad-exception-caught
-            return JsonResponse({'error': 'Failed to generate questions. Please try again.'},
-                                status=500)
-
-    return JsonResponse({'error': 'Invalid request method'}, status=405)
-
-
-@login_required
-def ajax_evaluate_response(request):
-    """API endpoint to evaluate interview responses asynchronously"""
-    if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        data = request.POST
-        question = data.get('question', '')
-        response = data.get('response', '')
-        job_description = data.get('job_description', '')
-
-        if not response:
-            return JsonResponse({'error': 'Response is required'}, status=400)
-
-        try:
-            feedback = InterviewService.evaluate_response(question, response, job_description)
-            return JsonResponse(feedback)
-        except Exception: # pylint: disable=broad-exception-caught
-            return JsonResponse({'error': \
-            'Unable to evaluate response. Please try again later.'}, status=500)
-
-    return JsonResponse({'error': 'Invalid request'}, status=400)
-
 def search_jobs():
     """
     Placeholder function for legacy compatibility
@@ -218,8 +260,7 @@ def apply_flow(request, job_id):
     resume_text = None
     if has_resume:
         try:
-            resume_file = latest_resume.resume
-            resume_text = parse_resume(resume_file)
+            resume_text = get_resume_text(latest_resume)
         except Exception: # pylint: disable=broad-exception-caught
             messages.error(request, "Error extracting text from your resume")
 
@@ -245,138 +286,59 @@ def apply_flow(request, job_id):
     }
     return render(request, 'home/apply_flow.html', context)
 
-@login_required
-def ajax_resume_feedback(request):
-    """AJAX endpoint to get feedback on a resume for a specific job."""
-    if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        job_description = request.POST.get('job_description', '')
-        resume_id = request.POST.get('resume_id')
-
-        if not resume_id:
-            return JsonResponse({'error': 'No resume selected'}, status=400)
-
-        try:
-            resume = Resume.objects.get(id=resume_id, user=request.user)
-            resume_file = resume.resume
-
-            resume_text = parse_resume(resume_file)
-
-            general_feedback = get_resume_feedback(resume_text)
-
-            job_specific_feedback = get_job_specific_feedback(resume_text, job_description)
-
-            return JsonResponse({
-                'success': True,
-                'general_feedback': general_feedback,
-                'job_specific_feedback': job_specific_feedback
-            })
-        except Resume.DoesNotExist:
-            return JsonResponse({'error': 'Resume not found'}, status=404)
-        except Exception: # pylint: disable=broad-exception-caught
-            return JsonResponse({'error': \
-            'Unable to generate resume feedback. Please try again later.'}, status=500)
-
-    return JsonResponse({'error': 'Invalid request'}, status=400)
+def job_specific_feedback_request(resume_text, job_description):
+    """
+    Build the chat completion request for job-specific resume feedback.
+    """
+    system_prompt = "You are an expert at analyzing resumes against job descriptions..."
+    user_prompt_template = "Resume:\n{resume_text}\n\nJob Description:\n{job_description}..."
+    user_prompt = user_prompt_template.format(resume_text=resume_text,
+                                              job_description=job_description)
+    return {
+        'model': "gpt-4o-mini",
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+    }
 
 def get_job_specific_feedback(resume_text, job_description):
     """
     Generate job-specific feedback for a candidate's resume based on a job description.
     """
     try:
-        if os.environ.get('OPENAI_API_KEY'):
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-        else:
-            return markdown.markdown("## Error\n\nJob-specific \
-                                      feedback requires an OpenAI API key.")
-
-        model_name = "gpt-4o-mini"
-        system_prompt = "You are an expert at analyzing resumes against job descriptions..."
-        user_prompt_template = "Resume:\n{resume_text}\n\nJob Description:\n{job_description}..."
-        user_prompt = user_prompt_template.format(resume_text=resume_text,
-                                                   job_description=job_description)
-
-        response = openai.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            timeout=60.0,
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
+            return markdown.markdown(JOB_FEEDBACK_NO_KEY_ERROR)
+
+        content = completion_cache.create_completion(
+            'job_specific_feedback', api_key,
+            job_specific_feedback_request(resume_text, job_description)
         )
 
-        return markdown.markdown(response.choices[0].message.content)
+        return markdown.markdown(content)
     except APITimeoutError:
-        return markdown.markdown("## Error\n\nUnable to generate job-specific feedback: \
-                                 The request to the AI service timed out after 60 seconds. \
-                                 Please try again later.")
+        return markdown.markdown(JOB_FEEDBACK_TIMEOUT_ERROR)
     except Exception: # pylint: disable=broad-exception-caught
-        return markdown.markdown("## Error\n\nUnable to generate job-specific feedback: \
-                                 An unexpected error occurred.")
-
-@login_required
-def ajax_generate_cover_letter(request):
-    """Handles AJAX request to generate cover letter text."""
-    if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        form = CoverLetterForm(request.POST)
-        if form.is_valid():
-            job_description = form.cleaned_data['job_description']
-            use_resume = form.cleaned_data['use_resume']
-            user_info = {
-                'name': form.cleaned_data['user_name'],
-                'email': form.cleaned_data['user_email'],
-                'phone': form.cleaned_data['user_phone'],
-                'address': form.cleaned_data['user_address']
-            }
-
-            resume_text = None
-            if use_resume:
-                latest_resume = \
-                Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
-                if latest_resume:
-                    try:
-                        resume_file = latest_resume.resume
-                        resume_text = CoverLetterService.extract_text_from_resume(resume_file)
-                    except Exception: # pylint: disable=broad-exception-caught
-                        return JsonResponse({'error': 'Unable to process your resume. \
-                                             Please try again later.'}, status=500)
-                else:
-                    return JsonResponse({'error': 'Resume not found. \
-                                         Please upload a resume first.'}, status=400)
+        return markdown.markdown(JOB_FEEDBACK_GENERIC_ERROR)
 
-            try:
-                cover_letter_text = CoverLetterService.generate_cover_letter(
-                    job_description=job_description,
-                    resume_text=resume_text,
-                    user_info=user_info
-                )
-
-                company_name = form.cleaned_data.get('company_name')
-                job_title = form.cleaned_data.get('job_title')
-
-                if company_name:
-                    cover_letter_text = cover_letter_text.replace('[Company Name]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[COMPANY NAME]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[Employer Name]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[EMPLOYER NAME]', company_name)
-
-                if job_title:
-                    cover_letter_text = cover_letter_text.replace('[Position Title]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[POSITION TITLE]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[Job Title]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[JOB TITLE]', job_title)
-
-                return JsonResponse({
-                    'success': True,
-                    'cover_letter_text': cover_letter_text
-                })
+def fill_cover_letter_placeholders(cover_letter_text, company_name=None, job_title=None):
+    """
+    Replace the template placeholders with the company name and job title, if known.
+    """
+    if company_name:
+        cover_letter_text = cover_letter_text.replace('[Company Name]', company_name)
+        cover_letter_text = cover_letter_text.replace('[COMPANY NAME]', company_name)
+        cover_letter_text = cover_letter_text.replace('[Employer Name]', company_name)
+        cover_letter_text = cover_letter_text.replace('[EMPLOYER NAME]', company_name)
 
-            except Exception: # pylint: disable=broad-exception-caught
-                return JsonResponse({'error': 'Unable to generate cover letter. \
-                                     Please try again later.'}, status=500)
-        else:
-            return JsonResponse({'error': 'Invalid form data'}, status=400)
+    if job_title:
+        cover_letter_text = cover_letter_text.replace('[Position Title]', job_title)
+        cover_letter_text = cover_letter_text.replace('[POSITION TITLE]', job_title)
+        cover_letter_text = cover_letter_text.replace('[Job Title]', job_title)
+        cover_letter_text = cover_letter_text.replace('[JOB TITLE]', job_title)
 
-    return JsonResponse({'error': 'This endpoint only accepts AJAX POST requests'}, status=405)
+    return cover_letter_text
 
 @login_required
 def cover_letter_generator(request, job_id=None): ## pylint: disable=too-many-statements,too-many-locals
@@ -431,8 +393,9 @@ def cover_letter_generator(request, job_id=None): ## pylint: disable=too-many-st
             # Get resume text if needed
             if use_resume and latest_resume:
                 try:
-                    resume_file = latest_resume.resume
-                    resume_text = CoverLetterService.extract_text_from_resume(resume_file)
+                    resume_text = get_resume_text(latest_resume)
+                    if resume_parse_failed(resume_text):
+                        resume_text = None
                 except Exception: # pylint: disable=broad-exception-caught
                     messages.error(request, "Error extracting text from your resume")
 
@@ -446,29 +409,8 @@ def cover_letter_generator(request, job_id=None): ## pylint: disable=too-many-st
 
                 # Replace placeholders with actual data if provided
                 company_name = form.cleaned_data.get('company_name')
-                job_title = form.cleaned_data.get('job_title')
-
-                if company_name:
-                    cover_letter_text = cover_letter_text.replace('[Company Name]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[COMPANY NAME]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[Employer Name]', company_name)
-                    cover_letter_text = cover_letter_text.replace('[EMPLOYER NAME]', company_name)
-
-                if job_title:
-                    cover_letter_text = cover_letter_text.replace('[Position Title]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[POSITION TITLE]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[Job Title]', job_title)
-                    cover_letter_text = cover_letter_text.replace('[JOB TITLE]', job_title)
-
-                is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-                direct_pdf = request.POST.get('direct_pdf') == 'true' or \
-                 'tests' in request.headers.get('User-Agent', '')
-
-                if is_ajax and not direct_pdf:
-                    return JsonResponse({
-                        'success': True,
-                        'cover_letter_text': cover_letter_text
-                    })
+                cover_letter_text = fill_cover_letter_placeholders(
+                    cover_letter_text, company_name, form.cleaned_data.get('job_title'))
 
                 pdf_data = CoverLetterService.create_cover_letter_pdf(
                     cover_letter_text=cover_letter_text,
@@ -531,50 +473,44 @@ def generate_cover_letter_pdf(request):
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
-@login_required
-def ajax_job_outlook(request):
+def job_fit_analysis_request(job_title, job_description,
+                             industry=None, location=None, resume_text=None):
     """
-    View to handle the job outlook functionality
+    Build the chat completion request for a job fit analysis.
     """
-    if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        job_title = request.POST.get('job_title', '')
-        job_description = request.POST.get('job_description', '')
-        industry = request.POST.get('industry', '')
-        location = request.POST.get('location', '')
-
-        if not job_title:
-            return JsonResponse({'error': 'No job title provided'}, status=400)
-
-        try:
-            resume_text = None
-            latest_resume = \
-            Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
-            if latest_resume:
-                try:
-                    resume_text = parse_resume(latest_resume.resume)
-                except Exception: # pylint: disable=broad-exception-caught
-                    pass
-
-            if not resume_text:
-                return JsonResponse({'error': 'No resume found to analyze fit'}, status=400)
-
-            fit_analysis = get_job_fit_analysis(
-                job_title=job_title,
-                job_description=job_description,
-                industry=industry,
-                location=location,
-                resume_text=resume_text
-            )
-
-            return JsonResponse({
-                'success': True,
-                'fit_analysis': fit_analysis
-            })
-        except Exception: # pylint: disable=broad-exception-caught
-            return JsonResponse({'error': 'Error generating fit analysis. \
-                                 Please try again later.'}, status=500)
-
-    return JsonResponse({'error': 'Invalid request'}, status=400)
+    user_prompt = f"Job Title: {job_title}\n"
+
+    if job_description:
+        user_prompt += f"\nJob Description: {job_description[:1000]}...\n"
+
+    if industry:
+        user_prompt += f"\nIndustry: {industry}\n"
+
+    if location:
+        user_prompt += f"\nLocation: {location}\n"
+
+    user_prompt += f"\nCandidate Resume: {resume_text}\n"
+
+    user_prompt += "\nPlease analyze how well this candidate's resume matches the job posting. \
+                    Include:"
+    user_prompt += "\n1. Overall match score (percentage)"
+    user_prompt += "\n2. Key strengths that align with the job requirements"
+    user_prompt += "\n3. Critical gaps in skills or experience"
+    user_prompt += "\n4. Specific recommendations to improve the application"
+    user_prompt += "\n5. Suggested talking points for interviews \
+                    based on the candidate's strengths"
+
+    return {
+        'model': "gpt-4o-mini",
+        'messages': [
+            {"role": "system", "content": \
+             "You are a recruiting specialist who analyzes how well \
+             candidates match specific job postings. \
+             Provide detailed, honest assessments of fit along with \
+             actionable recommendations."},
+            {"role": "user", "content": user_prompt}
+        ],
+    }
 
 def get_job_fit_analysis(job_title, job_description,
                          industry=None, location=None, resume_text=None):
@@ -582,96 +518,61 @@ def get_job_fit_analysis(job_title, job_description,
     Analyze how well a candidate's resume matches a specific job posting.
     """
     try:
-        if os.environ.get('OPENAI_API_KEY'):
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-        else:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
             return "Job fit analysis requires an OpenAI API key."
 
         if not resume_text:
             return "Cannot analyze fit without a resume. Please upload your resume first."
 
-        user_prompt = f"Job Title: {job_title}\n"
-
-        if job_description:
-            user_prompt += f"\nJob Description: {job_description[:1000]}...\n"
-
-        if industry:
-            user_prompt += f"\nIndustry: {industry}\n"
-
-        if location:
-            user_prompt += f"\nLocation: {location}\n"
-
-        user_prompt += f"\nCandidate Resume: {resume_text}\n"
-
-        user_prompt += "\nPlease analyze how well this candidate's resume matches the job posting. \
-                        Include:"
-        user_prompt += "\n1. Overall match score (percentage)"
-        user_prompt += "\n2. Key strengths that align with the job requirements"
-        user_prompt += "\n3. Critical gaps in skills or experience"
-        user_prompt += "\n4. Specific recommendations to improve the application"
-        user_prompt += "\n5. Suggested talking points for interviews \
-                        based on the candidate's strengths"
-
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": \
-                 "You are a recruiting specialist who analyzes how well \
-                 candidates match specific job postings. \
-                 Provide detailed, honest assessments of fit along with \
-                 actionable recommendations."},
-                {"role": "user", "content": user_prompt}
-            ],
-            timeout=60.0, # Add timeout for consistency
+        return completion_cache.create_completion(
+            'fit_analysis', api_key,
+            job_fit_analysis_request(job_title, job_description,
+                                     industry, location, resume_text)
         )
-        return response.choices[0].message.content
     except APITimeoutError:
         return "Unable to generate job fit analysis: Request timed out."
     except Exception: # pylint: disable=broad-exception-caught
         return "Unable to generate job fit analysis. Please try again later."
 
-@login_required
-def ajax_rejection_generator(request):
+def rejection_reasons_request(job_title, job_description,
+                              industry=None, location=None, resume_text=None):
     """
-    View to handle the rejection generator functionality
+    Build the chat completion request for simulated rejection reasons.
     """
-    if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        job_title = request.POST.get('job_title', '')
-        job_description = request.POST.get('job_description', '')
-        industry = request.POST.get('industry', '')
-        location = request.POST.get('location', '')
+    user_prompt = f"Job Title: {job_title}\n"
 
-        if not job_title:
-            return JsonResponse({'error': 'No job title provided'}, status=400)
+    if job_description:
+        user_prompt += f"\nJob Description: {job_description[:1000]}...\n"
 
-        try:
-            resume_text = None
-            latest_resume = \
-            Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
-            if latest_resume:
-                try:
-                    resume_text = parse_resume(latest_resume.resume)
-                except Exception: # pylint: disable=broad-exception-caught
-                    pass
-
-            rejection_reasons = generate_rejection_reasons(
-                job_title=job_title,
-                job_description=job_description,
-                industry=industry,
-                location=location,
-                resume_text=resume_text
-            )
+    if industry:
+        user_prompt += f"\nIndustry: {industry}\n"
 
-            return JsonResponse({
-                'success': True,
-                'rejection_reasons': rejection_reasons
-            })
-        except Exception: # pylint: disable=broad-exception-caught
-            logger.error("Error generating rejection reasons", exc_info=True)
-            return JsonResponse({'error': 'An internal error occurred while \
-                                 generating rejection reasons.'}, status=500)
+    if location:
+        user_prompt += f"\nLocation: {location}\n"
 
-    return JsonResponse({'error': 'Invalid request'}, status=400)
+    if resume_text:
+        user_prompt += f"\nCandidate Resume: {resume_text}\n"
+        user_prompt += "\nPlease generate five potential reasons why \
+              the employer might reject the candidate based on their resume."
+
+    if not resume_text:
+        user_prompt += "\nPlease generate five potential \
+            reasons why the employer might reject the candidate. \
+            The user hasn't uploaded a resume, so assume the most common \
+            reasons why an employer would reject a typical candidate."
+
+    return {
+        'model': "gpt-4o-mini",
+        'messages': [
+            {"role": "system", "content": \
+             "You are a recruiting specialist who analyzes how well \
+             candidates match specific job postings. \
+             Provide detailed, honest assessments of areas of weakness \
+                along with actionable recommendations."},
+            {"role": "user", "content": user_prompt}
+        ],
+    }
 
 def generate_rejection_reasons(job_title, job_description,
                                 industry=None, location=None, resume_text=None):
@@ -679,46 +580,15 @@ def generate_rejection_reasons(job_title, job_description,
     Generate potential reasons why an employer might reject a candidate based on their resume.
     """
     try:
-        if os.environ.get('OPENAI_API_KEY'):
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-        else:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
             return "Rejection reason simulator requires an OpenAI API key."
 
-        user_prompt = f"Job Title: {job_title}\n"
-
-        if job_description:
-            user_prompt += f"\nJob Description: {job_description[:1000]}...\n"
-
-        if industry:
-            user_prompt += f"\nIndustry: {industry}\n"
-
-        if location:
-            user_prompt += f"\nLocation: {location}\n"
-
-        if resume_text:
-            user_prompt += f"\nCandidate Resume: {resume_text}\n"
-            user_prompt += "\nPlease generate five potential reasons why \
-                  the employer might reject the candidate based on their resume."
-
-        if not resume_text:
-            user_prompt += "\nPlease generate five potential \
-                reasons why the employer might reject the candidate. \
-                The user hasn't uploaded a resume, so assume the most common \
-                reasons why an employer would reject a typical candidate."
-
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": \
-                 "You are a recruiting specialist who analyzes how well \
-                 candidates match specific job postings. \
-                 Provide detailed, honest assessments of areas of weakness \
-                    along with actionable recommendations."},
-                {"role": "user", "content": user_prompt}
-            ],
-            timeout=60.0, # Add timeout for consistency
+        return completion_cache.create_completion(
+            'rejection_reasons', api_key,
+            rejection_reasons_request(job_title, job_description,
+                                      industry, location, resume_text)
         )
-        return response.choices[0].message.content
     except APITimeoutError as e:
         return f"Unable to generate rejection reasons: Request timed out ({e})."
     except Exception: # pylint: disable=broad-exception-caught
@@ -728,13 +598,18 @@ def generate_rejection_reasons(job_title, job_description,
 @login_required
 def ajax_track_job_view(request):
     """
-    View to handle the job view tracking page.
+    View to handle the job view tracking page. With JOB_VIEW_WRITE_BEHIND the view
+    is only queued (home/tracking.py) and written later in a batch.
     """
     if request.method == "POST" and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         job_id = request.POST.get('job_id')
         if not job_id:
             return JsonResponse({'error': 'Missing job_id'}, status=400)
 
+        if tracking.is_enabled():
+            queued = tracking.record_view(request.user.pk, job_id)
+            return JsonResponse({'success': True, 'queued': queued}, status=202)
+
         try:
             job = JobListing.objects.get(job_id=job_id)
             interaction, created = UserJobInteraction.objects.get_or_create( # pylint: disable=unused-variable
@@ -784,6 +659,35 @@ def ajax_track_application(request):
 
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+@login_required
+def ajax_track_interactions(request):
+    """
+    View to handle tracking many job interactions in one request. The JSON body is
+    {"events": [{"job_id": ..., "interaction_type": "viewed" | "applied"}, ...]} and
+    the response carries one status per event, in the same order. Views go through
+    the write-behind buffer of home/tracking.py when it is enabled.
+    """
+    if request.method != "POST" or request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    try:
+        events = json.loads(request.body or b'{}').get('events')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if not isinstance(events, list) or not events:
+        return JsonResponse({'error': 'Missing events'}, status=400)
+    max_events = tracking.get_batch_max_events()
+    if len(events) > max_events:
+        return JsonResponse({'error': f'At most {max_events} events per request'}, status=400)
+
+    try:
+        results = tracking.record_interactions(request.user, events)
+    except Exception: # pylint: disable=broad-exception-caught
+        logger.error("Error tracking job interactions", exc_info=True)
+        return JsonResponse({'error': \
+        'An internal error occurred while tracking the interactions.'}, status=500)
+    return JsonResponse({'success': True, 'results': results})
+
 @login_required
 def job_fit_analysis_page(request, job_id):
     """
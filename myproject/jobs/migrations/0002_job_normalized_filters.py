@@ -0,0 +1,54 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+def normalize(value):
+    return " ".join((value or "").lower().split())
+
+
+def populate_normalized_filters(apps, schema_editor):
+    job_model = apps.get_model('jobs', 'Job')
+    jobs = list(job_model.objects.only('id', 'industry', 'location'))
+    for job in jobs:
+        job.industry_normalized = normalize(job.industry)
+        job.location_normalized = normalize(job.location)
+    job_model.objects.bulk_update(jobs, ['industry_normalized', 'location_normalized'],
+                                  batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='industry_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='location_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_normalized_filters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['industry_normalized', 'id'], name='jobs_job_industr_5af423_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['location_normalized', 'id'], name='jobs_job_locatio_4a0153_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_remote', 'salary_min'], name='jobs_job_is_remo_d3c2bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_remote', 'salary_max'], name='jobs_job_is_remo_45a524_idx'),
+        ),
+    ]
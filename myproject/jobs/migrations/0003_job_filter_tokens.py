@@ -0,0 +1,56 @@
+# Generated by Django 4.2.20 on 2026-10-18 16:18
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of jobs.models.filter_tokens as of this migration.
+FILTER_FIELDS = ('industry', 'location')
+WORD_RE = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def filter_tokens(value):
+    return list(dict.fromkeys(WORD_RE.findall(value or '')))
+
+
+def populate_filter_tokens(apps, schema_editor):
+    job_model = apps.get_model('jobs', 'Job')
+    token_model = apps.get_model('jobs', 'JobFilterToken')
+    last_pk = 0
+    while True:
+        batch = list(job_model.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .only('id', 'industry_normalized', 'location_normalized')[:BATCH_SIZE])
+        if not batch:
+            break
+        token_model.objects.bulk_create([
+            token_model(job_id=job.pk, field=field, token=token[:100])
+            for job in batch
+            for field in FILTER_FIELDS
+            for token in filter_tokens(getattr(job, f'{field}_normalized'))
+        ], batch_size=BATCH_SIZE)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_normalized_filters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFilterToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=10)),
+                ('token', models.CharField(max_length=100)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='filter_tokens', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['field', 'token', 'job'], name='jobs_jobfil_field_74f0f8_idx')],
+            },
+        ),
+        migrations.RunPython(populate_filter_tokens, migrations.RunPython.noop),
+    ]
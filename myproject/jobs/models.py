@@ -1,9 +1,29 @@
 """
 This file contains the models for the jobs app.
 """
+import re
 
 from django.db import models
 
+FILTER_FIELDS = ('industry', 'location')
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_filter_value(value):
+    """
+    This function normalizes an industry or location for indexed lookups:
+    lowercase, trimmed, with runs of whitespace collapsed.
+    """
+    return " ".join((value or "").lower().split())
+
+
+def filter_tokens(value):
+    """
+    This function splits a normalized industry or location into its distinct words,
+    e.g. "boulder, co" into ["boulder", "co"].
+    """
+    return list(dict.fromkeys(_WORD_RE.findall(value or '')))
+
 
 class Job(models.Model):
     """
@@ -17,6 +37,71 @@ class Job(models.Model):
     is_remote = models.BooleanField(default=False)
     salary_min = models.IntegerField(blank=True, null=True)
     salary_max = models.IntegerField(blank=True, null=True)
+    # lowercase copies of industry/location, kept in sync by save(), so filters
+    # can use an index instead of scanning with LIKE '%x%'
+    industry_normalized = models.CharField(max_length=100, blank=True, default='',
+                                           editable=False)
+    location_normalized = models.CharField(max_length=100, blank=True, default='',
+                                           editable=False)
+
+    class Meta: # pylint: disable=too-few-public-methods
+        """
+        This class contains the meta data for the job.
+        """
+        indexes = [
+            models.Index(fields=['industry_normalized', 'id']),
+            models.Index(fields=['location_normalized', 'id']),
+            models.Index(fields=['is_remote', 'salary_min']),
+            models.Index(fields=['is_remote', 'salary_max']),
+        ]
 
     def __str__(self) -> str:
         return str(self.title)
+
+    def save(self, *args, **kwargs):
+        """
+        This method refreshes the normalized filter columns before saving.
+        """
+        self.industry_normalized = normalize_filter_value(self.industry)
+        self.location_normalized = normalize_filter_value(self.location)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'industry_normalized',
+                                                            'location_normalized'}
+        super().save(*args, **kwargs)
+        if update_fields is None or set(update_fields) & set(FILTER_FIELDS):
+            self.refresh_filter_tokens()
+
+    def refresh_filter_tokens(self):
+        """
+        This method rewrites the words of the job's industry and location that
+        filters match against.
+        """
+        self.filter_tokens.all().delete() # pylint: disable=no-member
+        JobFilterToken.objects.bulk_create([ # pylint: disable=no-member
+            JobFilterToken(job=self, field=field, token=token[:100])
+            for field in FILTER_FIELDS
+            for token in filter_tokens(getattr(self, f'{field}_normalized'))
+        ])
+
+
+class JobFilterToken(models.Model):
+    """
+    This class contains one word of a job's industry or location. Filters match a
+    word by prefix through the (field, token) index, so "york" finds "New York"
+    without scanning every job with LIKE '%york%'.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='filter_tokens')
+    field = models.CharField(max_length=10)
+    token = models.CharField(max_length=100)
+
+    class Meta: # pylint: disable=too-few-public-methods
+        """
+        This class contains the meta data for the filter token.
+        """
+        indexes = [
+            models.Index(fields=['field', 'token', 'job']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.field}: {self.token}'
@@ -1,9 +1,11 @@
 """
 This file contains the tests for the jobs app.
 """
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from .models import Job
+from .views import word_filter
 
 class JobSearchTests(TestCase):
     """
@@ -214,6 +216,76 @@ class JobSearchTests(TestCase):
         self.assertContains(response, "Remote Developer")
         self.assertNotContains(response, "Marketing Specialist")
 
+    def test_search_matches_prefix_of_normalized_value(self):
+        """
+        This test checks that filters match a case-insensitive prefix with extra spaces.
+        """
+        url = reverse('search_jobs')
+        response = self.client.get(url, {'location': '  new   YORK'})
+        self.assertContains(response, "Marketing Specialist")
+
+    def test_search_matches_from_any_word(self):
+        """
+        This test checks that filters still match text inside the field, as the
+        substring search did, as long as it starts at a word.
+        """
+        Job.objects.create(title="Platform Engineer", industry="Software Engineering", ## pylint: disable=no-member
+                           location="Boulder, CO")
+        url = reverse('search_jobs')
+
+        for params in ({'location': 'york'}, {'location': 'York'}):
+            response = self.client.get(url, params)
+            self.assertContains(response, "Marketing Specialist")
+            self.assertNotContains(response, "Software Engineer")
+        response = self.client.get(url, {'industry': 'engineer'})
+        self.assertContains(response, "Platform Engineer")
+        self.assertNotContains(response, "Marketing Specialist")
+        response = self.client.get(url, {'location': 'co'})
+        self.assertContains(response, "Platform Engineer")
+        response = self.client.get(url, {'location': 'ork'})
+        self.assertNotContains(response, "Marketing Specialist")
+
+    def test_filter_words_follow_saves(self):
+        """
+        This test checks that the words filters match are rewritten when the
+        location changes.
+        """
+        self.job2.location = "Boston"
+        self.job2.save(update_fields=['location'])
+
+        self.assertFalse(Job.objects.filter(word_filter('location', 'york')).exists()) ## pylint: disable=no-member
+        self.assertEqual(list(Job.objects.filter(word_filter('location', 'bos'))), [self.job2]) ## pylint: disable=no-member
+
+    @override_settings(JOB_SEARCH_PAGE_SIZE=2)
+    def test_search_keyset_pagination(self):
+        """
+        This test walks the results page by page with the `after` cursor.
+        """
+        url = reverse('search_jobs')
+        response = self.client.get(url, {'industry': 'tech', 'is_remote': 'on'})
+        self.assertEqual(response.context['jobs'], [self.job1, self.job3])
+        self.assertIsNone(response.context['next_query'])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['jobs'], [self.job1, self.job2])
+        self.assertEqual(response.context['next_query'], f'after={self.job2.id}')
+
+        response = self.client.get(url, {'after': self.job2.id})
+        self.assertEqual(response.context['jobs'], [self.job3])
+        self.assertIsNone(response.context['next_query'])
+
+    def test_word_filter_uses_index(self):
+        """
+        This test checks that the query plan for a filtered page is an index search.
+        """
+        jobs = Job.objects.filter(word_filter('industry', 'Tech')) ## pylint: disable=no-member
+        sql, params = jobs.order_by('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertRegex(plan, r'SEARCH \S+ USING (COVERING )?INDEX jobs_jobfil')
+        self.assertNotIn('SCAN', plan)
+
 class JobModelTests(TestCase):
     """
     This class contains the tests for the job model.
@@ -229,3 +301,16 @@ class JobModelTests(TestCase):
             location="Test Location"
         )
         self.assertEqual(str(job), "Test Job")
+
+    def test_save_normalizes_filter_columns(self):
+        """
+        This test checks that save() keeps the normalized columns in sync.
+        """
+        job = Job.objects.create(title="Test Job", industry=" Health  Care ") ## pylint: disable=no-member
+        self.assertEqual(job.industry_normalized, "health care")
+        self.assertEqual(job.location_normalized, "")
+
+        job.location = "Boulder, CO"
+        job.save(update_fields=['location'])
+        job.refresh_from_db()
+        self.assertEqual(job.location_normalized, "boulder, co")
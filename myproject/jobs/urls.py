@@ -3,9 +3,11 @@ This file contains the urls for the jobs app.
 """
 
 from django.urls import path
-from .views import recommendations, search_jobs
+from .views import recommendations, recommendations_results, search_jobs
 
 urlpatterns = [
     path('recommendations/', recommendations, name='recommendations'),
+    path('recommendations/results/', recommendations_results,
+         name='recommendations_results'),
     path('search/', search_jobs, name='search_jobs'),
 ]
@@ -1,22 +1,50 @@
 """
 This file contains the views for the jobs app.
 """
-import os
 from dotenv import load_dotenv
-import openai
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 from users.models import Resume # pylint: disable=import-error,no-name-in-module
+from users.views import get_resume_text # pylint: disable=import-error,no-name-in-module
+from home import http_client # pylint: disable=import-error,no-name-in-module
+from home.normalize import PREFIX_END # pylint: disable=import-error,no-name-in-module
+from home.pagination import paginate_results # pylint: disable=import-error,no-name-in-module
 from home.services import JobicyService # pylint: disable=import-error,no-name-in-module
-from home.cover_letter_service import CoverLetterService # pylint: disable=import-error,no-name-in-module
-from .models import Job # pylint: disable=import-error,no-name-in-module
+from home.views import results_page_response # pylint: disable=import-error,no-name-in-module
+from .models import Job, JobFilterToken, filter_tokens, normalize_filter_value # pylint: disable=import-error,no-name-in-module
+
+DEFAULT_JOB_SEARCH_PAGE_SIZE = 25
+
+
+def word_filter(field, value):
+    """
+    This function matches jobs whose `field` (industry or location) contains `value`
+    starting at a word, case-insensitively: "york" and "new york" both match
+    "New York", "ork" does not.
+
+    Candidates come from an index range over the words of the field (the first word
+    of `value` as a prefix), so no query scans every job; the full value is then
+    checked against the candidates' normalized column.
+    """
+    value = normalize_filter_value(value)
+    words = filter_tokens(value)
+    contains = Q(**{f'{field}_normalized__contains': value})
+    if not words:
+        return contains
+    candidates = JobFilterToken.objects.filter( # pylint: disable=no-member
+        field=field, token__gte=words[0], token__lt=words[0] + PREFIX_END
+    ).values('job_id')
+    return Q(id__in=candidates) & contains
 
 def get_job_ai_recommendation(user):
     """Get feedback comparing resume to job description."""
     try:
         load_dotenv()
-        if os.getenv("OPENAI_API_KEY"):
-            openai.api_key = os.getenv('OPENAI_API_KEY')
-        else:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
             return "Job-specific feedback requires an OpenAI API key."
 
         latest_resume = Resume.objects.filter(user=user).order_by('-uploaded_at').first()
@@ -24,7 +52,7 @@ def get_job_ai_recommendation(user):
 
 
         if has_resume:
-            resume_text = CoverLetterService.extract_text_from_resume(latest_resume.resume)
+            resume_text = get_resume_text(latest_resume)
             user_content = f"Resume: \n{resume_text}"
             user_content += f"\n\nIndustry: \n{user.profile.industry_preference}"
             user_content += f"\n\nSalary: \n{user.profile.salary_min_preference}\n"
@@ -32,7 +60,7 @@ def get_job_ai_recommendation(user):
             user_content = f"Industry: \n{user.profile.industry_preference}"
             user_content += f"\n\nSalary: \n{user.profile.salary_min_preference}\n"
 
-        response = openai.chat.completions.create(
+        response = http_client.get_openai_client(api_key).chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -62,12 +90,25 @@ def get_job_ai_recommendation(user):
         return f"Unable to generate job-specific feedback: {str(e)}"
 
 
+def recommendation_queries(user, search_term):
+    """
+    This function returns the searches behind a user's recommendations: the AI
+    search term on its own and narrowed to the profile's industry and location.
+    """
+    profile = user.profile
+    queries = [(search_term, {})]
+    if profile.industry_preference:
+        queries.append((search_term, {'jobIndustry': profile.industry_preference}))
+    if profile.location_preference:
+        queries.append((search_term, {'geo': profile.location_preference}))
+    return queries
+
+
 def recommendations(request):
     """
     This function returns the recommendations for the user.
     """
     user = request.user
-    params = {}
     context = {}
     job_list = []
 
@@ -86,18 +127,39 @@ def recommendations(request):
         context = {'no_information': no_information_provided_string}
     else:
         ai_response = get_job_ai_recommendation(user)
+        # remembered so further pages don't need another completion
+        request.session['recommendation_search_term'] = ai_response
 
         try:
-            job_list = JobicyService.search_jobs(ai_response, params)
+            job_list = JobicyService.search_jobs_many(recommendation_queries(user, ai_response))
         except Exception: # pylint: disable=broad-exception-caught
             job_list = []
 
-        context = {'job_list': job_list}
+        page = paginate_results(job_list)
+        job_list = page.jobs
+        context = {'job_list': job_list, 'next_cursor': page.next_cursor}
         if not job_list and 'no_information' not in context:
             context['no_jobs'] = "No jobs found for your search. Please try again."
 
     return render(request, 'jobs/ai_recommendations.html', context)
 
+@login_required
+@require_GET
+def recommendations_results(request):
+    """
+    This function returns the next page of the recommended jobs, using the search
+    term the recommendations page stored in the session.
+    """
+    search_term = request.session.get('recommendation_search_term')
+    job_list = []
+    if search_term:
+        try:
+            job_list = JobicyService.search_jobs_many(
+                recommendation_queries(request.user, search_term))
+        except Exception: # pylint: disable=broad-exception-caught
+            job_list = []
+    return results_page_response(request, job_list)
+
 def search_jobs(request): ## pylint: disable=too-many-branches
     """
     This function searches for jobs based on the user's preferences.
@@ -111,9 +173,9 @@ def search_jobs(request): ## pylint: disable=too-many-branches
     jobs = Job.objects.all() # pylint: disable=no-member
 
     if industry:
-        jobs = jobs.filter(industry__icontains=industry)
+        jobs = jobs.filter(word_filter('industry', industry))
     if location:
-        jobs = jobs.filter(location__icontains=location)
+        jobs = jobs.filter(word_filter('location', location))
     if remote:
         if remote.lower() == 'yes':
             jobs = jobs.filter(is_remote=True)
@@ -146,6 +208,30 @@ def search_jobs(request): ## pylint: disable=too-many-branches
         except ValueError:
             pass
 
+    jobs, next_cursor = keyset_page(jobs, request.GET.get('after'))
+    next_query = None
+    if next_cursor is not None:
+        query = request.GET.copy()
+        query['after'] = next_cursor
+        next_query = query.urlencode()
 
-    context = {'jobs': jobs}
+    context = {'jobs': jobs, 'next_query': next_query}
     return render(request, 'jobs/job_list.html', context)
+
+
+def keyset_page(jobs, after=None):
+    """
+    This function returns one page of jobs ordered by id, starting after the `after`
+    cursor, plus the cursor of the next page (None on the last page). Unlike OFFSET,
+    seeking past the cursor costs the same on every page.
+    """
+    page_size = getattr(settings, 'JOB_SEARCH_PAGE_SIZE', DEFAULT_JOB_SEARCH_PAGE_SIZE)
+    jobs = jobs.order_by('id')
+    if after and after.isdigit():
+        jobs = jobs.filter(id__gt=int(after))
+
+    page = list(jobs[:page_size + 1])
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, page[-1].id
+    return page, None
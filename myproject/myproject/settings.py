@@ -49,9 +49,11 @@ INSTALLED_APPS = [
     'pypdf'
 ]
 
+# Every middleware must be async-capable, or under ASGI Django adapts the chain to
+# sync and runs the async views on a thread per request (home/middleware.py).
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'home.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,13 +88,31 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.environ.get('DJANGO_DB_ENGINE',
-                                 'django.db.backends.sqlite3'),
+        'ENGINE': os.environ.get('DJANGO_DB_ENGINE', 'home.sqlite_backend'),
         'NAME': os.environ.get('DJANGO_DB_NAME',
                                os.path.join('/app/database', 'db.sqlite3')
                                if 'PRODUCTION' in os.environ else BASE_DIR / 'db.sqlite3'),
+        # Keep connections open between requests under WSGI. Under ASGI (asgi.py sets
+        # DJANGO_ASGI) Django 4.2 runs each request's ORM calls on a thread of its own,
+        # so a connection cannot outlive the request: every request opens a new one
+        # and runs the home/db.py pragmas on it ('tuned-asgi' in benchmark_sqlite).
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE',
+                                           0 if os.environ.get('DJANGO_ASGI') else 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+# home/db.py sets the SQLite pragmas (WAL, mmap, cache size) once per connection.
+# Writers wait for the lock for up to SQLITE_TIMEOUT seconds. Atomic blocks begin
+# deferred; the read-then-write paths use home.db.immediate_atomic (BEGIN IMMEDIATE).
+if DATABASES['default']['ENGINE'] == 'home.sqlite_backend':
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': float(os.environ.get('SQLITE_TIMEOUT', 20)),
+    }
+
+# Full-text and trigram search on PostgreSQL (home/search.py) need the postgres app;
+# on SQLite the FTS5 fallback is used instead.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    INSTALLED_APPS.append('django.contrib.postgres')
 
 
 # Password validation
@@ -159,6 +179,66 @@ LOGIN_URL = '/users/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# How long (in seconds) a cached Jobicy search result set stays fresh
+JOBICY_SEARCH_TTL = int(os.environ.get('JOBICY_SEARCH_TTL', 6 * 60 * 60))
+# Jobicy API calls open at once per process, across concurrent fan-out searches
+JOBICY_MAX_CONCURRENCY = int(os.environ.get('JOBICY_MAX_CONCURRENCY', 4))
+
+# Named caches shared by all gunicorn workers (home/cache.py): file-based on the
+# data volume, with MAX_ENTRIES per alias after which a third of the entries is
+# culled. Local memory while testing so nothing outlives a test run.
+CACHE_DIR = os.environ.get('DJANGO_CACHE_DIR',
+                           os.path.join('/app/database', 'cache')
+                           if 'PRODUCTION' in os.environ else BASE_DIR / 'cache')
+CACHE_MAX_ENTRIES = {
+    'default': 1000,
+    'search': int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', 2000)),
+    'ai_completions': int(os.environ.get('AI_COMPLETION_CACHE_MAX_ENTRIES', 512)),
+    'parsed_resumes': 100,
+    'fragments': int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000)),
+}
+CACHES = {
+    alias: {
+        'BACKEND': 'home.cache.StatsLocMemCache' if 'test' in sys.argv
+                   else 'home.cache.StatsFileBasedCache',
+        'LOCATION': alias if 'test' in sys.argv else os.path.join(CACHE_DIR, alias),
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': 3},
+    }
+    for alias, max_entries in CACHE_MAX_ENTRIES.items()
+}
+# Hit/miss counters of the aliases above, apart so culling an alias keeps them
+CACHES['cache_stats'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' if 'test' in sys.argv
+               else 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': 'cache_stats' if 'test' in sys.argv else os.path.join(CACHE_DIR, 'cache_stats'),
+    'TIMEOUT': None,
+    'OPTIONS': {'MAX_ENTRIES': 1000},
+}
+# Identical Jobicy fetches are coalesced (home/single_flight.py): one runs, the rest
+# wait up to JOBICY_SINGLE_FLIGHT_TIMEOUT seconds for it. Workers coordinate through
+# lock files in JOBICY_LOCK_DIR; per process only while testing.
+JOBICY_LOCK_DIR = None if 'test' in sys.argv else os.path.join(CACHE_DIR, 'locks')
+JOBICY_SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('JOBICY_SINGLE_FLIGHT_TIMEOUT', 30))
+# How long (in seconds) a ranked local search stays in the 'search' cache
+# (home/services.py). 0 disables it, as while testing.
+SEARCH_RESULTS_CACHE_TTL = 0 if 'test' in sys.argv \
+    else int(os.environ.get('SEARCH_RESULTS_CACHE_TTL', 5 * 60))
+
+# Memoized OpenAI completions (home/completion_cache.py), kept in the 'ai_completions'
+# cache. Disabled while testing so a mocked response is never served to a later test.
+AI_COMPLETION_CACHE_ENABLED = os.environ.get('AI_COMPLETION_CACHE_ENABLED', '1') == '1' \
+    and 'test' not in sys.argv
+
+# Job views are buffered in memory and bulk inserted (home/tracking.py) every
+# JOB_VIEW_BUFFER_SIZE views or JOB_VIEW_BUFFER_SECONDS. Written immediately while testing.
+JOB_VIEW_WRITE_BEHIND = os.environ.get('JOB_VIEW_WRITE_BEHIND', '1') == '1' \
+    and 'test' not in sys.argv
+JOB_VIEW_BUFFER_SIZE = int(os.environ.get('JOB_VIEW_BUFFER_SIZE', 50))
+JOB_VIEW_BUFFER_SECONDS = float(os.environ.get('JOB_VIEW_BUFFER_SECONDS', 5))
+# Views kept for retry while the database rejects the writes (oldest dropped first).
+JOB_VIEW_BUFFER_MAX_PENDING = int(os.environ.get('JOB_VIEW_BUFFER_MAX_PENDING', 1000))
+
 if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
@@ -0,0 +1,30 @@
+"""
+This file contains the migration for the resume text cache fields.
+"""
+
+# Generated by Django 4.2.20 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    This migration adds the content_hash and parsed_text fields to the resume model.
+    """
+
+    dependencies = [
+        ('users', '0010_resume_ai_feedback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='parsed_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
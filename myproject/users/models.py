@@ -48,6 +48,8 @@ class Resume(models.Model):
     resume = models.FileField(upload_to='resumes/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     ai_feedback = models.TextField(blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    parsed_text = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return f"Resume {self.id}" # pylint: disable=no-member
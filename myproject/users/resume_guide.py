@@ -0,0 +1,131 @@
+"""
+This file contains the chunking and retrieval of the resume guide used in AI feedback.
+
+The guide is split into page-sized sections once per process and indexed with
+TF-IDF. Each feedback request then carries the guide's core sections in a fixed
+system prompt, which is byte-identical across requests so provider-side prompt
+caching applies, plus only the top-k sections most similar to the resume.
+"""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+from django.conf import settings
+
+DEFAULT_TOP_K = 3
+# sections longer than this are split so one section never dominates the prompt
+MAX_SECTION_WORDS = 500
+MIN_SECTION_WORDS = 20
+# headings of the sections every review gets, in the cached prompt prefix
+CORE_SECTION_MARKERS = ('RESUME CHECKLIST', 'GENERAL TIPS')
+PAGE_BREAK = '\f'
+
+STOP_WORDS = frozenset("""
+    a about above after all also an and any are as at be been before being below
+    both but by can could did do does doing for from had has have having he her
+    here him his how i if in into is it its just me more most my no nor not of off
+    on once only or other our out over own same she should so some such than that
+    the their them then there these they this those through to too under until up
+    very was we were what when where which while who whom why will with would you
+    your yours
+""".split())
+
+_WORD_RE = re.compile(r'[a-z][a-z0-9+#]{2,}')
+_DOT_LEADER_RE = re.compile(r'\.{5,}')
+
+
+class GuideIndex(NamedTuple):
+    """
+    The guide's core sections and the TF-IDF vectors of the other sections.
+    """
+    core: List[str]
+    sections: List[str]
+    vectors: List[Dict[str, float]]
+    idf: Dict[str, float]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    This function returns the lowercase content words of a text.
+    """
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def split_sections(guide_text: str) -> List[str]:
+    """
+    This function splits the guide into page-sized sections, dropping near-empty
+    pages and the table of contents.
+    """
+    sections = []
+    for page in guide_text.split(PAGE_BREAK):
+        words = page.split()
+        if len(words) < MIN_SECTION_WORDS or len(_DOT_LEADER_RE.findall(page)) > 5:
+            continue
+        lines, count = [], 0
+        for line in page.strip().splitlines():
+            lines.append(line)
+            count += len(line.split())
+            if count >= MAX_SECTION_WORDS:
+                sections.append('\n'.join(lines).strip())
+                lines, count = [], 0
+        if lines:
+            sections.append('\n'.join(lines).strip())
+    return sections or [guide_text.strip()]
+
+
+def _vector(tokens: List[str], idf: Dict[str, float]) -> Dict[str, float]:
+    """
+    This function returns the L2-normalized TF-IDF vector of a token list.
+    """
+    weights = {term: (1 + math.log(count)) * idf[term]
+               for term, count in Counter(tokens).items() if term in idf}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    return {term: weight / norm for term, weight in weights.items()}
+
+
+@lru_cache(maxsize=2)
+def build_index(guide_text: str) -> GuideIndex:
+    """
+    This function chunks and indexes the guide. It is cached per guide text, so the
+    work is done once per process.
+    """
+    sections = split_sections(guide_text)
+    core = [section for section in sections
+            if any(marker in section.upper() for marker in CORE_SECTION_MARKERS)]
+    if not core:
+        core = sections[:1]
+    rest = [section for section in sections if section not in core]
+
+    documents = [set(tokenize(section)) for section in rest]
+    document_count = len(documents)
+    frequency = Counter(term for document in documents for term in document)
+    idf = {term: math.log((1 + document_count) / (1 + count)) + 1
+           for term, count in frequency.items()}
+    vectors = [_vector(tokenize(section), idf) for section in rest]
+    return GuideIndex(core, rest, vectors, idf)
+
+
+def get_top_k() -> int:
+    """
+    This function returns how many guide sections are retrieved per resume.
+    """
+    return getattr(settings, 'RESUME_GUIDE_TOP_K', DEFAULT_TOP_K)
+
+
+def guide_context(guide_text: str, resume_text: str) -> Tuple[str, List[str]]:
+    """
+    This function returns the core guide text and the sections most relevant to
+    the resume, best match first.
+    """
+    index = build_index(guide_text)
+    query = _vector(tokenize(resume_text), index.idf)
+    scored = sorted(
+        ((sum(weight * vector.get(term, 0.0) for term, weight in query.items()), position)
+         for position, vector in enumerate(index.vectors)),
+        key=lambda item: (-item[0], item[1])
+    )
+    relevant = [index.sections[position] for score, position in scored[:get_top_k()]
+                if score > 0]
+    return '\n\n'.join(index.core), relevant
@@ -3,11 +3,12 @@
 This file contains the tests for the users app.
 """
 
+import hashlib
 import os
 from unittest.mock import patch
 import shutil
 
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, Client, override_settings
 from django.urls import reverse, resolve
 from django.utils import timezone
 from django.core.files import File
@@ -19,7 +20,9 @@ from django.core.files.storage import default_storage
 from .forms import UserRegistrationForm, UserLoginForm, ResumeUploadForm # pylint: disable=import-error,no-name-in-module
 from .models import Resume, get_user_by_email, Profile # pylint: disable=import-error,no-name-in-module
 from .signals import user_created_callback # pylint: disable=import-error,no-name-in-module
-from .views import login_view, register_view, logout_view # pylint: disable=import-error,no-name-in-module
+from .resume_guide import PAGE_BREAK, build_index, guide_context # pylint: disable=import-error,no-name-in-module
+from .views import (login_view, register_view, logout_view, get_resume_text, # pylint: disable=import-error,no-name-in-module
+                    load_resume_guide, resume_feedback_request)
 
 class UserRegistrationFormTest(TestCase):
     """
@@ -433,32 +436,61 @@ class ResumeViewTest(TestCase): # pylint: disable=too-many-instance-attributes
         self.assertRedirects(response, reverse('profile'))
         self.assertTrue(Resume.objects.filter(user=self.user).exists()) # pylint: disable=no-member
 
-    @patch('users.views.openai.chat.completions.create',
-           side_effect=Exception("AI Error"))
-    @patch('users.views.load_resume_guide', return_value='Mocked guide content')
     @patch('users.views.parse_resume', return_value='Parsed resume text')
-    def test_resume_feedback_view_openai_exception(self, mock_parse, mock_load_guide, mock_openai): # pylint: disable=unused-argument
+    def test_upload_resume_caches_parsed_text(self, mock_parse):
         """
-        This method tests the resume feedback view when an OpenAI exception occurs.
+        This method tests the resume text is parsed once at upload and then reused.
         """
         self.client.login(username='testuser', password='StrongTestPass123')
-
-        # Create resume using the test file
         with open(self.test_resume_path, 'rb') as resume_file:
-            resume = Resume.objects.create( # pylint: disable=no-member
-                user=self.user,
-                resume=File(resume_file, name='test_resume.pdf')
-            )
+            self.client.post(self.upload_url, {'resume': resume_file})
 
-        self.user.profile.whitelisted_for_ai = True
-        self.user.profile.save()
+        resume = Resume.objects.get(user=self.user) # pylint: disable=no-member
+        self.assertEqual(resume.content_hash, hashlib.sha256(self.resume_content).hexdigest())
+        self.assertEqual(resume.parsed_text, 'Parsed resume text')
 
-        url = reverse('resume_feedback', args=[resume.id])
-        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_resume_text(resume), 'Parsed resume text')
+        mock_parse.assert_called_once()
 
-        self.assertEqual(response.status_code, 200)
-        self.assertContains(response, "<h2>Error</h2>")
-        self.assertIn("Error generating AI feedback: AI Error", response.content.decode())
+    @patch('users.views.parse_resume', return_value='Parsed resume text')
+    def test_same_file_reuses_parsed_text(self, mock_parse):
+        """
+        This method tests a re-upload of identical bytes is not parsed again.
+        """
+        with open(self.test_resume_path, 'rb') as resume_file:
+            first = Resume.objects.create( # pylint: disable=no-member
+                user=self.user, resume=File(resume_file, name='first.pdf'))
+            second = Resume.objects.create( # pylint: disable=no-member
+                user=self.user, resume=File(resume_file, name='second.pdf'))
+
+        self.assertEqual(get_resume_text(first), 'Parsed resume text')
+        self.assertEqual(get_resume_text(second), 'Parsed resume text')
+        self.assertEqual(first.content_hash, second.content_hash)
+        mock_parse.assert_called_once()
+
+    @patch('users.views.parse_resume',
+           side_effect=['Error parsing file: truncated', 'Parsed resume text'])
+    def test_failed_parse_is_not_cached(self, mock_parse):
+        """
+        This method tests a failed parse is retried instead of stored, and never
+        reused for another upload of the same bytes.
+        """
+        with open(self.test_resume_path, 'rb') as resume_file:
+            first = Resume.objects.create( # pylint: disable=no-member
+                user=self.user, resume=File(resume_file, name='first.pdf'))
+            second = Resume.objects.create( # pylint: disable=no-member
+                user=self.user, resume=File(resume_file, name='second.pdf'))
+        Resume.objects.filter(pk=second.pk).update( # pylint: disable=no-member
+            content_hash=hashlib.sha256(self.resume_content).hexdigest(),
+            parsed_text='Unsupported file type')
+        second.refresh_from_db()
+
+        self.assertEqual(get_resume_text(first), 'Error parsing file: truncated')
+        self.assertIsNone(Resume.objects.get(pk=first.pk).parsed_text) # pylint: disable=no-member
+        self.assertEqual(get_resume_text(first), 'Parsed resume text')
+        self.assertEqual(get_resume_text(second), 'Parsed resume text')
+        self.assertEqual(mock_parse.call_count, 2)
 
     def test_delete_resume(self):
         """
@@ -1064,23 +1096,23 @@ class AIFeatureAccessTest(TestCase): # pylint: disable=too-many-instance-attribu
         self.assertContains(response, "not currently eligible")
         mock_get_feedback.assert_not_called()
 
-    @patch('users.views.get_resume_feedback', return_value='<p>Mocked AI Feedback</p>')
-    @patch('users.views.parse_resume', return_value='Parsed resume text')
-    def test_whitelisted_user_gets_ai_feedback(self, mock_parse_resume, mock_get_feedback): # pylint: disable=unused-argument
+    @patch('users.views.get_resume_feedback')
+    def test_whitelisted_user_gets_ai_feedback(self, mock_get_feedback):
         """
-        This method tests the whitelisted user gets AI feedback.
+        This method tests the whitelisted user gets AI feedback, streamed by the async
+        view instead of generated while the page renders.
         """
         self.client.login(username='whitelisteduser', password='StrongTestPass123')
         url = reverse('resume_feedback', args=[self.whitelisted_resume.id])
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, "<p>Mocked AI Feedback</p>")
-        mock_get_feedback.assert_called_once()
+        self.assertContains(response,
+                            reverse('resume_feedback_stream', args=[self.whitelisted_resume.id]))
+        mock_get_feedback.assert_not_called()
 
-    @patch('users.views.get_resume_feedback', return_value='<p>Mocked AI Feedback</p>')
-    @patch('users.views.parse_resume', return_value='Parsed resume text')
-    def test_admin_user_gets_ai_feedback(self, mock_parse_resume, mock_get_feedback): # pylint: disable=unused-argument
+    @patch('users.views.get_resume_feedback')
+    def test_admin_user_gets_ai_feedback(self, mock_get_feedback):
         """
         This method tests the admin user gets AI feedback.
         """
@@ -1089,8 +1121,23 @@ class AIFeatureAccessTest(TestCase): # pylint: disable=too-many-instance-attribu
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, "<p>Mocked AI Feedback</p>")
-        mock_get_feedback.assert_called_once()
+        self.assertContains(response,
+                            reverse('resume_feedback_stream', args=[self.admin_resume.id]))
+        mock_get_feedback.assert_not_called()
+
+    def test_stored_feedback_is_shown_without_streaming(self):
+        """
+        This method tests feedback saved on the resume is rendered directly.
+        """
+        self.whitelisted_resume.ai_feedback = '<p>Stored AI Feedback</p>'
+        self.whitelisted_resume.save()
+        self.client.login(username='whitelisteduser', password='StrongTestPass123')
+        url = reverse('resume_feedback', args=[self.whitelisted_resume.id])
+        response = self.client.get(url)
+
+        self.assertContains(response, '<p>Stored AI Feedback</p>')
+        self.assertNotContains(response,
+                               reverse('resume_feedback_stream', args=[self.whitelisted_resume.id]))
 
     def tearDown(self):
         """
@@ -1198,3 +1245,61 @@ class SecureResumeViewTest(TestCase):
             shutil.rmtree(settings.MEDIA_ROOT) # pylint: disable=no-member
         except: # pylint: disable=bare-except
             pass # pylint: disable=bare-except
+
+
+GUIDE_PAGES = [
+    'RESUME CHECKLIST ' + 'format heading education experience bullet ' * 10,
+    'Contents ' + 'Section ........ 4 ' * 8,
+    'MILITARY EXPERIENCE ' + 'army deployment veteran inspection maintenance ' * 10,
+    'TECHNICAL SKILLS ' + 'python django software languages programming ' * 10,
+    'COVER LETTER ' + 'employer interest letter paragraph closing ' * 10,
+]
+
+
+class ResumeGuideRetrievalTest(SimpleTestCase):
+    """
+    This class contains the tests for the chunked resume guide retrieval.
+    """
+    guide = PAGE_BREAK.join(GUIDE_PAGES)
+
+    def test_sections_skip_table_of_contents(self):
+        """
+        This method tests that the checklist is core and the contents page is dropped.
+        """
+        index = build_index(self.guide)
+
+        self.assertEqual(len(index.core), 1)
+        self.assertTrue(index.core[0].startswith('RESUME CHECKLIST'))
+        self.assertEqual(len(index.sections), 3)
+
+    @override_settings(RESUME_GUIDE_TOP_K=1)
+    def test_top_section_matches_resume(self):
+        """
+        This method tests that the most similar section is retrieved.
+        """
+        _, sections = guide_context(self.guide, 'Python developer building Django software')
+
+        self.assertEqual(len(sections), 1)
+        self.assertTrue(sections[0].startswith('TECHNICAL SKILLS'))
+
+    def test_request_has_stable_prefix(self):
+        """
+        This method tests that the system prompt is the same for different resumes
+        and that the prompt is much shorter than the whole guide.
+        """
+        first = resume_feedback_request('Army veteran, maintenance lead', self.guide)
+        second = resume_feedback_request('Python developer', self.guide)
+
+        self.assertEqual(first['messages'][0], second['messages'][0])
+        self.assertIn('army', first['messages'][1]['content'])
+        self.assertNotIn('army', second['messages'][1]['content'])
+
+    def test_real_guide_prompt_is_small(self):
+        """
+        This method tests the size of the prompt built from the shipped guide.
+        """
+        guide = load_resume_guide()
+        request = resume_feedback_request('Software engineer, Python, internship', guide)
+
+        prompt_words = sum(len(message['content'].split()) for message in request['messages'])
+        self.assertLess(prompt_words, len(guide.split()) / 3)
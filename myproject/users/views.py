@@ -2,31 +2,29 @@
 This module contains the views for the users app.
 """
 
+import hashlib
 import os
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.http import FileResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme
 from docx import Document
 from openai import APITimeoutError
-import openai
 from pypdf import PdfReader
 import markdown
+from home import http_client # pylint: disable=import-error,no-name-in-module
+from home.cache import PARSED_RESUMES, get_cache # pylint: disable=import-error,no-name-in-module
 
 from .forms import (UserRegistrationForm, UserLoginForm, EditProfileForm,
                     ResumeUploadForm, EditPreferenceForm)
 from .models import Profile, Resume
-
-RESUME_GUIDE_TEXT = None
-
-if os.environ.get('OPENAI_API_KEY'):
-    openai.api_key = os.environ.get('OPENAI_API_KEY')
-else:
-    openai.api_key = 'sk-proj-1234567890'
+from .resume_guide import PAGE_BREAK, guide_context
 
 
 def register_view(request):
@@ -120,6 +118,7 @@ def upload_resume(request):
             resume_instance.user = request.user
 
             resume_instance.save()
+            cache_resume_text(resume_instance)
             messages.success(request,
                              "Your resume has been uploaded successfully.")
             return redirect('profile')
@@ -175,31 +174,152 @@ def parse_resume(file):
     return text.strip()
 
 
-def load_resume_guide():
+PARSE_ERROR_MARKERS = ("Error parsing file:", "Unsupported file type")
+
+
+def resume_parse_failed(resume_text):
+    """
+    This function checks whether parse_resume returned an error instead of text.
+    """
+    return any(marker in resume_text for marker in PARSE_ERROR_MARKERS)
+
+
+def hash_resume_file(file):
+    """
+    This function returns the SHA-256 of an open resume file's bytes.
+    """
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_resume_text(resume):
+    """
+    This function extracts the resume's text and stores it with the file's hash.
+
+    If a resume with the same bytes was already parsed, its text is reused. A
+    failed parse is returned but never stored, so the next request tries again.
+    """
+    file = resume.resume
+    try:
+        file.open('rb')
+        try:
+            content_hash = hash_resume_file(file)
+            parsed = Resume.objects.filter( # pylint: disable=no-member
+                content_hash=content_hash, parsed_text__isnull=False)
+            for marker in PARSE_ERROR_MARKERS:
+                parsed = parsed.exclude(parsed_text__contains=marker)
+            parsed_text = parsed.values_list('parsed_text', flat=True).first()
+            if parsed_text is None:
+                file.seek(0)
+                parsed_text = parse_resume(file)
+        finally:
+            file.close()
+    except OSError as e:
+        return f"Error parsing file: {e}"
+
+    resume.content_hash = content_hash
+    if resume_parse_failed(parsed_text):
+        resume.parsed_text = None
+    else:
+        resume.parsed_text = parsed_text
+    resume.save(update_fields=['content_hash', 'parsed_text'])
+    return parsed_text
+
+
+def get_resume_text(resume):
     """
-    This function loads the resume guide from the file.
+    This function returns the resume's text, parsing the file only if it was never cached.
     """
-    global RESUME_GUIDE_TEXT # pylint: disable=global-statement
+    if resume.content_hash and resume.parsed_text is not None \
+            and not resume_parse_failed(resume.parsed_text):
+        return resume.parsed_text
+    return cache_resume_text(resume)
 
-    if RESUME_GUIDE_TEXT is not None:
-        return RESUME_GUIDE_TEXT
 
+def load_resume_guide():
+    """
+    This function loads the resume guide from the file, one page per form feed.
+    The extracted text is kept in the shared 'parsed_resumes' cache, keyed by the
+    file's modification time, so the PDF is parsed once for all workers.
+    """
     guide_path = os.path.join(settings.BASE_DIR, 'mediafiles', 'References',
                               'UCCS_Resume_Guide.pdf')
     try:
+        cache_key = f"resume_guide:{os.path.getmtime(guide_path)}"
+        guide_text = get_cache(PARSED_RESUMES).get(cache_key)
+        if guide_text is not None:
+            return guide_text
+
         with open(guide_path, 'rb') as file:
             reader = PdfReader(file)
             text = ''
             for page in reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + '\n'
-        RESUME_GUIDE_TEXT = text.strip() # pylint: disable=global-statement
-        return RESUME_GUIDE_TEXT
+                    text += page_text + PAGE_BREAK
+        guide_text = text.strip()
+        get_cache(PARSED_RESUMES).set(cache_key, guide_text, None)
+        return guide_text
     except Exception as e: # pylint: disable=broad-exception-caught
         return f"Error loading resume guide: {e}"
 
 
+def resume_feedback_request(resume_text, guide_text):
+    """
+    This function builds the chat completion request for general resume feedback.
+
+    Only the guide sections relevant to the resume are sent. The system message
+    (instructions and core guide sections) is the same for every resume, so it forms
+    a stable prefix the provider can cache.
+    """
+    core_text, sections = guide_context(guide_text, resume_text)
+    system_message = {
+        "role": "system",
+        "content": "You are a helpful resume reviewer. Review the following resume and "
+                   "provide constructive feedback. Focus on general advice, formatting, "
+                   "keyword optimization, and job relevance. Follow these guidelines "
+                   f"when giving the feedback:\n\n{core_text}"
+    }
+    guide_message = {
+        "role": "user",
+        "content": "Guide sections relevant to this resume:\n\n" + "\n\n---\n\n".join(sections)
+    }
+    resume_message = {
+        "role": "user",
+        "content": f"Please review this resume:\n\n{resume_text}"
+    }
+    prompt = [system_message, guide_message, resume_message] if sections \
+        else [system_message, resume_message]
+    return {
+        'model': "gpt-4o-mini",
+        'messages': prompt,
+    }
+
+
+def resume_feedback_error(ex):
+    """
+    This function renders the error shown when AI feedback could not be generated.
+    """
+    if isinstance(ex, APITimeoutError):
+        return markdown.markdown(
+            "## Error\n\nError generating AI feedback: The request to the AI service "
+            "timed out after 60 seconds. This might be due to a long resume or temporary "
+            "high load on the AI service. Please try again later."
+        )
+    return markdown.markdown(f"## Error\n\nError generating AI feedback: {ex}")
+
+
+class ResumeFeedbackError(Exception):
+    """
+    This exception ends a feedback stream that failed, carrying the error to show as HTML.
+    """
+    def __init__(self, html):
+        super().__init__(html)
+        self.html = html
+
+
 def get_resume_feedback(resume_text):
     """
     This function generates AI feedback for a resume.
@@ -209,39 +329,69 @@ def get_resume_feedback(resume_text):
         return "Could not generate feedback due to a configuration issue (unable to load guide)."
 
     try:
-        if not os.environ.get('OPENAI_API_KEY'):
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
             return "Could not generate feedback: OpenAI API key not configured."
 
-        openai.api_key = os.environ.get('OPENAI_API_KEY')
-        system_message = {
-            "role": "system",
-            "content": "You are a helpful resume reviewer. Review the following resume and "
-                       "provide constructive feedback. Focus on general advice, formatting, "
-                       "keyword optimization, and job relevance."
-        }
-        guide_message = {
-            "role": "user",
-            "content": f"Here are some helpful guidelines to follow when \
-                  giving the feedback:\n\n{guide_text}"
-        }
-        resume_message = {
-            "role": "user",
-            "content": f"Please review this resume:\n\n{resume_text}"
-        }
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[system_message, guide_message, resume_message],
-            timeout=60.0,
+        response = http_client.get_openai_client(api_key).chat.completions.create(
+            timeout=http_client.get_timeout('openai.chat'),
+            **resume_feedback_request(resume_text, guide_text)
         )
         return markdown.markdown(response.choices[0].message.content)
-    except APITimeoutError:
-        return markdown.markdown(
-            "## Error\n\nError generating AI feedback: The request to the AI service "
-            "timed out after 60 seconds. This might be due to a long resume or temporary "
-            "high load on the AI service. Please try again later."
+    except Exception as ex: # pylint: disable=broad-exception-caught
+        return resume_feedback_error(ex)
+
+
+async def aget_resume_feedback(resume_text):
+    """
+    This function is the async variant of get_resume_feedback.
+    """
+    guide_text = await sync_to_async(load_resume_guide)()
+    if "Error loading resume guide:" in guide_text:
+        return "Could not generate feedback due to a configuration issue (unable to load guide)."
+
+    try:
+        api_key = http_client.get_openai_api_key()
+        if not api_key:
+            return "Could not generate feedback: OpenAI API key not configured."
+
+        response = await http_client.get_async_openai_client(api_key).chat.completions.create(
+            timeout=http_client.get_timeout('openai.chat'),
+            **resume_feedback_request(resume_text, guide_text)
         )
+        return markdown.markdown(response.choices[0].message.content)
     except Exception as ex: # pylint: disable=broad-exception-caught
-        return markdown.markdown(f"## Error\n\nError generating AI feedback: {ex}")
+        return resume_feedback_error(ex)
+
+
+async def astream_resume_feedback(resume_text):
+    """
+    This function streams AI feedback for a resume as Markdown text chunks. It
+    raises ResumeFeedbackError if the feedback cannot be generated, also midway.
+    """
+    guide_text = await sync_to_async(load_resume_guide)()
+    if "Error loading resume guide:" in guide_text:
+        raise ResumeFeedbackError(markdown.markdown(
+            "## Error\n\nCould not generate feedback due to a configuration issue "
+            "(unable to load guide)."))
+
+    api_key = http_client.get_openai_api_key()
+    if not api_key:
+        raise ResumeFeedbackError(markdown.markdown(
+            "## Error\n\nCould not generate feedback: OpenAI API key not configured."))
+
+    try:
+        stream = await http_client.get_async_openai_client(api_key).chat.completions.create(
+            timeout=http_client.get_timeout('openai.chat'),
+            stream=True,
+            **resume_feedback_request(resume_text, guide_text)
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    except Exception as ex: # pylint: disable=broad-exception-caught
+        raise ResumeFeedbackError(resume_feedback_error(ex)) from ex
 
 
 @login_required
@@ -253,38 +403,23 @@ def resume_feedback(request, resume_id):
     profile = request.user.profile
     feedback_html = ""
     error_message = ""
+    stream_url = None
 
-    try:
-        if not (request.user.is_superuser or profile.whitelisted_for_ai):
-            error_message = \
+    if not (request.user.is_superuser or profile.whitelisted_for_ai):
+        error_message = \
 markdown.markdown("## Eligibility\n\nYou are not currently eligible for AI feedback. \
                   Please contact support if you believe this is an error.")
-        else:
-            if resume.ai_feedback:
-                feedback_html = resume.ai_feedback
-            else:
-                resume_text = parse_resume(resume.resume)
-                if "Error parsing file:" in resume_text or "Unsupported file type" in resume_text:
-                    error_message = \
-                    markdown.markdown(f"## Error\n\nCould not parse resume file: {resume_text}")
-                else:
-                    feedback_html = get_resume_feedback(resume_text)
-                    if feedback_html.startswith("## Error") or \
-                    "Could not generate feedback" in feedback_html:
-                        error_message = feedback_html
-                        feedback_html = ""
-                    else:
-                        resume.ai_feedback = feedback_html
-                        resume.save()
-
-    except Exception as e: # pylint: disable=broad-exception-caught
-        error_message = markdown.markdown(f"## Error\n\nAn unexpected server error \
-                                          occurred while generating feedback: {str(e)}")
+    elif resume.ai_feedback:
+        feedback_html = resume.ai_feedback
+    else:
+        # the page fetches the feedback from the async resume_feedback_stream view
+        stream_url = reverse('resume_feedback_stream', args=[resume.id])
 
     context = {
         'resume': resume,
         'feedback': feedback_html,
-        'error_message': error_message
+        'error_message': error_message,
+        'stream_url': stream_url
     }
     return render(request, 'users/feedback_page.html', context)
 
@@ -78,9 +78,24 @@ if (! try_python_command "manage.py" "create_admin_team"); then
     exit 1
 fi
 
+echo -e "${BLUE}========== Starting AI task worker ==========${NC}"
+try_python_command "manage.py" "run_ai_worker" &
+AI_WORKER_PID=$!
+trap 'kill $AI_WORKER_PID 2>/dev/null' EXIT
+
 echo -e "${BLUE}========== Starting development server ==========${NC}"
 echo -e "${GREEN}The application will be available at http://127.0.0.1:8000/${NC}"
-if (! try_python_command "manage.py" "runserver" "0.0.0.0:8000"); then
-    echo -e "${RED}Error: Could not start development server. Please check your Python installation.${NC}"
-    exit 1
+## serve over ASGI like production, so AI feedback and cover letters stream;
+## runserver (WSGI) buffers each stream and sends it only once it is finished
+if (try_python_command "-c" "import uvicorn" &> /dev/null); then
+    if (! try_python_command "-m" "uvicorn" "myproject.asgi:application" "--reload" "--host" "0.0.0.0" "--port" "8000"); then
+        echo -e "${RED}Error: Could not start development server. Please check your Python installation.${NC}"
+        exit 1
+    fi
+else
+    echo -e "${RED}uvicorn is not installed; falling back to runserver, where AI responses arrive all at once.${NC}"
+    if (! try_python_command "manage.py" "runserver" "0.0.0.0:8000"); then
+        echo -e "${RED}Error: Could not start development server. Please check your Python installation.${NC}"
+        exit 1
+    fi
 fi